@@ -1,3 +1,4 @@
 # Part of OpenG2P Registry. See LICENSE file for full copyright and licensing details.
 
 from . import res_partner_bank
+from . import res_bank
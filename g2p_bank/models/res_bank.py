@@ -0,0 +1,7 @@
+# Part of OpenG2P Registry. See LICENSE file for full copyright and licensing details.
+
+from odoo import models
+
+
+class G2PBank(models.Model):
+    _inherit = ["res.bank", "g2p.reference.lookup.mixin"]
@@ -46,3 +46,14 @@ class BankTest(TransactionCase):
         self.registrant_1.write({"bank_ids": [(0, 0, val)]})
 
         self.assertEqual(self.registrant_1.bank_ids[0].iban, "DE77100100100123456789")
+
+    def test_02_lookup_bank(self):
+        bank = self.env["res.bank"].create({"name": "Lookup Bank"})
+        self.assertEqual(self.env["res.bank"]._lookup("Lookup Bank"), bank.id)
+
+        # Archived banks are not looked up, whatever the context of the caller
+        bank.active = False
+        bank_model = self.env["res.bank"].with_context(active_test=False)
+        self.assertIsNone(bank_model._lookup("Lookup Bank"), "Archived bank looked up.")
+        bank.active = True
+        self.assertEqual(bank_model._lookup("Lookup Bank"), bank.id, "Restored bank not looked up.")
@@ -10,20 +10,44 @@ class ProcessIndividualMixin(models.AbstractModel):
             res["bank_ids"] = self._process_bank_ids(individual)
         return res
 
+    def _get_references(self, registrants):
+        references = super()._get_references(registrants)
+        bank_names = set()
+        pending = list(registrants)
+        while pending:
+            registrant = pending.pop()
+            bank_names.update(rec.bank_name for rec in getattr(registrant, "bank_ids", None) or [])
+            pending.extend(getattr(registrant, "members", None) or [])
+        references["banks"] = self._search_references("banks", bank_names)
+        return references
+
+    def _search_references(self, reference_type, keys):
+        """
+        Look up banks by name, creating the missing ones with a single create.
+        """
+        if reference_type != "banks":
+            return super()._search_references(reference_type, keys)
+        keys = {key for key in keys if key}
+        if not keys:
+            return {}
+        bank_model = self.env["res.bank"]
+        banks = bank_model._lookup_many(keys)
+        missing = sorted(keys - banks.keys())
+        if missing:
+            created = bank_model.sudo().create([{"name": name} for name in missing])
+            banks.update(zip(missing, created.ids, strict=True))
+        return banks
+
     def _process_bank_ids(self, registrant_info):
         bank_ids = []
         for rec in registrant_info.bank_ids:
-            bank_name = self.env["res.bank"].sudo().search([("name", "=", rec.bank_name)])
-            if bank_name:
-                bank_name = bank_name[0]
-            else:
-                bank_name = self.env["res.bank"].sudo().create({"name": rec.bank_name})
+            bank_id = self._resolve_reference("banks", rec.bank_name)
             bank_ids.append(
                 (
                     0,
                     0,
                     {
-                        "bank_id": bank_name.id,
+                        "bank_id": bank_id,
                         "acc_number": rec.acc_number,
                     },
                 )
@@ -168,9 +168,7 @@ class ODKClient:
                     0,
                     0,
                     {
-                        "id_type": self.env["g2p.id.type"]
-                        .search([("name", "=", reg_id.get("id_type"))], limit=1)
-                        .id,
+                        "id_type": self.env["g2p.id.type"]._lookup(reg_id.get("id_type")),
                         "value": reg_id.get("value"),
                         "expiry_date": reg_id.get("expiry_date"),
                     },
@@ -224,8 +222,8 @@ class ODKClient:
 
     def get_member_kind(self, record):
         kind_as_str = record.get("kind", None)
-        kind = self.env["g2p.group.membership.kind"].search([("name", "=", kind_as_str)], limit=1)
-        return kind
+        kind_model = self.env["g2p.group.membership.kind"]
+        return kind_model.browse(kind_model._lookup(kind_as_str))
 
     def get_member_relationship(self, source_id, record):
         member_relation = record.get("relationship_with_head", None)
@@ -240,8 +238,7 @@ class ODKClient:
 
     def get_gender(self, gender_val):
         if gender_val:
-            gender = self.env["gender.type"].sudo().search([("value", "=", gender_val)], limit=1)
-            return gender.code if gender else None
+            return self.env["gender.type"]._lookup(gender_val, key_field="value", value_field="code")
         return None
 
     def get_dob(self, record):
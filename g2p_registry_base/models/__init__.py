@@ -1,5 +1,6 @@
 # Part of OpenG2P Registry. See LICENSE file for full copyright and licensing details.
 
+from . import reference_lookup
 from . import registrant
 from . import reg_id
 from . import reg_relationship
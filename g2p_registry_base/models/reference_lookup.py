@@ -0,0 +1,77 @@
+# Part of OpenG2P Registry. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, models, tools
+
+
+class G2PReferenceLookupMixin(models.AbstractModel):
+    """
+    Cached lookup of small reference tables, such as ID types or kinds, by name or code.
+
+    The tables are cached per registry and cleared when a record of any of these models is
+    created or removed, or when a field that the lookups read is written. Archived records
+    are never looked up, whatever the context of the caller.
+    """
+
+    _name = "g2p.reference.lookup.mixin"
+    _description = "Reference Lookup Mixin"
+
+    # Field the records are looked up by
+    _lookup_key_field = "name"
+
+    @api.model
+    def _lookup(self, key, key_field=None, value_field="id"):
+        """
+        Get the value of the record with the given name or code.
+
+        :return: The value, the id by default, or None when no record matches.
+        """
+        if not key:
+            return None
+        return self._get_lookup_table(key_field or self._lookup_key_field, value_field).get(key)
+
+    @api.model
+    def _lookup_many(self, keys, key_field=None, value_field="id"):
+        """
+        Get the values of the records with the given names or codes.
+
+        :return: The values keyed by name or code, without the keys that match no record.
+        :rtype: dict
+        """
+        table = self._get_lookup_table(key_field or self._lookup_key_field, value_field)
+        return {key: table[key] for key in keys if key in table}
+
+    @api.model
+    def _get_lookup_fields(self):
+        """
+        Get the fields that the cached lookup tables depend on.
+        """
+        order_fields = {item.split()[0] for item in (self._order or "").split(",") if item.strip()}
+        return {self._lookup_key_field, "name", "code", "value", "active"} | order_fields
+
+    @api.model
+    @tools.ormcache("key_field", "value_field")
+    def _get_lookup_table(self, key_field, value_field):
+        table = {}
+        # The first record in the order of the model wins, as with a search limited to one
+        # The table is shared by all the callers, so it does not depend on their context
+        for rec in self.sudo().with_context(active_test=True).search([]):
+            if rec[key_field]:
+                table.setdefault(rec[key_field], rec[value_field])
+        return table
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        res = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return res
+
+    def write(self, vals):
+        res = super().write(vals)
+        if not self._get_lookup_fields().isdisjoint(vals):
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
@@ -15,9 +15,10 @@ class G2PRegistrantID(models.Model):
         "res.partner",
         "Registrant",
         required=True,
+        index=True,
         domain=[("is_registrant", "=", True)],
     )
-    id_type = fields.Many2one("g2p.id.type", "ID Type", required=True)
+    id_type = fields.Many2one("g2p.id.type", "ID Type", required=True, index=True)
     value = fields.Char(size=100)
 
     expiry_date = fields.Date()
@@ -43,6 +44,54 @@ class G2PRegistrantID(models.Model):
             domain = [("partner_id", operator, name)] + domain
         return self._search(domain, limit=limit, order=order)
 
+    @api.model
+    def _get_individual_values(self, include_id_type, exclude_id_type=None, after=None, limit=None):
+        """
+        Get the distinct values of the valid IDs of a type held by active individuals.
+
+        Individuals holding an ID of the excluded type are left out. Values are sorted so that
+        they can be read by pages.
+
+        :param include_id_type: The name of the ID type of the values.
+        :param exclude_id_type: The name of the ID type of the individuals to leave out.
+        :param after: Only get the values after this one.
+        :param limit: The maximum number of values.
+        :rtype: list
+        """
+        self.flush_model()
+        self.env["g2p.id.type"].flush_model(["name"])
+        self.env["res.partner"].flush_model(["is_registrant", "is_group", "active"])
+        query = """
+            SELECT DISTINCT "reg_id"."value"
+            FROM "g2p_reg_id" AS "reg_id"
+            JOIN "g2p_id_type" AS "id_type" ON "id_type"."id" = "reg_id"."id_type"
+            JOIN "res_partner" AS "partner" ON "partner"."id" = "reg_id"."partner_id"
+            WHERE "id_type"."name" = %s
+                AND "reg_id"."status" = 'valid'
+                AND "reg_id"."value" IS NOT NULL
+                AND "partner"."is_registrant" AND NOT "partner"."is_group" AND "partner"."active"
+        """
+        params = [include_id_type]
+        if exclude_id_type:
+            query += """
+                AND NOT EXISTS (
+                    SELECT 1
+                    FROM "g2p_reg_id" AS "excluded"
+                    JOIN "g2p_id_type" AS "excluded_type" ON "excluded_type"."id" = "excluded"."id_type"
+                    WHERE "excluded"."partner_id" = "partner"."id" AND "excluded_type"."name" = %s
+                )
+            """
+            params.append(exclude_id_type)
+        if after is not None:
+            query += ' AND "reg_id"."value" > %s'
+            params.append(after)
+        query += ' ORDER BY "reg_id"."value"'
+        if limit:
+            query += " LIMIT %s"
+            params.append(limit)
+        self._cr.execute(query, params)
+        return [row[0] for row in self._cr.fetchall()]
+
     @api.constrains("value")
     @api.onchange("value")
     def _onchange_id_validation(self):
@@ -70,6 +119,7 @@ class G2PRegistrantID(models.Model):
 
 class G2PIDType(models.Model):
     _name = "g2p.id.type"
+    _inherit = ["g2p.reference.lookup.mixin"]
     _description = "ID Type"
     _order = "name ASC"
 
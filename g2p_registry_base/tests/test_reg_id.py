@@ -83,6 +83,29 @@ class TestG2PRegistrantID(TransactionCase):
         search_result = self.reg_id_model._name_search("Test Partner")
         self.assertIn(reg_id.id, search_result, "Expected record not found in search result")
 
+    def test_05_individual_values(self):
+        national_id = self.id_type_model.create({"name": "Test National ID"})
+        tax_id = self.id_type_model.create({"name": "Test Tax ID"})
+        partners = self.partner_model.create(
+            [{"name": f"Test Registrant {i}", "is_registrant": True} for i in range(3)]
+        )
+        for partner, value, status in zip(
+            partners, ["B2", "A1", "C3"], ["valid", "valid", "invalid"], strict=True
+        ):
+            self.reg_id_model.create(
+                {"partner_id": partner.id, "id_type": national_id.id, "value": value, "status": status}
+            )
+        self.reg_id_model.create({"partner_id": partners[0].id, "id_type": tax_id.id, "value": "T1"})
+
+        values = self.reg_id_model._get_individual_values("Test National ID")
+        self.assertEqual(values, ["A1", "B2"], "Only valid IDs should be returned, sorted.")
+        self.assertEqual(self.reg_id_model._get_individual_values("Test National ID", "Test Tax ID"), ["A1"])
+        self.assertEqual(self.reg_id_model._get_individual_values("Test National ID", after="A1"), ["B2"])
+        self.assertEqual(self.reg_id_model._get_individual_values("Test National ID", limit=1), ["A1"])
+
+        partners[1].active = False
+        self.assertEqual(self.reg_id_model._get_individual_values("Test National ID"), ["B2"])
+
 
 @tagged("post_install", "-at_install")
 class TestG2PIDType(TransactionCase):
@@ -107,3 +130,19 @@ class TestG2PIDType(TransactionCase):
             self.id_type_model.create({"name": "Test ID Type", "id_validation": "[0-9]+"})
 
         self.assertIn("Id type already exists", str(context.exception))
+
+    def test_04_lookup(self):
+        id_type = self.id_type_model.create({"name": "Lookup ID Type"})
+        self.assertEqual(self.id_type_model._lookup("Lookup ID Type"), id_type.id)
+        self.assertEqual(
+            self.id_type_model._lookup_many(["Lookup ID Type", "Missing ID Type"]),
+            {"Lookup ID Type": id_type.id},
+        )
+
+        # The cache is cleared when the reference changes
+        id_type.name = "Renamed ID Type"
+        self.assertIsNone(self.id_type_model._lookup("Lookup ID Type"))
+        self.assertEqual(self.id_type_model._lookup("Renamed ID Type"), id_type.id)
+
+        id_type.unlink()
+        self.assertIsNone(self.id_type_model._lookup("Renamed ID Type"))
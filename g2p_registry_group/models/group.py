@@ -17,6 +17,7 @@ class G2PGroup(models.Model):
 
 class G2PGroupKind(models.Model):
     _name = "g2p.group.kind"
+    _inherit = ["g2p.reference.lookup.mixin"]
     _description = "Group Kind"
     _order = "id desc"
 
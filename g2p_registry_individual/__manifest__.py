@@ -11,6 +11,7 @@
     "depends": ["base", "mail", "contacts", "g2p_registry_base"],
     "data": [
         "security/ir.model.access.csv",
+        "data/cron.xml",
         "views/individuals_view.xml",
         "views/gender_view.xml",
     ],
@@ -4,8 +4,10 @@ from odoo.exceptions import ValidationError
 
 class G2PGender(models.Model):
     _name = "gender.type"
+    _inherit = ["g2p.reference.lookup.mixin"]
     _description = "Gender Type"
     _rec_name = "code"
+    _lookup_key_field = "code"
 
     code = fields.Char()
     value = fields.Char()
@@ -6,10 +6,32 @@ from dateutil.relativedelta import relativedelta
 
 from odoo import _, api, fields, models
 from odoo.exceptions import ValidationError
+from odoo.tools.sql import column_exists, create_column
 
 _logger = logging.getLogger(__name__)
 
 
+class NullableInteger(fields.Integer):
+    """
+    Integer field storing NULL for an unset value, where Odoo stores 0.
+
+    Domains such as ``age_years < 5`` then leave out the records with an unknown value.
+    """
+
+    def convert_to_column(self, value, record, values=None, validate=True):
+        if value is None or value is False:
+            return None
+        return super().convert_to_column(value, record, values, validate)
+
+    def convert_to_cache(self, value, record, validate=True):
+        if value is None or value is False:
+            return None
+        return super().convert_to_cache(value, record, validate)
+
+    def convert_to_record(self, value, record):
+        return False if value is None else value
+
+
 class G2PIndividual(models.Model):
     _inherit = "res.partner"
 
@@ -24,6 +46,14 @@ class G2PIndividual(models.Model):
     birthdate_not_exact = fields.Boolean("Approximate Birthdate")
     birthdate = fields.Date("Date of Birth")
     age = fields.Char(compute="_compute_calc_age", size=50, readonly=True)
+    age_years = NullableInteger(
+        "Age (Years)",
+        compute="_compute_age_years",
+        store=True,
+        index=True,
+        readonly=True,
+        help="Age in full years, refreshed every night. Not set when the date of birth is not set.",
+    )
     gender = fields.Selection(selection=_get_dynamic_selection)
 
     @api.onchange("is_group", "family_name", "given_name", "addl_name")
@@ -49,6 +79,64 @@ class G2PIndividual(models.Model):
         for line in self:
             line.age = self.compute_age_from_dates(line.birthdate)
 
+    @api.depends("birthdate")
+    def _compute_age_years(self):
+        today = fields.Date.today()
+        for line in self:
+            line.age_years = relativedelta(today, line.birthdate).years if line.birthdate else False
+
+    def _auto_init(self):
+        # Existing individuals get their age from a single UPDATE instead of the ORM compute
+        if not column_exists(self._cr, self._table, "age_years"):
+            create_column(self._cr, self._table, "age_years", "int4")
+            if column_exists(self._cr, self._table, "birthdate"):
+                age_sql, age_params = self._get_age_years_sql(f'"{self._table}"', fields.Date.today())
+                self._cr.execute(
+                    f'UPDATE "{self._table}" SET "age_years" = {age_sql} WHERE "birthdate" IS NOT NULL',
+                    age_params,
+                )
+        return super()._auto_init()
+
+    @api.model
+    def _get_age_years_sql(self, alias, today):
+        """
+        Get the SQL expression of the age in full years of the partners of the alias at a date.
+
+        The age is NULL when the date of birth is not set.
+
+        :return: The expression and its parameters.
+        :rtype: tuple
+        """
+        return f"date_part('year', age(%s::date, {alias}.\"birthdate\"))::int4", [today]
+
+    @api.model
+    def _refresh_age_years(self):
+        """
+        Update the stored age of the partners whose age changed since it was computed.
+
+        :return: The ids of the partners whose age changed.
+        :rtype: list
+        """
+        self.flush_model(["birthdate", "age_years"])
+        age_sql, age_params = self._get_age_years_sql(f'"{self._table}"', fields.Date.today())
+        self._cr.execute(
+            f"""
+            UPDATE "{self._table}" SET "age_years" = {age_sql}
+            WHERE "age_years" IS DISTINCT FROM {age_sql}
+            RETURNING "id"
+            """,
+            age_params + age_params,
+        )
+        partner_ids = [row[0] for row in self._cr.fetchall()]
+        self.invalidate_model(["age_years"])
+        self.browse(partner_ids).modified(["age_years"])
+        return partner_ids
+
+    @api.model
+    def _cron_refresh_age_years(self):
+        partner_ids = self._refresh_age_years()
+        _logger.info("OpenG2P Registry: age refreshed for %s registrants", len(partner_ids))
+
     @api.constrains("age")
     def _check_age_is_integer(self):
         for record in self:
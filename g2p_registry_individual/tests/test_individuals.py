@@ -198,3 +198,39 @@ class IndividualsTest(TransactionCase):
             self.registrant_2.id,
             message,
         )
+
+    def test_06_age_years(self):
+        birthdate = date.today() - relativedelta(years=61, days=1)
+        self.registrant_1.birthdate = birthdate
+        self.assertEqual(self.registrant_1.age_years, 61, "Age in years not computed.")
+        self.assertIn(
+            self.registrant_1,
+            self.env["res.partner"].search([("age_years", ">=", 60)]),
+            "Age in years not searchable.",
+        )
+
+        # A stale age is corrected by the nightly refresh
+        self.env.cr.execute("UPDATE res_partner SET age_years = 59 WHERE id = %s", (self.registrant_1.id,))
+        self.registrant_1.invalidate_recordset(["age_years"])
+        self.assertIn(self.registrant_1.id, self.env["res.partner"]._refresh_age_years())
+        self.assertEqual(self.registrant_1.age_years, 61, "Age in years not refreshed.")
+
+    def test_07_age_years_without_birthdate(self):
+        # A registrant without a birthdate has no age, and is not counted as an infant
+        self.registrant_2.birthdate = False
+        self.registrant_2.flush_recordset()
+        self.assertFalse(self.registrant_2.age_years, "Age set without a birthdate.")
+        self.env.cr.execute("SELECT age_years FROM res_partner WHERE id = %s", (self.registrant_2.id,))
+        self.assertIsNone(self.env.cr.fetchone()[0], "Age without a birthdate not stored as NULL.")
+        self.assertNotIn(
+            self.registrant_2,
+            self.env["res.partner"].search([("age_years", "<", 5)]),
+            "Registrant without a birthdate counted as an infant.",
+        )
+
+        # Ages stored as 0 for unknown birthdates are cleared by the nightly refresh
+        self.env.cr.execute("UPDATE res_partner SET age_years = 0 WHERE id = %s", (self.registrant_2.id,))
+        self.registrant_2.invalidate_recordset(["age_years"])
+        self.assertIn(self.registrant_2.id, self.env["res.partner"]._refresh_age_years())
+        self.env.cr.execute("SELECT age_years FROM res_partner WHERE id = %s", (self.registrant_2.id,))
+        self.assertIsNone(self.env.cr.fetchone()[0], "Age without a birthdate not cleared by the refresh.")
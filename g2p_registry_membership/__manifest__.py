@@ -21,11 +21,14 @@
         "security/registrant_rule.xml",
         "data/group_membership_kinds.xml",
         "data/queue_job_channel.xml",
+        "data/cron.xml",
         "views/groups_view.xml",
         "views/individuals_view.xml",
         "views/group_membership_view.xml",
         "views/group_membership_kinds_view.xml",
         "views/membership_rules.xml",
+        "views/group_indicator_view.xml",
+        "views/group_indicator_recompute_view.xml",
     ],
     "assets": {},
     "demo": [],
@@ -3,3 +3,7 @@
 from . import group
 from . import individual
 from . import group_membership
+from . import group_indicator_recompute
+from . import group_membership_summary
+from . import group_indicator_dirty
+from . import group_indicator
@@ -1,12 +1,16 @@
 # Part of OpenG2P Registry. See LICENSE file for full copyright and licensing details.
 import logging
+import time
 
-from odoo import _, api, fields, models
+from odoo import _, api, fields, models, tools
 from odoo.exceptions import ValidationError
 from odoo.osv import expression
 
 _logger = logging.getLogger(__name__)
 
+# Above this number of groups, the ids are loaded in a temporary table instead of an array
+GROUP_IDS_TEMP_TABLE_THRESHOLD = 20000
+
 
 class G2PMembershipGroup(models.Model):
     _inherit = "res.partner"
@@ -29,54 +33,98 @@ class G2PMembershipGroup(models.Model):
 
     def write(self, values):
         res = super().write(values)
-        if self:
-            for rec in self:
-                unique_kinds = self.env["g2p.group.membership.kind"].search([("is_unique", "=", True)])
-                for unique_kind in unique_kinds:
-                    count = sum(1 for member in rec.group_membership_ids if unique_kind.id in member.kind.ids)
-                    if count > 1:
-                        raise ValidationError(_("Only one %s is allowed per group") % unique_kind.name)
+        if not {"disabled", "active"}.isdisjoint(values):
+            # Disabled groups are excluded from the aggregates, so their indicators are recounted
+            groups = self.filtered(lambda rec: rec.is_group)
+            groups._refresh_membership_summary()
+            groups._recompute_indicators_now()
+        if "group_membership_ids" in values:
+            self._check_unique_membership_kinds()
         return res
 
     @api.model
     def create(self, values):
         new_record = super().create(values)
         if new_record:
-            unique_kinds = self.env["g2p.group.membership.kind"].search([("is_unique", "=", True)])
-            for unique_kind in unique_kinds:
-                count = sum(1 for rec in self.group_membership_ids if unique_kind.id in rec.kind.ids)
-                if count > 1:
-                    raise ValidationError(_("Only one %s is allowed per group") % unique_kind.name)
+            new_record._check_unique_membership_kinds()
         return new_record
 
+    def _check_unique_membership_kinds(self):
+        """
+        Check that no unique membership kind is given to more than one member of the groups.
+
+        All the groups are checked in one query and every offending group is reported.
+        """
+        group_ids = [group_id for group_id in self.ids if isinstance(group_id, int)]
+        if not group_ids:
+            return
+        self.env["g2p.group.membership"].flush_model(["group", "kind"])
+        self.env["g2p.group.membership.kind"].flush_model(["name", "is_unique"])
+        self._cr.execute(
+            """
+            SELECT "kind"."name", "membership"."group"
+            FROM "g2p_group_membership" AS "membership"
+            JOIN "g2p_group_membership_g2p_group_membership_kind_rel" AS "kind_rel"
+                ON "kind_rel"."g2p_group_membership_id" = "membership"."id"
+            JOIN "g2p_group_membership_kind" AS "kind"
+                ON "kind"."id" = "kind_rel"."g2p_group_membership_kind_id" AND "kind"."is_unique"
+            WHERE "membership"."group" = ANY(%s::int4[])
+            GROUP BY "kind"."id", "kind"."name", "membership"."group"
+            HAVING COUNT(*) > 1
+            ORDER BY "kind"."id", "membership"."group"
+            """,
+            (self._to_int_array(group_ids),),
+        )
+        offending = {}
+        for kind_name, group_id in self._cr.fetchall():
+            offending.setdefault(kind_name, []).append(group_id)
+        if offending:
+            raise ValidationError(
+                "\n".join(
+                    _("Only one %(kind)s is allowed per group: %(groups)s")
+                    % {
+                        "kind": kind_name,
+                        "groups": ", ".join(self.browse(offending_ids).sudo().mapped("name")),
+                    }
+                    for kind_name, offending_ids in offending.items()
+                )
+            )
+
     def _compute_force_recompute_group(self):
         # _logger.info("SQL DEBUG: force_recompute_group: records:%s" % self.ids)
 
-        # We use this trick to have a consolidated list of groups to recompute
-        self.with_delay(priority=5, channel="root.recompute_indicators").recompute_indicators()
+        # We use this trick to have a consolidated list of groups to recompute.
+        # Indicators with a definition are kept up to date by membership deltas,
+        # so only the remaining ones need a full recompute. The groups are marked dirty
+        # and recomputed once per drainer run, however often they are marked.
+        definitions = self._get_indicator_definitions()
+        legacy_fields = [
+            field.name for field in self._get_calculated_group_fields() if field.name not in definitions
+        ]
+        if legacy_fields:
+            self.env["g2p.group.indicator.dirty"].sudo()._mark(self.ids)
         for group in self:
             group.force_recompute_canary = fields.Datetime.now()
 
     def _compute_ind_grp_num_individuals(self):
         self.compute_count_and_set_indicator("z_ind_grp_num_individuals", None, [])
 
-    def recompute_indicators_for_all_records(self, recomputed_fields=None):
-        # Set the batch size to 10000
-        batch_size = 10000
-        # Get the total number of records
-        total_records = self.env["res.partner"].search_count(
-            [
-                ("is_group", "=", True),
-                ("is_registrant", "=", True),
-                ("disabled", "=", None),
-            ]
-        )
+    def recompute_indicators_for_all_records(
+        self, recomputed_fields=None, batch_size=10000, worker_count=None
+    ):
+        """
+        Recompute the indicators of all the groups in resumable batches through the job queue.
+
+        With a worker count, the groups are split into id ranges recomputed in parallel.
 
-        # Iterate through the records in batches of 10000
-        for i in range(0, total_records, batch_size):
-            self.with_delay(priority=20, channel="root.recompute_indicators").recompute_indicators_for_batch(
-                i, batch_size, recomputed_fields=recomputed_fields
+        :return: The recompute record that tracks the progress and can cancel or resume it.
+        """
+        recompute_model = self.env["g2p.group.indicator.recompute"]
+        if worker_count:
+            return recompute_model.start_sharded_recompute(
+                recomputed_fields=recomputed_fields, worker_count=worker_count, batch_size=batch_size
             )
+        return recompute_model.start_recompute(recomputed_fields=recomputed_fields, batch_size=batch_size)
 
     def recompute_indicators_for_batch(self, offset, limit, recomputed_fields=None):
         # Get the records
@@ -98,14 +146,340 @@ class G2PMembershipGroup(models.Model):
                 recomputed_fields = self._get_calculated_group_fields(recomputed_fields)
         else:
             recomputed_fields = self._get_calculated_group_fields()
+        # Defined indicators are aggregated together, the others go through their compute method
+        definitions = self._get_indicator_definitions()
+        defined_fields = [field.name for field in recomputed_fields if field.name in definitions]
+        if defined_fields:
+            self._compute_indicators(defined_fields)
         for field in recomputed_fields:
-            self.env.add_to_compute(field, self)
+            if field.name not in definitions:
+                self.env.add_to_compute(field, self)
+
+    def _get_indicator_definitions(self):
+        """
+        Get the indicators that are maintained incrementally from membership changes.
+
+        Modules adding ``z_ind_grp_*`` fields should extend this with the same kinds, domain
+        and presence_only they pass to ``compute_count_and_set_indicator``. Indicators
+        configured as g2p.group.indicator records are added, and take precedence. Indicators
+        that are not defined here are recomputed in full through the job queue.
+
+        :return: The indicator definitions keyed by field name.
+        :rtype: dict
+        """
+        definitions = {
+            "z_ind_grp_num_individuals": {"kinds": None, "domain": [], "presence_only": False},
+        }
+        definitions.update(self.env["g2p.group.indicator"]._get_definitions())
+        return definitions
+
+    def _get_indicator_domain_fields(self):
+        """
+        Get the individual fields that the indicator domains depend on.
+        """
+        field_names = {"disabled"}
+        for definition in self._get_indicator_definitions().values():
+            for leaf in definition["domain"] or []:
+                if isinstance(leaf, list | tuple) and len(leaf) == 3:
+                    field_name = leaf[0].split(".")[0]
+                    field_names.add(field_name)
+                    # Stored computed fields such as age_years change with their dependencies
+                    field = self._fields.get(field_name)
+                    if field and field.store and field.compute:
+                        field_names.update(depend.split(".")[0] for depend in field.get_depends(self)[0])
+        return field_names
+
+    def _get_indicator_snapshot(self, membership_ids):
+        """
+        Count, per indicator and group, the given memberships that match each indicator.
+
+        :param membership_ids: The ids of the memberships of the groups to take into account.
+        :type membership_ids: list
+        :return: The counts as ``{field_name: {group_id: count}}``.
+        :rtype: dict
+        """
+        groups = self.filtered(lambda a: a.is_group)
+        if not groups or not membership_ids:
+            return {}
+        self.env["g2p.group.membership"].flush_model()
+        self.env["res.partner"].flush_model()
+        return groups._query_indicators_aggregate(
+            self._get_indicator_definitions(), membership_ids=membership_ids
+        )
+
+    def _apply_indicator_deltas(self, before, after):
+        """
+        Apply the difference between two indicator snapshots to the stored indicators.
+
+        Counts are incremented in place. A presence indicator is set when a matching member
+        is added, and recounted for the group when one is removed since other members may
+        still match.
+        """
+        definitions = self._get_indicator_definitions()
+        for field_name, definition in definitions.items():
+            old_counts = before.get(field_name, {})
+            new_counts = after.get(field_name, {})
+            deltas = {}
+            for group_id in set(old_counts) | set(new_counts):
+                delta = new_counts.get(group_id, 0) - old_counts.get(group_id, 0)
+                if delta:
+                    deltas[group_id] = delta
+            if not deltas:
+                continue
+
+            self.env["res.partner"].flush_model([field_name])
+            if definition["presence_only"]:
+                added_ids = [group_id for group_id, delta in deltas.items() if delta > 0]
+                removed_ids = [group_id for group_id, delta in deltas.items() if delta < 0]
+                if added_ids:
+                    self._cr.execute(
+                        f'UPDATE res_partner SET "{field_name}" = TRUE WHERE id IN %s',
+                        (tuple(added_ids),),
+                    )
+                if removed_ids:
+                    self.browse(removed_ids)._compute_indicators([field_name])
+            else:
+                self._cr.execute(
+                    f'UPDATE res_partner SET "{field_name}" = COALESCE("{field_name}", 0) + deltas.delta '
+                    "FROM unnest(%s::int[], %s::int[]) AS deltas(group_id, delta) "
+                    "WHERE res_partner.id = deltas.group_id",
+                    (self._to_int_array(deltas.keys()), self._to_int_array(deltas.values())),
+                )
+            groups = self.browse(list(deltas.keys()))
+            groups.invalidate_recordset([field_name])
+            groups.modified([field_name])
+            _logger.debug("OpenG2P Registry: indicator deltas: Field: %s - %s", field_name, deltas)
+
+    def _refresh_membership_summary(self):
+        """
+        Rebuild the membership summary rows of the groups.
+        """
+        groups = self.filtered(lambda a: a.is_group and a.id)
+        if groups:
+            self.env["g2p.group.membership.summary"].sudo()._refresh(groups.ids)
+
+    def _recompute_indicators_now(self):
+        """
+        Recount every defined indicator of the groups in the current transaction.
+        """
+        self._compute_indicators()
+
+    def _compute_indicators(self, field_names=None):
+        """
+        Recompute defined indicators of the groups with a single aggregation query.
+
+        Defined indicators already waiting to be recomputed on these groups are included, so
+        that every pending indicator is served by the same query and the same UPDATE.
+
+        :param field_names: The indicators to recompute. All the defined ones if not set.
+        :type field_names: list
+        """
+        groups = self.filtered(lambda a: a.is_group)
+        if not groups:
+            return
+        all_definitions = self._get_indicator_definitions()
+        if field_names is None:
+            field_names = list(all_definitions)
+        field_names = set(field_names)
+        for field_name in all_definitions:
+            field = self._fields[field_name]
+            if self.env.records_to_compute(field) & groups:
+                field_names.add(field_name)
+                self.env.remove_to_compute(field, groups)
+        definitions = {name: all_definitions[name] for name in all_definitions if name in field_names}
+        if not definitions:
+            return
+
+        self.env.flush_all()
+        counts = groups._query_indicators_aggregate(definitions)
+        values = {}
+        for field_name, definition in definitions.items():
+            values[field_name] = groups._get_indicator_values(
+                counts.get(field_name, {}), definition["presence_only"]
+            )
+        groups._write_indicator_values(values)
+
+    def _compile_indicator_filters(self, definitions):
+        """
+        Compile indicator definitions into filter conditions on a membership row.
+
+        The conditions refer to the ``kind`` and ``individual`` aliases of the aggregation
+        query. Definitions whose domain needs extra joins can not be expressed as a filter
+        and are returned separately.
+
+        Compiled filters are cached per version of the definitions, so the domains are only
+        compiled again when an indicator changes.
+
+        :return: The ``(field_name, condition, params)`` filters and the remaining definitions.
+        :rtype: tuple
+        """
+        version = repr(
+            sorted(
+                (field_name, definition["kinds"], definition["domain"])
+                for field_name, definition in definitions.items()
+            )
+        )
+        filters, remaining_names = self._get_compiled_indicator_filters(version, definitions)
+        return list(filters), {field_name: definitions[field_name] for field_name in remaining_names}
+
+    @tools.ormcache("version")
+    def _get_compiled_indicator_filters(self, version, definitions):
+        filters = []
+        remaining = []
+        for field_name, definition in definitions.items():
+            conditions = []
+            params = []
+            if definition["kinds"]:
+                conditions.append('"kind"."name" IN %s')
+                params.append(tuple(definition["kinds"]))
+            if definition["domain"]:
+                individual_query_obj = expression.expression(
+                    model=self.env["res.partner"].sudo(),
+                    domain=definition["domain"],
+                    alias="individual",
+                ).query
+                (
+                    _individual_from_clause,
+                    individual_where_clause,
+                    individual_where_params,
+                ) = individual_query_obj.get_sql()
+                if individual_query_obj._joins:
+                    remaining.append(field_name)
+                    continue
+                conditions.append(individual_where_clause)
+                params.extend(individual_where_params)
+            filters.append((field_name, " AND ".join(conditions) or "TRUE", tuple(params)))
+        return tuple(filters), tuple(remaining)
+
+    def _query_indicators_aggregate(self, definitions, membership_ids=None):
+        """
+        Count the members of the groups matching each indicator in a single query.
+
+        Each indicator becomes a ``COUNT(*) FILTER (WHERE ...)`` column of one aggregation
+        over the group memberships, instead of one query per indicator.
+
+        :param definitions: The indicator definitions keyed by field name.
+        :type definitions: dict
+        :param membership_ids: Only count these memberships when given.
+        :type membership_ids: list
+        :return: The counts as ``{field_name: {group_id: count}}``.
+        :rtype: dict
+        """
+        result = {field_name: {} for field_name in definitions}
+        if not self.ids or not definitions:
+            return result
+
+        filters, remaining = self._compile_indicator_filters(definitions)
+        if filters:
+            select_query, select_params = self._get_indicators_aggregate_query(filters, membership_ids)
+            self._cr.execute(select_query, select_params)
+            for row in self._cr.fetchall():
+                for (field_name, _condition, _params), count in zip(filters, row[1:], strict=True):
+                    if count:
+                        result[field_name][row[0]] = count
+
+        for field_name, definition in remaining.items():
+            membership_kind_domain = None
+            if definition["kinds"]:
+                membership_kind_domain = [("name", "in", definition["kinds"])]
+            result[field_name] = dict(
+                self._query_members_aggregate(
+                    membership_kind_domain, definition["domain"], membership_ids=membership_ids
+                )
+            )
+        return result
+
+    def _get_indicators_aggregate_query(self, filters, membership_ids=None):
+        """
+        Build the aggregation query of compiled indicator filters over the groups.
+
+        :param filters: The ``(field_name, condition, params)`` filters of the indicators.
+        :type filters: list
+        :param membership_ids: Only count these memberships when given.
+        :type membership_ids: list
+        :return: The query and its parameters.
+        :rtype: tuple
+        """
+        select_columns = []
+        select_params = []
+        for field_name, condition, params in filters:
+            select_columns.append(f'COUNT(*) FILTER (WHERE {condition}) AS "{field_name}"')
+            select_params.extend(params)
+        group_ids_join, group_ids_params = self._get_group_ids_join('"membership"."group"')
+        where_clause = "TRUE"
+        where_params = []
+        if membership_ids is not None:
+            where_clause = '"membership"."id" = ANY(%s::int4[])'
+            where_params.append(self._to_int_array(membership_ids))
+        # The kind join is kept for every indicator so that members are counted
+        # the same way as in _query_members_aggregate.
+        select_query = f"""
+            SELECT "membership"."group", {", ".join(select_columns)}
+            FROM "g2p_group_membership" AS "membership"
+            {group_ids_join}
+            JOIN "res_partner" AS "grp" ON "grp"."id" = "membership"."group"
+            JOIN "res_partner" AS "individual" ON "individual"."id" = "membership"."individual"
+            LEFT JOIN "g2p_group_membership_g2p_group_membership_kind_rel" AS "kind_rel"
+                ON "kind_rel"."g2p_group_membership_id" = "membership"."id"
+            LEFT JOIN "g2p_group_membership_kind" AS "kind"
+                ON "kind"."id" = "kind_rel"."g2p_group_membership_kind_id"
+            WHERE {where_clause}
+                AND NOT "membership"."is_ended"
+                AND "grp"."is_registrant" AND "grp"."is_group" AND "grp"."active"
+                AND "grp"."disabled" IS NULL
+                AND "individual"."disabled" IS NULL
+            GROUP BY "membership"."group"
+        """
+        return select_query, select_params + group_ids_params + where_params
+
+    def _write_indicator_values(self, values):
+        """
+        Store indicator values of the groups with one UPDATE for all the indicators.
+
+        Rows whose values did not change are left untouched.
+
+        :param values: The values as ``{field_name: {group_id: value}}``, with a value for
+            every group of the recordset.
+        :type values: dict
+        """
+        field_names = list(values)
+        if not self.ids or not field_names:
+            return
+        self.flush_recordset(field_names)
+
+        ids = self.ids
+        set_clauses = []
+        changed_clauses = []
+        columns = ['"id"']
+        unnest_args = ["%s::int4[]"]
+        params = [self._to_int_array(ids)]
+        for field_name in field_names:
+            column_type = self._fields[field_name].column_type[1]
+            set_clauses.append(f'"{field_name}" = "vals"."{field_name}"')
+            changed_clauses.append(f'"res_partner"."{field_name}" IS DISTINCT FROM "vals"."{field_name}"')
+            columns.append(f'"{field_name}"')
+            unnest_args.append(f"%s::{column_type}[]")
+            params.append([values[field_name].get(group_id) for group_id in ids])
+
+        update_query = f"""
+            UPDATE "res_partner" SET {", ".join(set_clauses)}
+            FROM unnest({", ".join(unnest_args)}) AS "vals"({", ".join(columns)})
+            WHERE "res_partner"."id" = "vals"."id" AND ({" OR ".join(changed_clauses)})
+        """
+        self._cr.execute(update_query, params)
+
+        for field_name in field_names:
+            self.env.remove_to_compute(self._fields[field_name], self)
+        self.invalidate_recordset(field_names)
+        self.modified(field_names)
 
     def _get_calculated_group_fields(self, field_names=None):
         model_fields_id = self.env["res.partner"]._fields
+        definitions = self._get_indicator_definitions()
         fields = []
         for field_name, field in model_fields_id.items():
-            if not field.compute or not field.store:
+            # Indicators configured as records have no compute method
+            if not (field.compute or field_name in definitions) or not field.store:
                 continue
             if field_names is not None and len(field_names):
                 if field_name in field_names:
@@ -116,11 +490,21 @@ class G2PMembershipGroup(models.Model):
                     fields.append(field)
         return fields
 
-    def count_individuals(self, relationship_kinds=None, domain=None):
+    def count_individuals(self, relationship_kinds=None, domain=None, membership_ids=None):
         """
         Count the number of individuals in the group that match the kinds and domain.
+
+        When membership_ids is given, only those memberships are counted. Otherwise the counts
+        come from the membership summary whenever the domain can be answered from it.
         """
         # _logger.info("SQL DEBUG: count_individuals: records:%s" % self.ids)
+        summary_model = self.env["g2p.group.membership.summary"]
+        if membership_ids is None and summary_model._can_count(domain):
+            query_result = summary_model._count_individuals(
+                self.filtered("id").ids, relationship_kinds=relationship_kinds, domain=domain
+            )
+            return query_result or dict()
+
         membership_kind_domain = None
         individual_domain = None
         if self.group_membership_ids:
@@ -132,13 +516,31 @@ class G2PMembershipGroup(models.Model):
         if domain is not None:
             individual_domain = domain
 
-        query_result = self._query_members_aggregate(membership_kind_domain, individual_domain)
+        query_result = self._query_members_aggregate(
+            membership_kind_domain, individual_domain, membership_ids=membership_ids
+        )
 
         return query_result
 
-    def _query_members_aggregate(self, membership_kind_domain=None, individual_domain=None):
+    def _query_members_aggregate(
+        self, membership_kind_domain=None, individual_domain=None, membership_ids=None
+    ):
         # _logger.info("SQL DEBUG: query_members_aggregate: records:%s" % self.ids)
-        ids = self.ids
+        select_query, select_params = self._get_members_aggregate_query(
+            membership_kind_domain, individual_domain, membership_ids=membership_ids
+        )
+        # _logger.info(
+        #   "SQL DEBUG: SQL query: %s, params: %s" % (select_query, select_params)
+        # )
+        self._cr.execute(select_query, select_params)
+        # Generate result as tuple
+        results = self._cr.fetchall()
+        # _logger.info("SQL DEBUG: SQL Query Result: %s" % results)
+        return results
+
+    def _get_members_aggregate_query(
+        self, membership_kind_domain=None, individual_domain=None, membership_ids=None, ids_strategy=None
+    ):
         partner_model = "res.partner"
         domain = [
             ("is_registrant", "=", True),
@@ -166,17 +568,22 @@ class G2PMembershipGroup(models.Model):
             "id",
         )
 
-        # Add INNER JOIN with VALUES (ids)
+        # Add INNER JOIN with the ids
         # TODO: In the absence of managing "INNER JOIN" by Odoo Query object,
         # We will create the inner join manually
-        inner_join_vals = "(" + "), (".join(map(str, ids)) + ")"
-        inner_join_query = "INNER JOIN ( VALUES %s ) vals(v)" % inner_join_vals
-        inner_join_query += f' ON ("{membership_alias}"."group" = v and not "{membership_alias}"."is_ended") '
+        inner_join_query, inner_join_params = self._get_group_ids_join(
+            f'"{membership_alias}"."group"',
+            condition=f'not "{membership_alias}"."is_ended"',
+            strategy=ids_strategy,
+        )
 
         # Build where clause for the membership_alias
+        membership_domain = [("is_ended", "=", False)]  # ("group", "in", ids)]
+        if membership_ids is not None:
+            membership_domain.append(("id", "in", list(membership_ids)))
         membership_query_obj = expression.expression(
             model=self.env["g2p.group.membership"],
-            domain=[("is_ended", "=", False)],  # ("group", "in", ids)],
+            domain=membership_domain,
             alias=membership_alias,
         ).query
         (
@@ -240,16 +647,113 @@ class G2PMembershipGroup(models.Model):
         select_query += " GROUP BY " + partner_model.replace(".", "_") + ".id"
 
         # TODO: In the absence of managing "INNER JOIN" by Odoo Query object,
-        # Inject the prepared INNER JOIN manually
+        # Inject the prepared INNER JOIN manually, its parameters come before the WHERE ones
         index = select_query.find("WHERE")
-        select_query = select_query[:index] + inner_join_query + select_query[index:]
-        # _logger.info(
-        #   "SQL DEBUG: SQL query: %s, params: %s" % (select_query, select_params)
-        # )
-        self._cr.execute(select_query, select_params)
-        # Generate result as tuple
-        results = self._cr.fetchall()
-        # _logger.info("SQL DEBUG: SQL Query Result: %s" % results)
+        select_query = select_query[:index] + inner_join_query + " " + select_query[index:]
+        return select_query, inner_join_params + list(select_params)
+
+    def _get_group_ids_join(self, column, condition=None, strategy=None):
+        """
+        Build the INNER JOIN that restricts a query to the groups of the recordset.
+
+        The ids are bound as a single ``int[]`` literal, so the statement text stays the same
+        whatever the number of groups and PostgreSQL does not have to parse a row per id.
+        Above GROUP_IDS_TEMP_TABLE_THRESHOLD groups they are loaded in a temporary table,
+        which gets statistics for the planner.
+
+        :param column: The qualified column holding the group id.
+        :type column: str
+        :param condition: An additional condition of the join.
+        :type condition: str
+        :param strategy: Force ``array`` or ``temp_table``. ``values`` builds the former
+            VALUES list and is only kept to compare against.
+        :type strategy: str
+        :return: The join clause and its parameters.
+        :rtype: tuple
+        """
+        ids = self.ids
+        if strategy is None:
+            strategy = "temp_table" if len(ids) > GROUP_IDS_TEMP_TABLE_THRESHOLD else "array"
+
+        on_clause = f'{column} = "vals"."v"'
+        if condition:
+            on_clause += f" and {condition}"
+        if strategy == "values":
+            inner_join_vals = "(" + "), (".join(map(str, ids)) + ")"
+            return f'INNER JOIN ( VALUES {inner_join_vals} ) "vals"("v") ON ({on_clause})', []
+        if strategy == "temp_table":
+            table = self._load_group_ids_temp_table()
+            return f'INNER JOIN "{table}" AS "vals"("v") ON ({on_clause})', []
+        return f'INNER JOIN unnest(%s::int4[]) AS "vals"("v") ON ({on_clause})', [self._to_int_array(ids)]
+
+    def _load_group_ids_temp_table(self):
+        """
+        Load the ids of the recordset in a temporary table dropped at the end of the transaction.
+
+        :return: The name of the table, with the ids in its ``v`` column.
+        :rtype: str
+        """
+        table = "g2p_group_ids_tmp"
+        self._cr.execute(
+            f'CREATE TEMPORARY TABLE IF NOT EXISTS "{table}" ("v" int4 PRIMARY KEY) ON COMMIT DROP'
+        )
+        self._cr.execute(f'TRUNCATE "{table}"')
+        self._cr.execute(
+            f'INSERT INTO "{table}" SELECT DISTINCT unnest(%s::int4[])', (self._to_int_array(self.ids),)
+        )
+        self._cr.execute(f'ANALYZE "{table}"')
+        return table
+
+    @api.model
+    def _to_int_array(self, ids):
+        """
+        Format ids as a PostgreSQL array literal, to be bound as a single ``%s::int4[]`` parameter.
+        """
+        return "{" + ",".join(str(int(_id)) for _id in ids) + "}"
+
+    @api.model
+    def _benchmark_members_aggregate(self, sizes=(1000, 10000, 100000)):
+        """
+        Compare the ways of restricting _query_members_aggregate to a batch of groups.
+
+        For every size, the aggregation is run through ``EXPLAIN ANALYZE`` with the former
+        VALUES list, the int[] parameter and the temporary table. Ids of existing groups are
+        used, padded with unused ids when there are not enough groups. Nothing is written
+        but the temporary table.
+
+        Run it from an Odoo shell: ``env["res.partner"]._benchmark_members_aggregate()``.
+
+        :return: One entry per size and strategy with the query size in bytes, and the
+            planning, execution and total times in milliseconds.
+        :rtype: list
+        """
+        self.env.flush_all()
+        self._cr.execute("SELECT id FROM res_partner WHERE is_group ORDER BY id DESC LIMIT %s", (max(sizes),))
+        group_ids = [row[0] for row in self._cr.fetchall()]
+        self._cr.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM res_partner")
+        unused_id = self._cr.fetchone()[0]
+
+        results = []
+        for size in sizes:
+            ids = group_ids[:size]
+            ids += list(range(unused_id, unused_id + size - len(ids)))
+            groups = self.browse(ids)
+            for strategy in ("values", "array", "temp_table"):
+                start = time.perf_counter()
+                select_query, select_params = groups._get_members_aggregate_query(ids_strategy=strategy)
+                query = self._cr.mogrify(select_query, select_params).decode()
+                self._cr.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + query)
+                plan = self._cr.fetchone()[0][0]
+                result = {
+                    "size": size,
+                    "strategy": strategy,
+                    "query_bytes": len(query),
+                    "planning_ms": plan["Planning Time"],
+                    "execution_ms": plan["Execution Time"],
+                    "total_ms": (time.perf_counter() - start) * 1000,
+                }
+                _logger.info("OpenG2P Registry: members aggregate benchmark: %s", result)
+                results.append(result)
         return results
 
     def compute_count_and_set_indicator(self, field_name, kinds, domain, presence_only=False):
@@ -273,44 +777,56 @@ class G2PMembershipGroup(models.Model):
         # )
         # Get groups only
         records = self.filtered(lambda a: a.is_group)
-        query_result = None
         if records:
-            # Generate the SQL query
-            query_result = records.count_individuals(relationship_kinds=kinds, domain=domain)
-            # _logger.info(
-            #     "SQL DEBUG: compute_count_and_set_indicator: field:%s, results:%s"
-            #     % (field_name, query_result)
-            # )
-
-            result_map = dict(query_result)
-            for record in records:
-                if presence_only:
-                    record[field_name] = result_map.get(record.id, 0) > 0
-                else:
-                    record[field_name] = result_map.get(record.id, 0)
+            records._count_and_set_indicator(field_name, kinds, domain, presence_only)
 
     def _update_compute_fields(self, records, field_name, kinds, domain, presence_only=False):
         # Get groups only
         records = records.filtered(lambda a: a.is_group)
-
-        query_result = None
         if records:
             # Generate the SQL query using Job Queue
-            query_result = records.count_individuals(relationship_kinds=kinds, domain=domain)
-            # _logger.info(
-            #     "SQL DEBUG: job_queue->_update_compute_fields: field:%s, results:%s"
-            #     % (field_name, query_result)
-            # )
-            # if query_result:
-            #     # Update the compute fields and affected records
-
-            result_map = dict(query_result)
-            for record in records:
-                # _logger.info(
-                #     "SQL DEBUG: XXX job_queue->_update_compute_fields: record.id:%s, results:%s"
-                #     % (record.id, result_map.get(record.id, 0))
-                # )
-                if presence_only:
-                    record[field_name] = result_map.get(record.id, 0) > 0
-                else:
-                    record[field_name] = result_map.get(record.id, 0)
+            records._count_and_set_indicator(field_name, kinds, domain, presence_only)
+
+    def _count_and_set_indicator(self, field_name, kinds, domain, presence_only=False):
+        # Records being edited in a form are not in the database yet, they take
+        # the values of the records they originate from.
+        records = self.filtered("id")
+        new_records = self - records
+        origins = self.browse([record._origin.id for record in new_records if record._origin])
+
+        query_result = (records | origins).count_individuals(relationship_kinds=kinds, domain=domain)
+        # _logger.info(
+        #     "SQL DEBUG: compute_count_and_set_indicator: field:%s, results:%s"
+        #     % (field_name, query_result)
+        # )
+        result_map = dict(query_result)
+        records._set_indicator_results(field_name, result_map, presence_only)
+        for record in new_records:
+            count = result_map.get(record._origin.id, 0)
+            record[field_name] = count > 0 if presence_only else count
+
+    def _get_indicator_values(self, result_map, presence_only=False):
+        """
+        Get the indicator value of every group from the counts of an aggregation query.
+
+        Groups missing from the counts have no matching member.
+        """
+        if presence_only:
+            return {group_id: result_map.get(group_id, 0) > 0 for group_id in self.ids}
+        return {group_id: result_map.get(group_id, 0) for group_id in self.ids}
+
+    def _set_indicator_results(self, field_name, result_map, presence_only=False):
+        """
+        Store the counts of an aggregation query in an indicator with a single UPDATE.
+
+        Groups without matching members are reset to 0, or False for a presence indicator,
+        in the same statement.
+
+        :param field_name: The name of the indicator field.
+        :type field_name: str
+        :param result_map: The counts keyed by group id.
+        :type result_map: dict
+        :param presence_only: Store whether there is a matching member instead of the count.
+        :type presence_only: bool
+        """
+        self._write_indicator_values({field_name: self._get_indicator_values(result_map, presence_only)})
@@ -0,0 +1,150 @@
+# Part of OpenG2P Registry. See LICENSE file for full copyright and licensing details.
+import logging
+
+from odoo import _, api, fields, models, tools
+from odoo.exceptions import ValidationError
+from odoo.tools.safe_eval import safe_eval
+
+_logger = logging.getLogger(__name__)
+
+# Prefix of the fields created for indicators, matching the naming of group indicators
+INDICATOR_FIELD_PREFIX = "x_ind_grp_"
+
+
+class G2PGroupIndicator(models.Model):
+    _name = "g2p.group.indicator"
+    _description = "Group Indicator"
+    _order = "sequence, id"
+
+    name = fields.Char(required=True, translate=False)
+    sequence = fields.Integer(default=10)
+    active = fields.Boolean(default=True)
+    field_name = fields.Char(
+        required=True,
+        help="Field of the groups storing the indicator. "
+        f"A {INDICATOR_FIELD_PREFIX}* field is created when it does not exist.",
+    )
+    kind_ids = fields.Many2many(
+        "g2p.group.membership.kind",
+        string="Membership Kinds",
+        help="Only count members with one of these kinds, all members when empty.",
+    )
+    domain = fields.Char("Individual Domain", default="[]", required=True)
+    presence_only = fields.Boolean(help="Store whether a matching member exists instead of counting them.")
+
+    _sql_constraints = [
+        (
+            "field_name_unique",
+            "unique (field_name)",
+            "Only one indicator can be defined per field",
+        )
+    ]
+
+    @api.constrains("field_name", "presence_only")
+    def _check_field_name(self):
+        for rec in self:
+            field = self.env["res.partner"]._fields.get(rec.field_name)
+            if not field or not field.store:
+                raise ValidationError(_("The indicator field %s does not exist.") % rec.field_name)
+            expected_type = "boolean" if rec.presence_only else "integer"
+            if field.type != expected_type:
+                raise ValidationError(
+                    _("The indicator field %(field)s must be of type %(type)s.")
+                    % {"field": rec.field_name, "type": expected_type}
+                )
+
+    @api.constrains("domain")
+    def _check_domain(self):
+        for rec in self:
+            try:
+                self.env["res.partner"]._where_calc(rec._get_domain())
+            except Exception as e:
+                raise ValidationError(
+                    _("The individual domain of %(name)s is not valid: %(error)s")
+                    % {"name": rec.name, "error": e}
+                ) from e
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            self._create_indicator_field(vals)
+        res = super().create(vals_list)
+        self.env.registry.clear_cache()
+        res._recompute_groups()
+        return res
+
+    def write(self, vals):
+        if "field_name" in vals:
+            for rec in self:
+                # The type and label of a new field also depend on the values not written
+                self._create_indicator_field(
+                    dict({"name": rec.name, "presence_only": rec.presence_only}, **vals)
+                )
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        if not {"field_name", "kind_ids", "domain", "presence_only", "active"}.isdisjoint(vals):
+            self._recompute_groups()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
+    @api.model
+    def _create_indicator_field(self, vals):
+        field_name = vals.get("field_name")
+        if not field_name or field_name in self.env["res.partner"]._fields:
+            return
+        if not field_name.startswith(INDICATOR_FIELD_PREFIX):
+            raise ValidationError(_("New indicator fields must start with %s.") % INDICATOR_FIELD_PREFIX)
+        self.env["ir.model.fields"].sudo().create(
+            {
+                "name": field_name,
+                "model_id": self.env["ir.model"]._get_id("res.partner"),
+                "field_description": vals.get("name") or field_name,
+                "ttype": "boolean" if vals.get("presence_only") else "integer",
+                "store": True,
+                "readonly": True,
+                "copied": False,
+            }
+        )
+        if not vals.get("presence_only"):
+            # New groups count no member until they are computed, as the coded indicators
+            self.env["ir.default"].sudo().set("res.partner", field_name, 0)
+
+    def _get_domain(self):
+        self.ensure_one()
+        return safe_eval(self.domain or "[]")
+
+    def _recompute_groups(self):
+        field_names = self.filtered("active").mapped("field_name")
+        if field_names:
+            self.env["g2p.group.indicator.recompute"].sudo().start_recompute(recomputed_fields=field_names)
+
+    @api.model
+    def _get_definitions(self):
+        """
+        Get the definitions of the active indicators, as _get_indicator_definitions.
+
+        :rtype: dict
+        """
+        return {
+            field_name: {
+                "kinds": list(kinds) or None,
+                "domain": safe_eval(domain),
+                "presence_only": presence_only,
+            }
+            for field_name, kinds, domain, presence_only in self._get_cached_definitions()
+        }
+
+    @api.model
+    @tools.ormcache()
+    def _get_cached_definitions(self):
+        indicators = self.sudo().search([])
+        partner_fields = self.env["res.partner"]._fields
+        return tuple(
+            (rec.field_name, tuple(rec.kind_ids.mapped("name")), rec.domain or "[]", rec.presence_only)
+            for rec in indicators
+            if rec.field_name in partner_fields
+        )
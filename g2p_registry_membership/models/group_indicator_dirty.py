@@ -0,0 +1,118 @@
+# Part of OpenG2P Registry. See LICENSE file for full copyright and licensing details.
+import logging
+import time
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+
+class G2PGroupIndicatorDirty(models.Model):
+    _name = "g2p.group.indicator.dirty"
+    _description = "Group Indicator Dirty Group"
+    _log_access = False
+
+    group = fields.Many2one("res.partner", required=True, ondelete="cascade")
+    mark_count = fields.Integer(default=1)
+    marked_on = fields.Datetime()
+
+    _sql_constraints = [
+        (
+            "group_unique",
+            'unique ("group")',
+            "A group can only be marked once",
+        )
+    ]
+
+    @api.model
+    def _mark(self, group_ids):
+        """
+        Mark the groups for an indicator recompute.
+
+        A group already waiting for the drainer is not queued again, only its mark count grows.
+        """
+        group_ids = [group_id for group_id in group_ids if isinstance(group_id, int)]
+        if not group_ids:
+            return
+        self._cr.execute(
+            f"""
+            INSERT INTO "{self._table}" ("group", "mark_count", "marked_on")
+            SELECT DISTINCT "ids"."id", 1, now() AT TIME ZONE 'UTC'
+            FROM unnest(%s::int4[]) AS "ids"("id")
+            ON CONFLICT ("group") DO UPDATE SET "mark_count" = "{self._table}"."mark_count" + 1
+            """,
+            (self.env["res.partner"]._to_int_array(group_ids),),
+        )
+
+    @api.model
+    def _get_metrics(self):
+        """
+        Get the metrics of the dirty groups waiting for the drainer.
+
+        ``coalescing_ratio`` is the number of recomputes requested per queued group.
+
+        :rtype: dict
+        """
+        self._cr.execute(f'SELECT COUNT(*), COALESCE(SUM("mark_count"), 0) FROM "{self._table}"')
+        queue_depth, pending_marks = self._cr.fetchone()
+        return {
+            "queue_depth": queue_depth,
+            "pending_marks": pending_marks,
+            "coalescing_ratio": pending_marks / queue_depth if queue_depth else 0.0,
+        }
+
+    @api.model
+    def _cron_drain(self, batch_size=10000):
+        """
+        Recompute every dirty group once, in batches queued on the recompute channel.
+
+        Batches are claimed with SKIP LOCKED so that overlapping drainers do not take the
+        same groups.
+        """
+        start = time.perf_counter()
+        metrics = self._get_metrics()
+        _logger.info(
+            "OpenG2P Registry: indicator drainer: queue depth %s, pending marks %s, coalescing ratio %.1f",
+            metrics["queue_depth"],
+            metrics["pending_marks"],
+            metrics["coalescing_ratio"],
+        )
+        partners = self.env["res.partner"]
+        definitions = partners._get_indicator_definitions()
+        legacy_fields = [
+            field.name for field in partners._get_calculated_group_fields() if field.name not in definitions
+        ]
+        group_count = 0
+        mark_count = 0
+        while True:
+            self._cr.execute(
+                f"""
+                DELETE FROM "{self._table}"
+                WHERE "id" IN (
+                    SELECT "id" FROM "{self._table}" ORDER BY "group" LIMIT %s FOR UPDATE SKIP LOCKED
+                )
+                RETURNING "group", "mark_count"
+                """,
+                (batch_size,),
+            )
+            rows = self._cr.fetchall()
+            if not rows:
+                break
+            group_count += len(rows)
+            mark_count += sum(row[1] for row in rows)
+            if legacy_fields:
+                partners.browse(sorted(row[0] for row in rows)).with_delay(
+                    priority=5, channel="root.recompute_indicators"
+                ).recompute_indicators(recomputed_fields=legacy_fields)
+            if len(rows) < batch_size:
+                break
+        self.invalidate_model()
+        _logger.info(
+            "OpenG2P Registry: indicator drainer: %s groups for %s recompute requests "
+            "(coalescing ratio %.1f) in %.2fs",
+            group_count,
+            mark_count,
+            mark_count / group_count if group_count else 0.0,
+            time.perf_counter() - start,
+        )
+        return {"group_count": group_count, "mark_count": mark_count}
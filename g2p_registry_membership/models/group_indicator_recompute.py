@@ -0,0 +1,508 @@
+# Part of OpenG2P Registry. See LICENSE file for full copyright and licensing details.
+import logging
+import time
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+
+class G2PGroupIndicatorRecompute(models.Model):
+    _name = "g2p.group.indicator.recompute"
+    _description = "Group Indicator Recompute"
+    _order = "id desc"
+
+    name = fields.Char(compute="_compute_name")
+    state = fields.Selection(
+        [("running", "Running"), ("cancelled", "Cancelled"), ("done", "Done")],
+        default="running",
+        required=True,
+        readonly=True,
+    )
+    recomputed_fields = fields.Char(readonly=True, help="Indicator fields to recompute, all when empty.")
+    batch_size = fields.Integer(default=10000, readonly=True)
+    run_sequence = fields.Integer(default=1, readonly=True)
+    last_group_id = fields.Integer("Last Group ID", default=0, readonly=True)
+    total_count = fields.Integer("Groups to Recompute", readonly=True)
+    processed_count = fields.Integer("Groups Recomputed", readonly=True)
+    batch_count = fields.Integer("Batches", readonly=True)
+    total_duration = fields.Float("Duration (s)", readonly=True)
+    last_batch_duration = fields.Float("Last Batch Duration (s)", readonly=True)
+    last_batch_rows_per_second = fields.Float("Last Batch Rows per Second", readonly=True)
+    rows_per_second = fields.Float(compute="_compute_rows_per_second")
+    started_on = fields.Datetime(default=lambda self: fields.Datetime.now(), readonly=True)
+    ended_on = fields.Datetime(readonly=True)
+    worker_count = fields.Integer(readonly=True, help="Number of parallel workers of a sharded recompute.")
+    shard_ids = fields.One2many(
+        "g2p.group.indicator.recompute.shard", "recompute_id", "Shards", readonly=True
+    )
+    dirty_queue_depth = fields.Integer(
+        "Dirty Groups", compute="_compute_dirty_metrics", help="Groups waiting for the indicator drainer."
+    )
+    dirty_pending_marks = fields.Integer(
+        "Pending Recompute Requests",
+        compute="_compute_dirty_metrics",
+        help="Recomputes requested for the groups waiting for the indicator drainer.",
+    )
+    dirty_coalescing_ratio = fields.Float(
+        "Coalescing Ratio",
+        compute="_compute_dirty_metrics",
+        help="Recomputes requested per group waiting for the indicator drainer.",
+    )
+
+    def _compute_name(self):
+        for rec in self:
+            rec.name = _("Indicator Recompute %s") % rec.id
+
+    @api.depends("processed_count", "total_duration")
+    def _compute_rows_per_second(self):
+        for rec in self:
+            rec.rows_per_second = rec.processed_count / rec.total_duration if rec.total_duration else 0.0
+
+    def _compute_dirty_metrics(self):
+        metrics = self.env["g2p.group.indicator.dirty"].sudo()._get_metrics()
+        for rec in self:
+            rec.dirty_queue_depth = metrics["queue_depth"]
+            rec.dirty_pending_marks = metrics["pending_marks"]
+            rec.dirty_coalescing_ratio = metrics["coalescing_ratio"]
+
+    @api.model
+    def _get_group_domain(self):
+        return [
+            ("is_group", "=", True),
+            ("is_registrant", "=", True),
+            ("disabled", "=", None),
+        ]
+
+    @api.model
+    def start_recompute(self, recomputed_fields=None, batch_size=10000):
+        """
+        Start a recompute of the group indicators of all the groups.
+
+        Groups are processed in batches of ascending ids, each batch starting after the last
+        group id of the previous one, so batches do not shift when groups are created or
+        disabled while the recompute runs.
+
+        :param recomputed_fields: The indicator fields to recompute, all when not set.
+        :type recomputed_fields: list
+        :param batch_size: The number of groups per batch.
+        :type batch_size: int
+        :return: The recompute record tracking the progress.
+        """
+        field_names = [field if isinstance(field, str) else field.name for field in recomputed_fields or []]
+        run = self.create(
+            {
+                "recomputed_fields": ",".join(field_names),
+                "batch_size": batch_size,
+                "total_count": self.env["res.partner"].search_count(self._get_group_domain()),
+            }
+        )
+        run._enqueue_next_batch()
+        return run
+
+    @api.model
+    def start_sharded_recompute(
+        self, recomputed_fields=None, worker_count=4, shards_per_worker=4, batch_size=10000
+    ):
+        """
+        Start a recompute of the group indicators of all the groups, split across parallel workers.
+
+        The group id space is split into ranges holding about the same number of members, and
+        each worker claims the next pending range until none is left. Having more ranges than
+        workers keeps the workers busy when some ranges take longer than estimated.
+
+        :param recomputed_fields: The indicator fields to recompute, all when not set.
+        :type recomputed_fields: list
+        :param worker_count: The number of ranges recomputed at the same time.
+        :type worker_count: int
+        :param shards_per_worker: The number of ranges per worker.
+        :type shards_per_worker: int
+        :param batch_size: The number of groups recomputed at once within a range.
+        :type batch_size: int
+        :return: The recompute record tracking the progress.
+        """
+        field_names = [field if isinstance(field, str) else field.name for field in recomputed_fields or []]
+        run = self.create(
+            {
+                "recomputed_fields": ",".join(field_names),
+                "batch_size": batch_size,
+                "worker_count": worker_count,
+            }
+        )
+        shard_vals = run._get_shard_ranges(worker_count * shards_per_worker)
+        run.write(
+            {
+                "total_count": sum(vals["group_count"] for vals in shard_vals),
+                "shard_ids": [(0, 0, vals) for vals in shard_vals],
+            }
+        )
+        if shard_vals:
+            run._enqueue_next_batch()
+        else:
+            run.write({"state": "done", "ended_on": fields.Datetime.now()})
+        return run
+
+    def _get_shard_ranges(self, shard_count):
+        """
+        Split the groups into id ranges of about the same estimated number of members.
+
+        Each group weighs its number of active members plus one, so that groups without
+        members are also spread across the ranges.
+
+        :return: The values of the shards.
+        :rtype: list
+        """
+        self.ensure_one()
+        partners = self.env["res.partner"]
+        where_query = partners._where_calc(self._get_group_domain())
+        where_from, where_clause, where_params = where_query.get_sql()
+        self.env.flush_all()
+        self._cr.execute(
+            f"""
+            WITH "groups" AS (
+                SELECT "res_partner"."id", COALESCE("members"."count", 0) + 1 AS "weight"
+                FROM {where_from}
+                LEFT JOIN (
+                    SELECT "group", COUNT(*) AS "count" FROM "g2p_group_membership"
+                    WHERE NOT "is_ended" GROUP BY "group"
+                ) AS "members" ON "members"."group" = "res_partner"."id"
+                WHERE {where_clause}
+            ), "cumulated" AS (
+                SELECT "id", "weight", SUM("weight") OVER (ORDER BY "id") - "weight" AS "before",
+                    SUM("weight") OVER () AS "total"
+                FROM "groups"
+            )
+            SELECT FLOOR("before" * %s / "total") AS "shard", MIN("id"), MAX("id"),
+                COUNT(*), SUM("weight") - COUNT(*)
+            FROM "cumulated"
+            GROUP BY 1
+            ORDER BY 1
+            """,
+            where_params + [shard_count],
+        )
+        return [
+            {
+                "sequence": sequence,
+                "start_id": start_id,
+                "end_id": end_id,
+                "group_count": group_count,
+                "estimated_member_count": member_count,
+            }
+            for sequence, (_shard, start_id, end_id, group_count, member_count) in enumerate(
+                self._cr.fetchall(), start=1
+            )
+        ]
+
+    @api.model
+    def preview_recompute(self, recomputed_fields=None, sample_size=1000):
+        """
+        Estimate a recompute of the group indicators of all the groups, without writing.
+
+        The aggregation of the defined indicators is run on a random sample of the groups and
+        its results are compared with the stored values. The sample is a share of the pages of
+        the partners table taken with ``TABLESAMPLE SYSTEM``, of the size of the sample in the
+        groups, so that the groups are not all read and sorted, or a share of its rows when no
+        page holds a sampled group. Indicators without a definition are only computed by their
+        own method and are listed as not previewed.
+
+        The estimated duration scales the duration of the aggregation queries on the sample to
+        all the groups. It does not cover writing the changed values nor running the jobs.
+
+        :param recomputed_fields: The indicator fields to preview, all when not set.
+        :type recomputed_fields: list
+        :param sample_size: The expected number of groups in the sample.
+        :type sample_size: int
+        :return: The number of groups, the sample duration, the estimated duration and, per
+            indicator, the changed rows in the sample, the estimated changed rows and the plan.
+        :rtype: dict
+        """
+        partners = self.env["res.partner"]
+        if recomputed_fields:
+            field_names = [field if isinstance(field, str) else field.name for field in recomputed_fields]
+        else:
+            field_names = [field.name for field in partners._get_calculated_group_fields()]
+        all_definitions = partners._get_indicator_definitions()
+        definitions = {name: all_definitions[name] for name in field_names if name in all_definitions}
+
+        self.env.flush_all()
+        group_domain = self._get_group_domain()
+        total_count = partners.search_count(group_domain)
+        percent = 100.0 * sample_size / total_count if total_count else 100.0
+        if percent < 100.0:
+            # Small tables may have no sampled page, their rows are sampled one by one instead
+            for method in ("SYSTEM", "BERNOULLI"):
+                self._cr.execute(
+                    f'SELECT "id" FROM "{partners._table}" TABLESAMPLE {method} (%s)', (percent,)
+                )
+                groups = partners.search(
+                    group_domain + [("id", "in", [row[0] for row in self._cr.fetchall()])], order="id"
+                )
+                if groups:
+                    break
+        else:
+            groups = partners.search(group_domain, order="id")
+
+        start = time.perf_counter()
+        counts = groups._query_indicators_aggregate(definitions)
+        sample_duration = time.perf_counter() - start
+        ratio = total_count / len(groups) if groups else 0.0
+
+        indicators = {}
+        filters, remaining = partners._compile_indicator_filters(definitions)
+        plans = {}
+        for field_filter in filters:
+            select_query, select_params = groups._get_indicators_aggregate_query([field_filter])
+            self._cr.execute(f"EXPLAIN (FORMAT JSON) {select_query}", select_params)
+            plans[field_filter[0]] = self._cr.fetchone()[0]
+        for field_name, definition in remaining.items():
+            membership_kind_domain = None
+            if definition["kinds"]:
+                membership_kind_domain = [("name", "in", definition["kinds"])]
+            select_query, select_params = groups._get_members_aggregate_query(
+                membership_kind_domain, definition["domain"]
+            )
+            self._cr.execute(f"EXPLAIN (FORMAT JSON) {select_query}", select_params)
+            plans[field_name] = self._cr.fetchone()[0]
+        for field_name, definition in definitions.items():
+            values = groups._get_indicator_values(counts.get(field_name, {}), definition["presence_only"])
+            changed_count = 0
+            if groups:
+                self._cr.execute(
+                    f'SELECT "id", "{field_name}" FROM "res_partner" WHERE "id" = ANY(%s::int4[])',
+                    (partners._to_int_array(groups.ids),),
+                )
+                for group_id, stored_value in self._cr.fetchall():
+                    if stored_value != values[group_id]:
+                        changed_count += 1
+            indicators[field_name] = {
+                "changed_in_sample": changed_count,
+                "estimated_changed": round(changed_count * ratio),
+                "plan": plans.get(field_name),
+            }
+
+        preview = {
+            "total_count": total_count,
+            "sample_size": len(groups),
+            "sample_duration": sample_duration,
+            "estimated_duration": sample_duration * ratio,
+            "indicators": indicators,
+            "not_previewed": [name for name in field_names if name not in definitions],
+        }
+        _logger.info(
+            "OpenG2P Registry: indicator recompute preview: %s groups, estimated %.1fs, changes: %s",
+            total_count,
+            preview["estimated_duration"],
+            {name: indicator["estimated_changed"] for name, indicator in indicators.items()},
+        )
+        return preview
+
+    def _get_recomputed_fields(self):
+        self.ensure_one()
+        if not self.recomputed_fields:
+            return None
+        return self.recomputed_fields.split(",")
+
+    def _enqueue_next_batch(self):
+        self.ensure_one()
+        if self.worker_count:
+            for _i in range(self.worker_count):
+                self._enqueue_shard_worker()
+            return
+        self.with_delay(priority=20, channel="root.recompute_indicators").recompute_next_batch(
+            self.run_sequence
+        )
+
+    def recompute_next_batch(self, run_sequence):
+        """
+        Recompute the next batch of groups after the cursor, then queue the following one.
+
+        :param run_sequence: The run sequence when the batch was queued. Batches queued before
+            the recompute was resumed are ignored.
+        :type run_sequence: int
+        """
+        self.ensure_one()
+        if self.state != "running" or self.run_sequence != run_sequence:
+            _logger.info("OpenG2P Registry: indicator recompute %s: batch skipped (%s)", self.id, self.state)
+            return
+
+        start = time.perf_counter()
+        groups = self.env["res.partner"].search(
+            self._get_group_domain() + [("id", ">", self.last_group_id)],
+            limit=self.batch_size,
+            order="id",
+        )
+        if groups:
+            groups.recompute_indicators(recomputed_fields=self._get_recomputed_fields())
+            self.env.flush_all()
+        duration = time.perf_counter() - start
+        rows_per_second = len(groups) / duration if duration else 0.0
+
+        vals = {
+            "processed_count": self.processed_count + len(groups),
+            "batch_count": self.batch_count + 1,
+            "total_duration": self.total_duration + duration,
+            "last_batch_duration": duration,
+            "last_batch_rows_per_second": rows_per_second,
+        }
+        if groups:
+            vals["last_group_id"] = groups[-1].id
+        if len(groups) < self.batch_size:
+            vals.update({"state": "done", "ended_on": fields.Datetime.now()})
+        self.write(vals)
+        _logger.info(
+            "OpenG2P Registry: indicator recompute %s: batch %s, %s groups up to id %s "
+            "in %.2fs (%.1f rows/s)",
+            self.id,
+            self.batch_count,
+            len(groups),
+            self.last_group_id,
+            duration,
+            rows_per_second,
+        )
+
+        if self.state == "running":
+            self._enqueue_next_batch()
+
+    def _enqueue_shard_worker(self):
+        self.ensure_one()
+        self.with_delay(priority=20, channel="root.recompute_indicators").recompute_next_shard(
+            self.run_sequence
+        )
+
+    def recompute_next_shard(self, run_sequence):
+        """
+        Claim the next pending shard, recompute its groups, then queue a worker for the next one.
+
+        Shards are claimed with SKIP LOCKED, so parallel workers never wait on one another and
+        a shard is only marked done when its transaction commits.
+
+        :param run_sequence: The run sequence when the worker was queued.
+        :type run_sequence: int
+        """
+        self.ensure_one()
+        if self.state != "running" or self.run_sequence != run_sequence:
+            _logger.info("OpenG2P Registry: indicator recompute %s: worker skipped (%s)", self.id, self.state)
+            return
+        shard_model = self.env["g2p.group.indicator.recompute.shard"]
+        shard_model.flush_model()
+        self._cr.execute(
+            f"""
+            SELECT "id" FROM "{shard_model._table}"
+            WHERE "recompute_id" = %s AND "state" = 'pending'
+            ORDER BY "sequence"
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+            """,
+            (self.id,),
+        )
+        row = self._cr.fetchone()
+        if not row:
+            return
+        shard = shard_model.browse(row[0])
+        shard._recompute()
+        self.with_delay(priority=20, channel="root.recompute_indicators").finish_sharded_recompute()
+        self._enqueue_shard_worker()
+
+    def finish_sharded_recompute(self):
+        """
+        Aggregate the shard timings and end the recompute once every shard is done.
+        """
+        self.ensure_one()
+        shards = self.shard_ids
+        if self.state != "running" or shards.filtered(lambda shard: shard.state != "done"):
+            return
+        durations = shards.mapped("duration")
+        wall_duration = (fields.Datetime.now() - self.started_on).total_seconds()
+        self.write(
+            {
+                "state": "done",
+                "ended_on": fields.Datetime.now(),
+                "processed_count": sum(shards.mapped("group_count")),
+                "batch_count": len(shards),
+                "total_duration": wall_duration,
+                "last_batch_duration": max(durations, default=0.0),
+                "last_batch_rows_per_second": self.total_count / wall_duration if wall_duration else 0.0,
+            }
+        )
+        _logger.info(
+            "OpenG2P Registry: indicator recompute %s: %s shards on %s workers in %.2fs, "
+            "%.2fs of shard work, slowest shard %.2fs",
+            self.id,
+            len(shards),
+            self.worker_count,
+            wall_duration,
+            sum(durations),
+            max(durations, default=0.0),
+        )
+
+    def action_cancel(self):
+        for rec in self:
+            if rec.state != "running":
+                raise UserError(_("Only running recomputes can be cancelled."))
+        self.write({"state": "cancelled", "ended_on": fields.Datetime.now()})
+
+    def action_resume(self):
+        for rec in self:
+            if rec.state != "cancelled":
+                raise UserError(_("Only cancelled recomputes can be resumed."))
+            rec.write({"state": "running", "ended_on": None, "run_sequence": rec.run_sequence + 1})
+            rec._enqueue_next_batch()
+
+
+class G2PGroupIndicatorRecomputeShard(models.Model):
+    _name = "g2p.group.indicator.recompute.shard"
+    _description = "Group Indicator Recompute Shard"
+    _order = "sequence"
+
+    recompute_id = fields.Many2one(
+        "g2p.group.indicator.recompute", required=True, index=True, ondelete="cascade"
+    )
+    sequence = fields.Integer(readonly=True)
+    state = fields.Selection([("pending", "Pending"), ("done", "Done")], default="pending", readonly=True)
+    start_id = fields.Integer("First Group ID", readonly=True)
+    end_id = fields.Integer("Last Group ID", readonly=True)
+    group_count = fields.Integer("Groups", readonly=True)
+    estimated_member_count = fields.Integer("Estimated Members", readonly=True)
+    duration = fields.Float("Duration (s)", readonly=True)
+    rows_per_second = fields.Float(readonly=True)
+
+    def _recompute(self):
+        """
+        Recompute the groups of the shard id range in keyset batches.
+        """
+        self.ensure_one()
+        run = self.recompute_id
+        start = time.perf_counter()
+        last_group_id = self.start_id - 1
+        group_count = 0
+        while True:
+            groups = self.env["res.partner"].search(
+                run._get_group_domain() + [("id", ">", last_group_id), ("id", "<=", self.end_id)],
+                limit=run.batch_size,
+                order="id",
+            )
+            if not groups:
+                break
+            groups.recompute_indicators(recomputed_fields=run._get_recomputed_fields())
+            self.env.flush_all()
+            group_count += len(groups)
+            last_group_id = groups[-1].id
+        duration = time.perf_counter() - start
+        self.write(
+            {
+                "state": "done",
+                "group_count": group_count,
+                "duration": duration,
+                "rows_per_second": group_count / duration if duration else 0.0,
+            }
+        )
+        _logger.info(
+            "OpenG2P Registry: indicator recompute %s: shard %s, groups %s to %s, %s groups in %.2fs",
+            run.id,
+            self.sequence,
+            self.start_id,
+            self.end_id,
+            group_count,
+            duration,
+        )
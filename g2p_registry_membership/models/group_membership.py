@@ -1,9 +1,11 @@
 # Part of OpenG2P Registry. See LICENSE file for full copyright and licensing details.
 
 import logging
+from collections import Counter
 
 from odoo import _, api, fields, models
 from odoo.exceptions import ValidationError
+from odoo.tools.sql import create_index, index_exists
 
 _logger = logging.getLogger(__name__)
 
@@ -16,6 +18,7 @@ class G2PGroupMembership(models.Model):
     group = fields.Many2one(
         "res.partner",
         required=True,
+        index=True,
         domain=[("is_group", "=", True), ("is_registrant", "=", True)],
         auto_join=True,
     )
@@ -27,7 +30,7 @@ class G2PGroupMembership(models.Model):
     )
     kind = fields.Many2many("g2p.group.membership.kind")
     start_date = fields.Datetime(default=lambda self: fields.Datetime.now())
-    ended_date = fields.Datetime()
+    ended_date = fields.Datetime(index=True)
     status = fields.Selection(
         [("inactive", "Inactive"), ("active", " ")],
         compute="_compute_status",
@@ -37,6 +40,102 @@ class G2PGroupMembership(models.Model):
     individual_birthdate = fields.Date(related="individual.birthdate", readonly=True)
     individual_gender = fields.Selection(related="individual.gender", readonly=True)
 
+    def init(self):
+        self._init_unique_active_member_index()
+        # Members of a group are listed by page, active ones first, in id order
+        create_index(
+            self._cr,
+            "g2p_group_membership_group_is_ended_id_index",
+            self._table,
+            ['"group"', '"is_ended"', '"id"'],
+        )
+        # Memberships left to end by the sweep
+        create_index(
+            self._cr,
+            "g2p_group_membership_ended_date_not_ended_index",
+            self._table,
+            ['"ended_date"'],
+            where='NOT "is_ended" AND "ended_date" IS NOT NULL',
+        )
+        # Unique kinds live in another table, which a partial unique index can not refer to.
+        # A deferred constraint trigger enforces them at commit instead, behind the ORM check.
+        # Checks of the same group are serialized so that concurrent transactions can not
+        # each add a member with the same unique kind.
+        kind_field = self._fields["kind"]
+        self._cr.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION g2p_group_membership_check_unique_kind() RETURNS trigger AS $$
+            DECLARE
+                group_id integer;
+                kind_name varchar;
+            BEGIN
+                IF TG_TABLE_NAME = '{self._table}' THEN
+                    group_id := NEW."group";
+                ELSE
+                    SELECT "group" INTO group_id FROM "{self._table}"
+                    WHERE "id" = NEW."{kind_field.column1}";
+                END IF;
+                IF group_id IS NULL THEN
+                    RETURN NULL;
+                END IF;
+                -- Keyed by the hash of the table name and the group, the oid of the table
+                -- does not fit an integer on clusters that have used more than 2^31 oids
+                PERFORM pg_advisory_xact_lock(hashtext('{self._table}'), group_id);
+                SELECT "kind"."name" INTO kind_name
+                FROM "{self._table}" AS "membership"
+                JOIN "{kind_field.relation}" AS "kind_rel"
+                    ON "kind_rel"."{kind_field.column1}" = "membership"."id"
+                JOIN "g2p_group_membership_kind" AS "kind"
+                    ON "kind"."id" = "kind_rel"."{kind_field.column2}" AND "kind"."is_unique"
+                WHERE "membership"."group" = group_id
+                GROUP BY "kind"."id", "kind"."name"
+                HAVING COUNT(*) > 1
+                LIMIT 1;
+                IF FOUND THEN
+                    RAISE EXCEPTION 'Only one % is allowed per group (group id %)', kind_name, group_id
+                        USING ERRCODE = 'unique_violation';
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql;
+
+            DROP TRIGGER IF EXISTS g2p_group_membership_unique_kind ON "{kind_field.relation}";
+            CREATE CONSTRAINT TRIGGER g2p_group_membership_unique_kind
+                AFTER INSERT OR UPDATE ON "{kind_field.relation}"
+                DEFERRABLE INITIALLY DEFERRED
+                FOR EACH ROW EXECUTE FUNCTION g2p_group_membership_check_unique_kind();
+
+            DROP TRIGGER IF EXISTS g2p_group_membership_unique_kind ON "{self._table}";
+            CREATE CONSTRAINT TRIGGER g2p_group_membership_unique_kind
+                AFTER UPDATE OF "group" ON "{self._table}"
+                DEFERRABLE INITIALLY DEFERRED
+                FOR EACH ROW EXECUTE FUNCTION g2p_group_membership_check_unique_kind();
+            """
+        )
+
+    def _init_unique_active_member_index(self):
+        # An individual can only be an active member of a group once
+        if index_exists(self._cr, "g2p_group_membership_group_individual_active_uniq"):
+            return
+        self._cr.execute(
+            f"""
+            SELECT 1 FROM "{self._table}" WHERE NOT "is_ended"
+            GROUP BY "group", "individual" HAVING COUNT(*) > 1 LIMIT 1
+            """
+        )
+        if self._cr.fetchone():
+            _logger.warning(
+                "OpenG2P Registry: duplicate active group members found, "
+                "g2p_group_membership_group_individual_active_uniq is not created."
+            )
+            return
+        self._cr.execute(
+            f"""
+            CREATE UNIQUE INDEX "g2p_group_membership_group_individual_active_uniq"
+            ON "{self._table}" ("group", "individual") WHERE NOT "is_ended"
+            """
+        )
+
     @api.onchange("kind")
     def _kind_onchange(self):
         for rec in self:
@@ -91,13 +190,60 @@ class G2PGroupMembership(models.Model):
 
     @api.constrains("individual")
     def _check_group_members(self):
-        for rec in self:
-            rec_count = 0
-            for group_membership_id in rec.group.group_membership_ids:
-                if rec.individual.id == group_membership_id.individual.id:
-                    rec_count += 1
-            if rec_count > 1:
-                raise ValidationError(_("Duplication of Member is not allowed "))
+        self._check_active_members(
+            [(rec.group.id, rec.individual.id) for rec in self if not rec.is_ended], exclude_ids=self.ids
+        )
+
+    @api.model
+    def _check_active_members(self, members, exclude_ids=None):
+        """
+        Check that the individuals are not already active members of the groups.
+
+        This runs before the memberships are written so that duplicates are reported as a
+        validation error rather than by the unique index. All the pairs are checked in one query.
+
+        :param members: The ``(group_id, individual_id)`` pairs of the active memberships to write.
+        :type members: list
+        :param exclude_ids: The memberships being written, which are not duplicates of themselves.
+        :type exclude_ids: list
+        """
+        members = [
+            (group_id, individual_id) for group_id, individual_id in members if group_id and individual_id
+        ]
+        if not members:
+            return
+        duplicates = {member for member, count in Counter(members).items() if count > 1}
+        self.flush_model(["group", "individual", "is_ended"])
+        self._cr.execute(
+            f"""
+            SELECT DISTINCT "membership"."group", "membership"."individual"
+            FROM "{self._table}" AS "membership"
+            JOIN unnest(%s::int4[], %s::int4[]) AS "members"("group", "individual")
+                ON "members"."group" = "membership"."group"
+                AND "members"."individual" = "membership"."individual"
+            WHERE NOT "membership"."is_ended" AND NOT "membership"."id" = ANY(%s::int4[])
+            """,
+            (
+                self.env["res.partner"]._to_int_array(group_id for group_id, _individual_id in members),
+                self.env["res.partner"]._to_int_array(individual_id for _group_id, individual_id in members),
+                self.env["res.partner"]._to_int_array(exclude_ids or []),
+            ),
+        )
+        duplicates.update(self._cr.fetchall())
+        if duplicates:
+            partners = self.env["res.partner"].sudo()
+            raise ValidationError(
+                _("Duplication of Member is not allowed: %s")
+                % ", ".join(
+                    f"{partners.browse(individual_id).name} ({partners.browse(group_id).name})"
+                    for group_id, individual_id in sorted(duplicates)
+                )
+            )
+
+    @api.model
+    def _is_ended_vals(self, vals):
+        ended_date = vals.get("ended_date")
+        return bool(ended_date) and fields.Datetime.to_datetime(ended_date) <= fields.Datetime.now()
 
     def _compute_display_name(self):
         res = super()._compute_display_name()
@@ -134,24 +280,75 @@ class G2PGroupMembership(models.Model):
         self.env.add_to_compute(field, groups)
         _logger.debug(f"OpenG2P Registry: _recompute_parent_groups: Field: {field} - {groups.ids}")
 
+    def _get_indicator_fields(self):
+        """
+        Membership fields that change whether a membership is counted in the group indicators.
+        """
+        return {"group", "individual", "kind", "ended_date", "is_ended"}
+
+    def _get_indicator_snapshot(self, groups=None):
+        if self.env.context.get("skip_indicator_deltas"):
+            return {}
+        if groups is None:
+            groups = self.mapped("group")
+        return groups.sudo()._get_indicator_snapshot(self.ids)
+
     def write(self, vals):
+        if not {"group", "individual", "ended_date"}.isdisjoint(vals):
+            self._check_active_members(
+                [
+                    (vals.get("group", rec.group.id), vals.get("individual", rec.individual.id))
+                    for rec in self
+                    if not self._is_ended_vals(
+                        vals if "ended_date" in vals else {"ended_date": rec.ended_date}
+                    )
+                ],
+                exclude_ids=self.ids,
+            )
+        track_deltas = not self._get_indicator_fields().isdisjoint(vals)
+        groups = self.mapped("group")
+        before = self._get_indicator_snapshot(groups) if track_deltas else {}
         res = super().write(vals)
         _logger.debug("OpenG2P Registry: write")
+        if track_deltas:
+            groups |= self.mapped("group")
+            after = self._get_indicator_snapshot(groups)
+            groups.sudo()._apply_indicator_deltas(before, after)
+            groups._refresh_membership_summary()
+        if "group" in vals or "kind" in vals:
+            self.mapped("group")._check_unique_membership_kinds()
         self._recompute_parent_groups(self)
         return res
 
     @api.model_create_multi
     @api.returns("self", lambda value: value.id)
     def create(self, vals_list):
+        # Settle pending indicator computations so that the deltas apply on top of them
+        self.env["res.partner"].flush_model()
+        self._check_active_members(
+            [
+                (vals.get("group"), vals.get("individual"))
+                for vals in vals_list
+                if not self._is_ended_vals(vals)
+            ]
+        )
         res = super().create(vals_list)
         _logger.debug("OpenG2P Registry: create")
+        groups = res.mapped("group")
+        after = res._get_indicator_snapshot(groups)
+        groups.sudo()._apply_indicator_deltas({}, after)
+        groups._refresh_membership_summary()
+        res.filtered("kind").mapped("group")._check_unique_membership_kinds()
         self._recompute_parent_groups(res)
         return res
 
     def unlink(self):
         groups = self.mapped("group")
+        before = self._get_indicator_snapshot(groups)
         res = super().unlink()
         _logger.debug(f"OpenG2P Registry: unlink: {self.ids} - {groups.ids}")
+        groups.sudo()._apply_indicator_deltas(before, {})
+        groups._refresh_membership_summary()
         self._recompute_parent_groups(groups)
         return res
 
@@ -190,6 +387,43 @@ class G2PGroupMembership(models.Model):
             else:
                 record.status = "active"
 
+    @api.model
+    def _cron_end_memberships(self):
+        """
+        End the memberships whose ended date has passed.
+
+        is_ended and status are only computed when the ended date is written, so memberships
+        ending in the future are flipped here in one update and their groups' indicators get
+        the matching deltas. Every membership not ended yet is considered, so that the ones
+        committed late by other transactions are not missed.
+        """
+        self.flush_model(["ended_date", "is_ended"])
+        self._cr.execute(
+            f"""
+            SELECT "id" FROM "{self._table}"
+            WHERE NOT "is_ended" AND "ended_date" <= %s
+            """,
+            (fields.Datetime.now(),),
+        )
+        memberships = self.browse([row[0] for row in self._cr.fetchall()])
+        if memberships:
+            groups = memberships.mapped("group")
+            before = memberships._get_indicator_snapshot(groups)
+            self._cr.execute(
+                f"""
+                UPDATE "{self._table}" SET "is_ended" = TRUE, "status" = 'inactive'
+                WHERE "id" = ANY(%s::int4[])
+                """,
+                (self.env["res.partner"]._to_int_array(memberships.ids),),
+            )
+            memberships.invalidate_recordset(["is_ended", "status"])
+            memberships.modified(["is_ended", "status"])
+            after = memberships._get_indicator_snapshot(groups)
+            groups.sudo()._apply_indicator_deltas(before, after)
+            groups._refresh_membership_summary()
+            self._recompute_parent_groups(groups)
+            _logger.info("OpenG2P Registry: ended %s memberships of %s groups", len(memberships), len(groups))
+
     @api.constrains("ended_date")
     def _check_ended_date(self):
         for record in self:
@@ -199,6 +433,7 @@ class G2PGroupMembership(models.Model):
 
 class G2PGroupMembershipKind(models.Model):
     _name = "g2p.group.membership.kind"
+    _inherit = ["g2p.reference.lookup.mixin"]
     _description = "Group Membership Kind"
     _order = "id desc"
 
@@ -206,6 +441,17 @@ class G2PGroupMembershipKind(models.Model):
     is_unique = fields.Boolean("Unique")
 
     def unlink(self):
+        self._cr.execute(
+            'SELECT DISTINCT "group" FROM "g2p_group_membership_summary" WHERE "kind" IN %s',
+            (tuple(self.ids) or (0,),),
+        )
+        group_ids = [row[0] for row in self._cr.fetchall()]
+        res = self._unlink_kinds()
+        # Members of these groups are left without the kind
+        self.env["g2p.group.membership.summary"].sudo()._refresh(group_ids)
+        return res
+
+    def _unlink_kinds(self):
         for rec in self:
             external_identifier = self.env["ir.model.data"].search(
                 [("res_id", "=", rec.id), ("model", "=", "g2p.group.membership.kind")]
@@ -0,0 +1,225 @@
+# Part of OpenG2P Registry. See LICENSE file for full copyright and licensing details.
+import logging
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Age bands as (lower bound in years, key, label), in ascending order
+AGE_BANDS = [
+    (0, "0_4", "0-4"),
+    (5, "5_17", "5-17"),
+    (18, "18_59", "18-59"),
+    (60, "60_plus", "60+"),
+]
+
+AGE_BANDS_DATE_PARAM = "g2p_registry_membership.summary_age_bands_date"
+
+
+class G2PGroupMembershipSummary(models.Model):
+    _name = "g2p.group.membership.summary"
+    _description = "Group Membership Summary"
+    _log_access = False
+
+    group = fields.Many2one("res.partner", required=True, index=True, ondelete="cascade")
+    kind = fields.Many2one("g2p.group.membership.kind", ondelete="cascade")
+    gender = fields.Char()
+    age_band = fields.Selection(
+        [(key, label) for _lower, key, label in AGE_BANDS] + [("unknown", "Unknown")],
+    )
+    member_count = fields.Integer()
+
+    def init(self):
+        # Build the summary when the module is installed on an existing registry
+        self._cr.execute(f'SELECT 1 FROM "{self._table}" LIMIT 1')
+        if not self._cr.fetchone():
+            self._refresh()
+
+    @api.model
+    def _get_age_band_sql(self, today):
+        """
+        Get the SQL expression of the age band of the ``individual`` alias at the given date.
+
+        :return: The expression and its parameters.
+        :rtype: tuple
+        """
+        cases = []
+        params = []
+        for (_lower, key, _label), (upper, _next_key, _next_label) in zip(
+            AGE_BANDS, AGE_BANDS[1:], strict=False
+        ):
+            cases.append('WHEN "individual"."birthdate" > %s THEN %s')
+            params.extend([today - relativedelta(years=upper), key])
+        sql = (
+            'CASE WHEN "individual"."birthdate" IS NULL THEN \'unknown\' ' + " ".join(cases) + " ELSE %s END"
+        )
+        params.append(AGE_BANDS[-1][1])
+        return sql, params
+
+    @api.model
+    def _refresh(self, group_ids=None):
+        """
+        Rebuild the summary rows of the given groups from their memberships.
+
+        Rows hold the number of active members of a group per kind, gender and age band.
+        A member with several kinds is counted once per kind, as in _query_members_aggregate.
+
+        :param group_ids: The groups to refresh, all of them when not set.
+        :type group_ids: list
+        """
+        if group_ids is not None:
+            group_ids = [group_id for group_id in group_ids if group_id]
+            if not group_ids:
+                return
+        self.env["g2p.group.membership"].flush_model(["group", "individual", "is_ended", "kind"])
+        self.env["res.partner"].flush_model(
+            ["is_registrant", "is_group", "active", "disabled", "gender", "birthdate"]
+        )
+
+        group_where = "TRUE"
+        group_params = []
+        if group_ids is not None:
+            group_where = '"membership"."group" = ANY(%s::int4[])'
+            group_params = [self.env["res.partner"]._to_int_array(group_ids)]
+            self._cr.execute(
+                f'DELETE FROM "{self._table}" WHERE "group" = ANY(%s::int4[])', tuple(group_params)
+            )
+        else:
+            self._cr.execute(f'TRUNCATE "{self._table}"')
+
+        age_band_sql, age_band_params = self._get_age_band_sql(fields.Date.today())
+        self._cr.execute(
+            f"""
+            INSERT INTO "{self._table}" ("group", "kind", "gender", "age_band", "member_count")
+            SELECT "membership"."group", "kind_rel"."g2p_group_membership_kind_id",
+                "individual"."gender", {age_band_sql}, COUNT(*)
+            FROM "g2p_group_membership" AS "membership"
+            JOIN "res_partner" AS "grp" ON "grp"."id" = "membership"."group"
+            JOIN "res_partner" AS "individual" ON "individual"."id" = "membership"."individual"
+            LEFT JOIN "g2p_group_membership_g2p_group_membership_kind_rel" AS "kind_rel"
+                ON "kind_rel"."g2p_group_membership_id" = "membership"."id"
+            WHERE {group_where}
+                AND NOT "membership"."is_ended"
+                AND "grp"."is_registrant" AND "grp"."is_group" AND "grp"."active"
+                AND "grp"."disabled" IS NULL
+                AND "individual"."disabled" IS NULL
+            GROUP BY 1, 2, 3, 4
+            """,
+            age_band_params + group_params,
+        )
+        self.invalidate_model()
+
+    @api.model
+    def _get_age_bands(self, operator, value):
+        """
+        Get the age bands matching an ``age_years`` comparison, None when it cuts through a band.
+
+        Individuals without a birthdate have no age and match none of the comparisons.
+
+        :rtype: list
+        """
+        if not isinstance(value, int) or isinstance(value, bool):
+            return None
+        # Lowest age included by the comparison, or the highest one for "<" and "<="
+        bounds = {">=": value, ">": value + 1, "<": value, "<=": value + 1}
+        if operator not in bounds:
+            return None
+        bound = bounds[operator]
+        lower_bounds = [lower for lower, _key, _label in AGE_BANDS]
+        if bound not in lower_bounds:
+            return None
+        if operator in (">=", ">"):
+            return [key for lower, key, _label in AGE_BANDS if lower >= bound]
+        return [key for lower, key, _label in AGE_BANDS if lower < bound] or None
+
+    @api.model
+    def _can_count(self, domain):
+        """
+        Check whether an individual domain can be answered from the summary.
+
+        Only domains made of ``gender`` equality or inclusion leaves and of ``age_years``
+        comparisons on the bounds of the age bands are supported.
+        """
+        for leaf in domain or []:
+            if leaf == "&":
+                continue
+            if not isinstance(leaf, list | tuple) or len(leaf) != 3:
+                return False
+            field_name, operator, value = leaf
+            if field_name == "age_years":
+                if self._get_age_bands(operator, value) is None:
+                    return False
+            elif field_name != "gender" or operator not in ("=", "in") or not value:
+                return False
+        return True
+
+    @api.model
+    def _count_individuals(self, group_ids, relationship_kinds=None, domain=None):
+        """
+        Count the members of the groups matching the kinds and the domain from the summary.
+
+        :return: The counts as a list of ``(group_id, count)``, as _query_members_aggregate.
+        :rtype: list
+        """
+        self.flush_model()
+        conditions = ['"summary"."group" = ANY(%s::int4[])']
+        params = [self.env["res.partner"]._to_int_array(group_ids)]
+        if relationship_kinds:
+            conditions.append('"kind"."name" IN %s')
+            params.append(tuple(relationship_kinds))
+        for leaf in domain or []:
+            if leaf == "&":
+                continue
+            field_name, operator, value = leaf
+            if field_name == "age_years":
+                conditions.append('"summary"."age_band" IN %s')
+                params.append(tuple(self._get_age_bands(operator, value)))
+            elif operator == "in":
+                conditions.append('"summary"."gender" IN %s')
+                params.append(tuple(value))
+            else:
+                conditions.append('"summary"."gender" = %s')
+                params.append(value)
+        self._cr.execute(
+            f"""
+            SELECT "summary"."group", SUM("summary"."member_count")
+            FROM "{self._table}" AS "summary"
+            LEFT JOIN "g2p_group_membership_kind" AS "kind" ON "kind"."id" = "summary"."kind"
+            WHERE {" AND ".join(conditions)}
+            GROUP BY "summary"."group"
+            """,
+            params,
+        )
+        return self._cr.fetchall()
+
+    @api.model
+    def _cron_refresh_age_bands(self):
+        """
+        Refresh the groups with members that moved to another age band since the last run.
+        """
+        config = self.env["ir.config_parameter"].sudo()
+        today = fields.Date.today()
+        last_run = fields.Date.to_date(config.get_param(AGE_BANDS_DATE_PARAM))
+        if not last_run:
+            self._refresh()
+        elif last_run < today:
+            conditions = []
+            params = []
+            for lower, _key, _label in AGE_BANDS[1:]:
+                conditions.append('("individual"."birthdate" > %s AND "individual"."birthdate" <= %s)')
+                params.extend([last_run - relativedelta(years=lower), today - relativedelta(years=lower)])
+            self._cr.execute(
+                f"""
+                SELECT DISTINCT "membership"."group"
+                FROM "g2p_group_membership" AS "membership"
+                JOIN "res_partner" AS "individual" ON "individual"."id" = "membership"."individual"
+                WHERE NOT "membership"."is_ended" AND ({" OR ".join(conditions)})
+                """,
+                params,
+            )
+            group_ids = [row[0] for row in self._cr.fetchall()]
+            self._refresh(group_ids)
+            _logger.info("OpenG2P Registry: membership summary: %s groups changed age band", len(group_ids))
+        config.set_param(AGE_BANDS_DATE_PARAM, fields.Date.to_string(today))
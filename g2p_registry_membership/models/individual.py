@@ -1,8 +1,7 @@
 # Part of OpenG2P Registry. See LICENSE file for full copyright and licensing details.
 import logging
 
-from odoo import _, api, fields, models
-from odoo.exceptions import ValidationError
+from odoo import api, fields, models
 
 _logger = logging.getLogger(__name__)
 
@@ -14,33 +13,59 @@ class G2PMembershipIndividual(models.Model):
 
     def _recompute_parent_groups(self, records):
         field = self.env["res.partner"]._fields["force_recompute_canary"]
-        for line in records:
-            if line.is_registrant and not line.is_group:
-                try:
-                    groups = line.individual_membership_ids.mapped("group")
-                    for group in groups:
-                        unique_kinds = group.env["g2p.group.membership.kind"].search(
-                            [("is_unique", "=", True)]
-                        )
-                        for unique_kind in unique_kinds:
-                            count = sum(
-                                1 for rec in group.group_membership_ids if unique_kind.id in rec.kind.ids
-                            )
-                            if count > 1:
-                                raise ValidationError(
-                                    _("Only one %s is allowed per group") % unique_kind.name
-                                )
-                except Exception as e:
-                    _logger.error("_recompute_parent_groups: exception: %s", e)
-                    raise
-                else:
-                    self.env.add_to_compute(field, groups)
+        individuals = records.filtered(lambda line: line.is_registrant and not line.is_group)
+        groups = individuals.individual_membership_ids.mapped("group")
+        groups._check_unique_membership_kinds()
+        self.env.add_to_compute(field, groups)
 
     def write(self, vals):
-        res = super().write(vals)
+        if "individual_membership_ids" in vals and len(vals) > 1:
+            # Membership commands mixed with individual changes can not be split into
+            # deltas, the groups of these individuals are recounted instead.
+            individuals = self.filtered(lambda rec: rec.is_registrant and not rec.is_group)
+            groups = individuals.sudo().individual_membership_ids.mapped("group")
+            res = super(G2PMembershipIndividual, self.with_context(skip_indicator_deltas=True)).write(vals)
+            groups |= individuals.sudo().individual_membership_ids.mapped("group")
+            groups._refresh_membership_summary()
+            groups.sudo()._recompute_indicators_now()
+        elif "individual_membership_ids" not in vals and not self._get_indicator_domain_fields().isdisjoint(
+            vals
+        ):
+            individuals = self.filtered(lambda rec: rec.is_registrant and not rec.is_group)
+            memberships = individuals.sudo().individual_membership_ids
+            before = memberships._get_indicator_snapshot()
+            res = super().write(vals)
+            after = memberships._get_indicator_snapshot()
+            memberships.mapped("group").sudo()._apply_indicator_deltas(before, after)
+            if not {"gender", "birthdate", "disabled"}.isdisjoint(vals):
+                memberships.mapped("group")._refresh_membership_summary()
+        else:
+            res = super().write(vals)
+            if not {"gender", "birthdate"}.isdisjoint(vals):
+                individuals = self.filtered(lambda rec: rec.is_registrant and not rec.is_group)
+                individuals.sudo().individual_membership_ids.mapped("group")._refresh_membership_summary()
         self._recompute_parent_groups(self)
         return res
 
+    @api.model
+    def _refresh_age_years(self):
+        partner_ids = super()._refresh_age_years()
+        field_names = [
+            field_name
+            for field_name, definition in self._get_indicator_definitions().items()
+            if any(
+                isinstance(leaf, list | tuple)
+                and len(leaf) == 3
+                and leaf[0].split(".")[0] in ("age_years", "birthdate")
+                for leaf in definition["domain"] or []
+            )
+        ]
+        if partner_ids and field_names:
+            # Ages are updated in SQL, so only the indicators filtering on them are recounted
+            groups = self.browse(partner_ids).sudo().individual_membership_ids.mapped("group")
+            groups._compute_indicators(field_names)
+        return partner_ids
+
     @api.model_create_multi
     @api.returns("self", lambda value: value.id)
     def create(self, vals_list):
@@ -3,11 +3,14 @@
 import logging
 from datetime import timedelta
 
+import psycopg2
+
 from odoo import fields
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
 
 # from odoo.tests import tagged
 from odoo.tests.common import TransactionCase
+from odoo.tools import mute_logger
 
 _logger = logging.getLogger(__name__)
 
@@ -348,8 +351,8 @@ class MembershipTest(TransactionCase):
         # Add the unique kind to the group membership
         group_membership.write({"kind": [(6, 0, [unique_kind.id])]})
 
-        try:
-            # Create another group membership with the same unique kind (expecting a ValidationError)
+        # Create another group membership with the same unique kind (expecting a ValidationError)
+        with self.assertRaises(ValidationError):
             self.env["g2p.group.membership"].create(
                 {
                     "group": self.group_1.id,
@@ -358,10 +361,6 @@ class MembershipTest(TransactionCase):
                     "kind": [(6, 0, [unique_kind.id])],
                 }
             )
-        except ValidationError as e:
-            # Log the validation error for additional information
-            _logger.error("Validation Error: %s", e)
-            raise  # Re-raise the exception to mark the test as failed
 
     def test_10_name_search(self):
         # Test case for _name_search method
@@ -594,3 +593,399 @@ class MembershipTest(TransactionCase):
         # Verify the expected display_name
         expected_display_name = self.group_1.name
         self.assertEqual(group_membership.display_name, expected_display_name)
+
+    def test_26_indicator_deltas(self):
+        # Membership changes should be applied to the indicators as deltas
+        memberships = self.env["g2p.group.membership"].create(
+            [
+                {"group": self.group_3.id, "individual": self.registrant_1.id},
+                {"group": self.group_3.id, "individual": self.registrant_2.id},
+            ]
+        )
+        self.assertEqual(self.group_3.z_ind_grp_num_individuals, 2, "Created members not counted.")
+
+        memberships[0].write({"ended_date": fields.Datetime.now()})
+        self.assertEqual(self.group_3.z_ind_grp_num_individuals, 1, "Ended member still counted.")
+
+        self.registrant_2.write({"disabled": fields.Datetime.now()})
+        self.assertEqual(self.group_3.z_ind_grp_num_individuals, 0, "Disabled member still counted.")
+
+        self.registrant_2.write({"disabled": None})
+        self.assertEqual(self.group_3.z_ind_grp_num_individuals, 1, "Enabled member not counted.")
+
+        memberships[1].unlink()
+        self.assertEqual(self.group_3.z_ind_grp_num_individuals, 0, "Removed member still counted.")
+
+    def test_27_single_pass_indicators(self):
+        # The single pass aggregation should count the same as the per indicator query
+        self.env["g2p.group.membership"].create(
+            [
+                {"group": self.group_3.id, "individual": self.registrant_1.id},
+                {"group": self.group_3.id, "individual": self.registrant_3.id},
+            ]
+        )
+        definitions = self.group_3._get_indicator_definitions()
+        counts = self.group_3._query_indicators_aggregate(definitions)
+        self.assertEqual(
+            counts["z_ind_grp_num_individuals"],
+            dict(self.group_3._query_members_aggregate()),
+            "Single pass aggregation does not match the per indicator query.",
+        )
+
+        self.env.cr.execute(
+            "UPDATE res_partner SET z_ind_grp_num_individuals = 0 WHERE id = %s", (self.group_3.id,)
+        )
+        self.group_3.invalidate_recordset(["z_ind_grp_num_individuals"])
+        self.group_3.recompute_indicators()
+        self.assertEqual(
+            self.group_3.z_ind_grp_num_individuals, 2, "Indicators not recomputed by the single pass."
+        )
+
+    def test_28_recompute_indicators_run(self):
+        # The recompute of all records should go through every group in keyset batches
+        self.env["g2p.group.membership"].create(
+            {"group": self.group_3.id, "individual": self.registrant_1.id}
+        )
+        self.env.cr.execute(
+            "UPDATE res_partner SET z_ind_grp_num_individuals = 0 WHERE id = %s", (self.group_3.id,)
+        )
+        self.group_3.invalidate_recordset(["z_ind_grp_num_individuals"])
+
+        run = self.group_3.recompute_indicators_for_all_records(batch_size=2)
+        self.assertEqual(run.state, "done", "Recompute run not completed.")
+        self.assertEqual(run.processed_count, run.total_count, "Not all groups were recomputed.")
+        self.assertGreaterEqual(run.last_group_id, self.group_3.id, "Cursor not moved past the groups.")
+        self.assertEqual(self.group_3.z_ind_grp_num_individuals, 1, "Indicators not recomputed by the run.")
+
+        with self.assertRaises(UserError):
+            run.action_cancel()
+
+    def test_29_set_indicator_results(self):
+        # Groups without matching members should be reset by the bulk writer
+        self.env["g2p.group.membership"].create(
+            {"group": self.group_3.id, "individual": self.registrant_1.id}
+        )
+        self.env.cr.execute(
+            "UPDATE res_partner SET z_ind_grp_num_individuals = 5 WHERE id IN %s",
+            ((self.group_2.id, self.group_3.id),),
+        )
+        groups = self.group_2 | self.group_3
+        groups.invalidate_recordset(["z_ind_grp_num_individuals"])
+
+        groups.compute_count_and_set_indicator("z_ind_grp_num_individuals", None, [])
+        self.assertEqual(self.group_2.z_ind_grp_num_individuals, 0, "Group without members not reset.")
+        self.assertEqual(self.group_3.z_ind_grp_num_individuals, 1, "Group with members not counted.")
+
+    def test_30_group_ids_join_strategies(self):
+        # Every way of passing the group ids should give the same aggregate
+        self.env["g2p.group.membership"].create(
+            [
+                {"group": self.group_2.id, "individual": self.registrant_1.id},
+                {"group": self.group_3.id, "individual": self.registrant_1.id},
+                {"group": self.group_3.id, "individual": self.registrant_2.id},
+            ]
+        )
+        groups = self.group_1 | self.group_2 | self.group_3
+        results = {}
+        for strategy in ("values", "array", "temp_table"):
+            select_query, select_params = groups._get_members_aggregate_query(ids_strategy=strategy)
+            self.env.cr.execute(select_query, select_params)
+            results[strategy] = dict(self.env.cr.fetchall())
+        self.assertEqual(results["array"], {self.group_2.id: 1, self.group_3.id: 2})
+        self.assertEqual(results["values"], results["array"], "Array ids do not match the VALUES list.")
+        self.assertEqual(results["temp_table"], results["array"], "Temporary table does not match.")
+
+        benchmark = self.env["res.partner"]._benchmark_members_aggregate(sizes=(10,))
+        self.assertEqual(
+            [result["strategy"] for result in benchmark],
+            ["values", "array", "temp_table"],
+            "Benchmark did not run every strategy.",
+        )
+
+    def test_31_membership_summary(self):
+        # Counts from the membership summary should match the per indicator query
+        self.env["gender.type"].create([{"code": "F", "value": "Female"}, {"code": "M", "value": "Male"}])
+        self.registrant_1.write({"gender": "Female", "birthdate": fields.Date.today() - timedelta(days=3650)})
+        self.registrant_2.write({"gender": "Male"})
+        self.env["g2p.group.membership"].create(
+            [
+                {"group": self.group_3.id, "individual": self.registrant_1.id},
+                {"group": self.group_3.id, "individual": self.registrant_2.id},
+            ]
+        )
+        domain = [("gender", "=", "Female")]
+        self.assertEqual(self.group_3.count_individuals(domain=domain), [(self.group_3.id, 1)])
+        self.assertEqual(
+            self.group_3.count_individuals(domain=domain),
+            self.group_3._query_members_aggregate(individual_domain=domain),
+            "Summary does not match the per indicator query.",
+        )
+        summary = self.env["g2p.group.membership.summary"].search([("group", "=", self.group_3.id)])
+        self.assertEqual(sorted(summary.mapped("age_band")), ["5_17", "unknown"], "Age bands not summarized.")
+
+        self.registrant_2.write({"gender": "Female"})
+        self.assertEqual(
+            self.group_3.count_individuals(domain=domain),
+            [(self.group_3.id, 2)],
+            "Gender change not refreshed.",
+        )
+
+    def test_32_unique_kinds(self):
+        # Every group with a repeated unique kind should be reported at once
+        unique_kind = self.env["g2p.group.membership.kind"].create({"name": "Unique Kind", "is_unique": True})
+        memberships = self.env["g2p.group.membership"].create(
+            [
+                {"group": self.group_2.id, "individual": self.registrant_1.id},
+                {"group": self.group_2.id, "individual": self.registrant_2.id},
+                {"group": self.group_3.id, "individual": self.registrant_1.id},
+                {"group": self.group_3.id, "individual": self.registrant_2.id},
+            ]
+        )
+
+        # The database rejects the duplicate even when the ORM check is bypassed
+        with mute_logger("odoo.sql_db"), self.assertRaises(psycopg2.errors.UniqueViolation):
+            with self.env.cr.savepoint():
+                self.env.cr.execute(
+                    "INSERT INTO g2p_group_membership_g2p_group_membership_kind_rel "
+                    "(g2p_group_membership_id, g2p_group_membership_kind_id) VALUES (%s, %s), (%s, %s)",
+                    (memberships[0].id, unique_kind.id, memberships[1].id, unique_kind.id),
+                )
+                self.env.cr.execute("SET CONSTRAINTS g2p_group_membership_unique_kind IMMEDIATE")
+        self.env.cr.execute("SET CONSTRAINTS g2p_group_membership_unique_kind DEFERRED")
+
+        with self.assertRaisesRegex(ValidationError, "Group 2, Group 3"):
+            memberships.write({"kind": [(6, 0, [unique_kind.id])]})
+
+    def test_33_duplicate_members(self):
+        # Duplicates within a batch and with active members should be rejected in one check
+        with self.assertRaisesRegex(ValidationError, "Heidi Jaddranka"):
+            self.env["g2p.group.membership"].create(
+                [
+                    {"group": self.group_3.id, "individual": self.registrant_1.id},
+                    {"group": self.group_3.id, "individual": self.registrant_2.id},
+                    {"group": self.group_3.id, "individual": self.registrant_1.id},
+                ]
+            )
+
+        membership = self.env["g2p.group.membership"].create(
+            {"group": self.group_3.id, "individual": self.registrant_1.id}
+        )
+        with self.assertRaises(ValidationError):
+            self.env["g2p.group.membership"].create(
+                {"group": self.group_3.id, "individual": self.registrant_1.id}
+            )
+
+        # An individual whose membership ended can join the group again
+        membership.write({"ended_date": fields.Datetime.now() - timedelta(days=1)})
+        rejoined = self.env["g2p.group.membership"].create(
+            {"group": self.group_3.id, "individual": self.registrant_1.id}
+        )
+        self.assertTrue(rejoined, "Ended member could not join again.")
+        with self.assertRaises(ValidationError):
+            membership.write({"ended_date": None})
+
+    def test_34_end_memberships(self):
+        # Memberships whose ended date has passed should be ended by the sweep
+        memberships = self.env["g2p.group.membership"].create(
+            [
+                {
+                    "group": self.group_3.id,
+                    "individual": self.registrant_1.id,
+                    "ended_date": fields.Datetime.now() + timedelta(hours=1),
+                },
+                {"group": self.group_3.id, "individual": self.registrant_2.id},
+            ]
+        )
+        self.assertFalse(memberships[0].is_ended, "Membership ended before its ended date.")
+        self.assertEqual(self.group_3.z_ind_grp_num_individuals, 2)
+
+        self.env.cr.execute(
+            "UPDATE g2p_group_membership SET ended_date = %s WHERE id = %s",
+            (fields.Datetime.now() - timedelta(minutes=1), memberships[0].id),
+        )
+        memberships.invalidate_recordset(["ended_date"])
+        self.env["g2p.group.membership"]._cron_end_memberships()
+        self.assertTrue(memberships[0].is_ended, "Membership not ended by the sweep.")
+        self.assertEqual(memberships[0].status, "inactive")
+        self.assertFalse(memberships[1].is_ended, "Active membership ended by the sweep.")
+        self.assertEqual(self.group_3.z_ind_grp_num_individuals, 1, "Ended member still counted.")
+
+        # A membership ended before the last sweep but committed after it is still ended
+        self.env.cr.execute(
+            "UPDATE g2p_group_membership SET ended_date = %s WHERE id = %s",
+            (fields.Datetime.now() - timedelta(hours=2), memberships[1].id),
+        )
+        memberships.invalidate_recordset(["ended_date"])
+        self.env["g2p.group.membership"]._cron_end_memberships()
+        self.assertTrue(memberships[1].is_ended, "Late membership not ended by the sweep.")
+        self.assertEqual(self.group_3.z_ind_grp_num_individuals, 0)
+
+    def test_35_dirty_groups(self):
+        # Groups marked several times should be queued and drained once
+        dirty_model = self.env["g2p.group.indicator.dirty"]
+        dirty_model._cron_drain()
+        for _i in range(3):
+            dirty_model._mark([self.group_2.id, self.group_3.id, self.group_3.id])
+        metrics = dirty_model._get_metrics()
+        self.assertEqual(metrics["queue_depth"], 2, "Dirty groups not coalesced.")
+        self.assertEqual(metrics["pending_marks"], 6)
+        self.assertEqual(metrics["coalescing_ratio"], 3.0)
+        recompute = self.env["g2p.group.indicator.recompute"].new({})
+        self.assertEqual(recompute.dirty_queue_depth, 2, "Queue depth not shown on the recompute form.")
+        self.assertEqual(recompute.dirty_coalescing_ratio, 3.0)
+
+        result = dirty_model._cron_drain(batch_size=1)
+        self.assertEqual(result, {"group_count": 2, "mark_count": 6}, "Dirty groups not drained.")
+        self.assertEqual(dirty_model._get_metrics()["queue_depth"], 0, "Dirty groups left after drain.")
+
+    def test_36_declarative_indicator(self):
+        # Indicators configured as records should be created and maintained like coded ones
+        head_kind = self.env.ref("g2p_registry_membership.group_membership_kind_head")
+        self.env["g2p.group.membership"].create(
+            {"group": self.group_3.id, "individual": self.registrant_1.id, "kind": [(6, 0, [head_kind.id])]}
+        )
+        indicator = self.env["g2p.group.indicator"].create(
+            {"name": "Heads", "field_name": "x_ind_grp_num_heads", "kind_ids": [(6, 0, [head_kind.id])]}
+        )
+        self.assertIn("x_ind_grp_num_heads", self.env["res.partner"]._fields, "Indicator field not created.")
+        # The registry is reloaded with the new field
+        group = self.env["res.partner"].browse(self.group_3.id)
+        self.assertIn("x_ind_grp_num_heads", self.env["res.partner"]._get_indicator_definitions())
+        self.assertEqual(group.x_ind_grp_num_heads, 1, "Indicator not computed on creation.")
+
+        self.env["g2p.group.membership"].create(
+            {"group": self.group_3.id, "individual": self.registrant_2.id}
+        )
+        self.assertEqual(group.x_ind_grp_num_heads, 1, "Member without the kind counted.")
+
+        indicator.write({"domain": "[('name', '=', 'Angus Kleitos')]", "kind_ids": [(5, 0, 0)]})
+        self.assertEqual(group.x_ind_grp_num_heads, 1, "Indicator not recomputed on change.")
+
+        with self.assertRaises(ValidationError):
+            self.env["g2p.group.indicator"].create({"name": "Invalid", "field_name": "z_num_heads"})
+
+        new_group = self.env["res.partner"].create(
+            {"name": "New Group", "is_registrant": True, "is_group": True}
+        )
+        new_group.flush_recordset()
+        self.env.cr.execute("SELECT x_ind_grp_num_heads FROM res_partner WHERE id = %s", (new_group.id,))
+        self.assertEqual(self.env.cr.fetchone()[0], 0, "New group indicator not defaulted to 0.")
+
+        presence = self.env["g2p.group.indicator"].create(
+            {"name": "Has Heads", "field_name": "x_ind_grp_has_heads", "presence_only": True}
+        )
+        presence.write({"field_name": "x_ind_grp_has_head"})
+        self.assertEqual(
+            self.env["res.partner"]._fields["x_ind_grp_has_head"].type,
+            "boolean",
+            "Renamed presence indicator field not created as boolean.",
+        )
+
+    def test_37_sharded_recompute(self):
+        # A sharded recompute should split the groups into ranges and recompute all of them
+        self.env["g2p.group.membership"].create(
+            [
+                {"group": self.group_2.id, "individual": self.registrant_1.id},
+                {"group": self.group_3.id, "individual": self.registrant_1.id},
+                {"group": self.group_3.id, "individual": self.registrant_2.id},
+            ]
+        )
+        self.env.cr.execute(
+            "UPDATE res_partner SET z_ind_grp_num_individuals = 0 WHERE id IN %s",
+            ((self.group_2.id, self.group_3.id),),
+        )
+        (self.group_2 | self.group_3).invalidate_recordset(["z_ind_grp_num_individuals"])
+
+        run = self.group_3.recompute_indicators_for_all_records(batch_size=1, worker_count=2)
+        self.assertEqual(run.state, "done", "Sharded recompute not completed.")
+        self.assertTrue(run.shard_ids, "No shards created.")
+        self.assertTrue(all(shard.state == "done" for shard in run.shard_ids), "Shard left pending.")
+        self.assertEqual(run.processed_count, run.total_count, "Not all groups were recomputed.")
+        self.assertEqual(sum(run.shard_ids.mapped("group_count")), run.total_count)
+        self.assertEqual(self.group_2.z_ind_grp_num_individuals, 1)
+        self.assertEqual(self.group_3.z_ind_grp_num_individuals, 2)
+
+    def test_38_age_indicator(self):
+        # Indicators on the stored age should be counted in SQL and follow birthdate changes
+        group = self.group_3
+        self.env["g2p.group.membership"].create(
+            [
+                {"group": group.id, "individual": self.registrant_1.id},
+                {"group": group.id, "individual": self.registrant_2.id},
+            ]
+        )
+        self.registrant_1.write({"birthdate": fields.Date.today() - timedelta(days=365 * 70)})
+        self.env["g2p.group.indicator"].create(
+            {"name": "Elderly", "field_name": "x_ind_grp_num_elderly", "domain": "[('age_years', '>=', 60)]"}
+        )
+        group = self.env["res.partner"].browse(group.id)
+        self.assertEqual(group.x_ind_grp_num_elderly, 1, "Elderly members not counted.")
+
+        self.registrant_2.write({"birthdate": fields.Date.today() - timedelta(days=365 * 65)})
+        self.assertEqual(group.x_ind_grp_num_elderly, 2, "Birthdate change not applied to the indicator.")
+
+    def test_39_preview_recompute(self):
+        # The preview should report the rows that would change without writing them
+        self.env["g2p.group.membership"].create(
+            {"group": self.group_3.id, "individual": self.registrant_1.id}
+        )
+        self.env.cr.execute(
+            "UPDATE res_partner SET z_ind_grp_num_individuals = 0 WHERE id = %s", (self.group_3.id,)
+        )
+        self.group_3.invalidate_recordset(["z_ind_grp_num_individuals"])
+
+        preview = self.env["g2p.group.indicator.recompute"].preview_recompute(
+            recomputed_fields=["z_ind_grp_num_individuals"], sample_size=100000
+        )
+        self.assertEqual(preview["sample_size"], preview["total_count"])
+        indicator = preview["indicators"]["z_ind_grp_num_individuals"]
+        self.assertEqual(indicator["changed_in_sample"], 1, "Changed group not reported.")
+        self.assertTrue(indicator["plan"], "Query plan not reported.")
+        self.assertEqual(self.group_3.z_ind_grp_num_individuals, 0, "Preview wrote the indicator.")
+
+    def test_40_summary_age_bands(self):
+        # Age comparisons on the bounds of the bands should be counted from the summary
+        self.registrant_1.write({"birthdate": fields.Date.today() - timedelta(days=365 * 3)})
+        self.registrant_2.write({"birthdate": fields.Date.today() - timedelta(days=365 * 30)})
+        self.env["g2p.group.membership"].create(
+            [
+                {"group": self.group_3.id, "individual": self.registrant_1.id},
+                {"group": self.group_3.id, "individual": self.registrant_2.id},
+            ]
+        )
+        summary_model = self.env["g2p.group.membership.summary"]
+        for domain, count in (
+            ([("age_years", "<", 5)], 1),
+            ([("age_years", ">=", 18)], 1),
+            ([("age_years", ">", 4)], 1),
+        ):
+            self.assertTrue(summary_model._can_count(domain), f"{domain} not counted from the summary.")
+            self.assertEqual(
+                self.group_3.count_individuals(domain=domain),
+                self.group_3._query_members_aggregate(individual_domain=domain),
+                f"Summary does not match the per indicator query for {domain}.",
+            )
+            self.assertEqual(self.group_3.count_individuals(domain=domain), [(self.group_3.id, count)])
+        self.assertFalse(summary_model._can_count([("age_years", "<", 10)]), "Band cut counted from summary.")
+
+    def test_41_age_refresh_recounts_age_indicators(self):
+        # The nightly age refresh should only recount the indicators filtering on the age
+        self.env["g2p.group.membership"].create(
+            {"group": self.group_3.id, "individual": self.registrant_1.id}
+        )
+        self.registrant_1.write({"birthdate": fields.Date.today() - timedelta(days=365 * 70)})
+        self.env["g2p.group.indicator"].create(
+            {"name": "Elderly", "field_name": "x_ind_grp_num_elderly", "domain": "[('age_years', '>=', 60)]"}
+        )
+        group = self.env["res.partner"].browse(self.group_3.id)
+        self.env.flush_all()
+        self.env.cr.execute(
+            "UPDATE res_partner SET age_years = 59, x_ind_grp_num_elderly = 0, z_ind_grp_num_individuals = 5 "
+            "WHERE id IN %s",
+            ((self.registrant_1.id, group.id),),
+        )
+        self.env.invalidate_all()
+
+        self.env["res.partner"]._refresh_age_years()
+        self.assertEqual(group.x_ind_grp_num_elderly, 1, "Age indicator not recounted.")
+        self.assertEqual(group.z_ind_grp_num_individuals, 5, "Indicator without age filter recounted.")
@@ -15,6 +15,8 @@ class G2PErrorCodes(Enum):
     G2P_REQ_011 = "Future Date."
     G2P_REQ_012 = "Required field."
     G2P_REQ_013 = "Partner/Registrant is not present."
+    G2P_REQ_014 = "Record could not be created."
+    G2P_REQ_015 = "Invalid field."
 
     # Add more error codes and messages as needed
 
@@ -2,3 +2,4 @@
 from . import process_group_mixin
 from . import process_individual_mixin
 from . import fastapi_endpoint_registry
+from . import res_partner
@@ -1,3 +1,5 @@
+from typing import Any
+
 from fastapi import APIRouter, FastAPI
 
 from odoo import api, fields, models
@@ -7,6 +9,8 @@ from odoo.addons.fastapi.dependencies import (
     authenticated_partner_impl,
 )
 
+DEFAULT_THREAD_POOL_SIZE = 16
+
 
 class G2PRegistryEndpoint(models.Model):
     _inherit = "fastapi.endpoint"
@@ -14,6 +18,21 @@ class G2PRegistryEndpoint(models.Model):
     app: str = fields.Selection(
         selection_add=[("registry", "Registry Endpoint")], ondelete={"registry": "cascade"}
     )
+    thread_pool_size = fields.Integer(
+        default=DEFAULT_THREAD_POOL_SIZE,
+        help="Maximum number of requests of the registry endpoint running ORM work at once. "
+        "Other requests are queued.",
+    )
+    orjson_response = fields.Boolean(
+        "Serialize JSON with orjson",
+        help="Serialize the JSON responses of the registry endpoint with orjson, when it is installed.",
+    )
+    compression_min_size = fields.Integer(
+        "Compress Responses Above",
+        help="Compress the responses of the registry endpoint larger than this number of bytes, "
+        "in brotli when the client accepts it and brotli-asgi is installed, in gzip otherwise. "
+        "Responses are not compressed when it is 0.",
+    )
 
     def _get_fastapi_routers(self) -> list[APIRouter]:
         routers = super()._get_fastapi_routers()
@@ -21,8 +40,9 @@ class G2PRegistryEndpoint(models.Model):
             # Cannot import these on top because of issues with dependency graph
             from ..routers.group import group_router
             from ..routers.individual import individual_router
+            from ..routers.thread_pool import thread_pool_router
 
-            routers.extend([group_router, individual_router])
+            routers.extend([group_router, individual_router, thread_pool_router])
         return routers
 
     def _get_app(self) -> FastAPI:
@@ -30,8 +50,31 @@ class G2PRegistryEndpoint(models.Model):
         if self.app == "registry":
             # For now limiting the authentication to Basic auth
             app.dependency_overrides[authenticated_partner_impl] = authenticated_partner_from_basic_auth_user
+            app.state.thread_pool_size = self.thread_pool_size or DEFAULT_THREAD_POOL_SIZE
+            # The apps are built again when the registry is reloaded, with new schema classes
+            from ..schemas.naive_orm_model import _get_projection
+
+            _get_projection.cache_clear()
+            if self.compression_min_size > 0:
+                from ..routers.responses import add_compression_middleware
+
+                add_compression_middleware(app, self.compression_min_size)
         return app
 
+    def _prepare_fastapi_app_params(self) -> dict[str, Any]:
+        params = super()._prepare_fastapi_app_params()
+        if self.app == "registry" and self.orjson_response:
+            from ..routers.responses import get_json_response_class
+
+            params["default_response_class"] = get_json_response_class(self.orjson_response)
+        return params
+
+    @api.model
+    def _fastapi_app_fields(self) -> list[str]:
+        app_fields = super()._fastapi_app_fields()
+        app_fields.extend(["thread_pool_size", "orjson_response", "compression_min_size"])
+        return app_fields
+
     @api.model
     def sync_endpoint_id_with_registry(self, endpoint_id):
         return self.browse(endpoint_id).action_sync_registry()
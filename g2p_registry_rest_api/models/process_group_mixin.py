@@ -25,9 +25,9 @@ class ProcessGroupMixin(models.AbstractModel):
         # Add group's kind field
         if group_info.kind:
             # Search Kind
-            kind_id = self.env["g2p.group.kind"].sudo().search([("name", "=", group_info.kind)])
+            kind_id = self._resolve_reference("group_kinds", group_info.kind)
             if kind_id:
-                grp_rec.update({"kind": kind_id[0].id})
+                grp_rec.update({"kind": kind_id})
             elif group_info.kind:
                 raise G2PApiValidationError(
                     error_message=G2PErrorCodes.G2P_REQ_003.get_error_message(),
@@ -49,3 +49,18 @@ class ProcessGroupMixin(models.AbstractModel):
             grp_rec.update({"phone_number_ids": phone_numbers})
 
         return grp_rec
+
+    def _process_membership_kinds(self, membership_kinds):
+        kind_commands = []
+        for kind in membership_kinds or []:
+            # Search Kind
+            kind_id = self._resolve_reference("membership_kinds", kind.name)
+            if kind_id:
+                kind_commands.append((4, kind_id))
+            elif kind.name:
+                raise G2PApiValidationError(
+                    error_message=G2PErrorCodes.G2P_REQ_004.get_error_message(),
+                    error_code=G2PErrorCodes.G2P_REQ_004.get_error_code(),
+                    error_description=f"Membership kind - {kind.name} is not present in the database.",
+                )
+        return kind_commands
@@ -3,6 +3,9 @@ from odoo import models
 from ..exceptions.base_exception import G2PApiValidationError
 from ..exceptions.error_codes import G2PErrorCodes
 
+# Context key of the references resolved at once for a batch of registrants
+REFERENCES_CONTEXT_KEY = "g2p_rest_api_references"
+
 
 class ProcessIndividualMixin(models.AbstractModel):
     _name = "process_individual.rest.mixin"
@@ -23,7 +26,8 @@ class ProcessIndividualMixin(models.AbstractModel):
             "birthdate": individual.birthdate if individual.birthdate else None,
             "birth_place": individual.birth_place if individual.birth_place else None,
             "address": individual.address if individual.address else None,
-            "image_1920": individual.image_1920 if individual.image_1920 else None,
+            # Members of groups have no image
+            "image_1920": getattr(individual, "image_1920", None) or None,
         }
 
         filtered_none = {key: value for key, value in indv_rec.items() if value is not None}
@@ -55,14 +59,14 @@ class ProcessIndividualMixin(models.AbstractModel):
         if ids_info.ids:
             for rec in ids_info.ids:
                 # Search ID Type
-                id_type_id = self.env["g2p.id.type"].sudo().search([("name", "=", rec.id_type)])
+                id_type_id = self._resolve_reference("id_types", rec.id_type)
                 if id_type_id:
                     ids.append(
                         (
                             0,
                             0,
                             {
-                                "id_type": id_type_id[0].id,
+                                "id_type": id_type_id,
                                 "value": rec.value,
                                 "expiry_date": rec.expiry_date,
                                 "status": rec.status if rec.status else None,
@@ -101,11 +105,58 @@ class ProcessIndividualMixin(models.AbstractModel):
 
     def _process_gender(self, ids_info):
         if ids_info.gender:
-            gender = (
-                self.env["gender.type"]
-                .sudo()
-                .search([("active", "=", True), ("code", "=", ids_info.gender)], limit=1)
-            )
-            if gender:
-                return gender.value
+            return self._resolve_reference("genders", ids_info.gender)
         return None
+
+    def _get_references(self, registrants):
+        """
+        Resolve at once the id types, genders and kinds used by registrants and their members.
+
+        The result is meant to be set in the context under REFERENCES_CONTEXT_KEY, so that
+        processing many registrants does not search the same references for each of them.
+
+        :return: The ids or values keyed by name or code, per reference type.
+        :rtype: dict
+        """
+        keys = {"id_types": set(), "genders": set(), "group_kinds": set(), "membership_kinds": set()}
+        pending = list(registrants)
+        while pending:
+            registrant = pending.pop()
+            keys["id_types"].update(rec.id_type for rec in getattr(registrant, "ids", None) or [])
+            if getattr(registrant, "gender", None):
+                keys["genders"].add(registrant.gender)
+            kind = getattr(registrant, "kind", None)
+            if isinstance(kind, str):
+                keys["group_kinds"].add(kind)
+            elif kind:
+                keys["membership_kinds"].update(rec.name for rec in kind if rec.name)
+            pending.extend(getattr(registrant, "members", None) or [])
+        return {
+            reference_type: self._search_references(reference_type, reference_keys)
+            for reference_type, reference_keys in keys.items()
+        }
+
+    def _search_references(self, reference_type, keys):
+        """
+        Look up references of a type by name or code in the reference lookup cache.
+
+        :return: The id, or the gender value, keyed by name or code.
+        :rtype: dict
+        """
+        keys = [key for key in keys if key]
+        if not keys:
+            return {}
+        if reference_type == "genders":
+            return self.env["gender.type"]._lookup_many(keys, value_field="value")
+        model = {
+            "id_types": "g2p.id.type",
+            "group_kinds": "g2p.group.kind",
+            "membership_kinds": "g2p.group.membership.kind",
+        }[reference_type]
+        return self.env[model]._lookup_many(keys)
+
+    def _resolve_reference(self, reference_type, key):
+        references = self.env.context.get(REFERENCES_CONTEXT_KEY)
+        if references and reference_type in references:
+            return references[reference_type].get(key)
+        return self._search_references(reference_type, [key]).get(key)
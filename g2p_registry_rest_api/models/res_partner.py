@@ -0,0 +1,70 @@
+import hashlib
+
+from odoo import api, fields, models
+
+
+class ResPartner(models.Model):
+    _inherit = "res.partner"
+
+    @api.model
+    def _get_registrant_etag(self, partner_id, is_group):
+        """
+        Get the entity tag of a registrant as returned by the REST API, None if it does not exist.
+
+        The tag changes with the last update of the registrant, of its IDs and phone numbers and,
+        for groups, of the memberships, their kinds, the members and their IDs, and every day as
+        the ages change. Counts are included so that removed lines change the tag too. It is read
+        with one query returning one row.
+        """
+        try:
+            partner_id = int(partner_id)
+        except (TypeError, ValueError):
+            return None
+        for model in (
+            "res.partner",
+            "g2p.reg.id",
+            "g2p.phone.number",
+            "g2p.group.membership",
+            "g2p.group.membership.kind",
+        ):
+            self.env[model].flush_model()
+        members_sql = "NULL"
+        kinds_sql = "NULL"
+        if is_group:
+            members_sql = """(
+                SELECT concat_ws(',', max("membership"."write_date"), max("individual"."write_date"),
+                    max("member_id"."write_date"), count(DISTINCT "membership"."id"), count("member_id"."id"))
+                FROM "g2p_group_membership" AS "membership"
+                JOIN "res_partner" AS "individual" ON "individual"."id" = "membership"."individual"
+                LEFT JOIN "g2p_reg_id" AS "member_id" ON "member_id"."partner_id" = "individual"."id"
+                WHERE "membership"."group" = "partner"."id"
+            )"""
+            kind_field = self.env["g2p.group.membership"]._fields["kind"]
+            kinds_sql = f"""(
+                SELECT concat_ws(',', max("kind"."write_date"), count(*))
+                FROM "g2p_group_membership" AS "membership"
+                JOIN "{kind_field.relation}" AS "kind_rel"
+                    ON "kind_rel"."{kind_field.column1}" = "membership"."id"
+                JOIN "g2p_group_membership_kind" AS "kind" ON "kind"."id" = "kind_rel"."{kind_field.column2}"
+                WHERE "membership"."group" = "partner"."id"
+            )"""
+        self._cr.execute(
+            f"""
+            SELECT "partner"."id", "partner"."write_date",
+                (SELECT concat_ws(',', max("write_date"), count(*)) FROM "g2p_reg_id"
+                    WHERE "partner_id" = "partner"."id"),
+                (SELECT concat_ws(',', max("write_date"), count(*)) FROM "g2p_phone_number"
+                    WHERE "partner_id" = "partner"."id"),
+                {members_sql},
+                {kinds_sql}
+            FROM "res_partner" AS "partner"
+            WHERE "partner"."id" = %s AND "partner"."is_registrant" AND "partner"."is_group" = %s
+            """,
+            (partner_id, bool(is_group)),
+        )
+        row = self._cr.fetchone()
+        if not row:
+            return None
+        # The ages are computed from the current date
+        row += (fields.Date.today(),)
+        return f'"{hashlib.sha1(repr(row).encode()).hexdigest()}"'
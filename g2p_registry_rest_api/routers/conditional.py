@@ -0,0 +1,21 @@
+from fastapi import Request, Response
+
+from odoo.api import Environment
+
+
+def get_not_modified_response(env: Environment, http_request: Request, _id, is_group: bool):
+    """
+    Get the registrant entity tag, and the 304 response when the client already has it.
+
+    :return: The entity tag, None when the registrant does not exist, and the 304 response or None.
+    :rtype: tuple
+    """
+    etag = env["res.partner"].sudo()._get_registrant_etag(_id, is_group)
+    if not etag:
+        return None, None
+    if_none_match = http_request.headers.get("if-none-match")
+    if if_none_match:
+        client_etags = {value.strip().removeprefix("W/") for value in if_none_match.split(",")}
+        if etag in client_etags or "*" in client_etags:
+            return etag, Response(status_code=304, headers={"ETag": etag})
+    return etag, None
@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+from fastapi.responses import StreamingResponse
+
+from odoo.api import Environment
+
+from .pagination import search_page
+
+EXPORT_CHUNK_SIZE = 500
+# Chunk size of exports of single values, such as IDs
+VALUE_CHUNK_SIZE = 10000
+
+
+def get_export_domain(domain, updated_since: datetime | None, is_group: bool = False):
+    """
+    Add the incremental sync filter on the last update of the registrants.
+
+    A registrant is exported when it, its IDs or its phone numbers were updated since then
+    and, for groups, when their memberships or members were, as these are in the payload.
+    """
+    if updated_since:
+        if updated_since.tzinfo:
+            updated_since = updated_since.astimezone(timezone.utc)
+        updated_since = updated_since.replace(tzinfo=None)
+        field_names = ["write_date", "reg_ids.write_date", "phone_number_ids.write_date"]
+        if is_group:
+            field_names += [
+                "group_membership_ids.write_date",
+                "group_membership_ids.individual.write_date",
+                "group_membership_ids.individual.reg_ids.write_date",
+            ]
+        domain = (
+            domain
+            + ["|"] * (len(field_names) - 1)
+            + [(field_name, ">=", updated_since) for field_name in field_names]
+        )
+    return domain
+
+
+def export_response(env: Environment, domain, response_model, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """
+    Stream the partners of the domain as newline-delimited JSON, in ascending id order.
+
+    The cache is emptied after each chunk so that the memory stays flat whatever the size of
+    the registry.
+    """
+
+    def generate_chunks(export_env):
+        cursor = None
+        while True:
+            partners, cursor = search_page(export_env, domain, cursor, chunk_size)
+            lines = [
+                item.model_dump_json(by_alias=True) + "\n"
+                for item in response_model.model_validate_records(partners)
+            ]
+            export_env.invalidate_all()
+            yield "".join(lines)
+            if not cursor:
+                break
+
+    return streaming_response(env, generate_chunks, "application/x-ndjson")
+
+
+def streaming_response(env: Environment, generate_chunks, media_type: str):
+    """
+    Stream the chunks generated from an environment on its own database cursor.
+
+    The request cursor can not be used once the response is returned. The own cursor also
+    keeps a consistent snapshot of the registry for the whole export.
+    """
+    registry = env.registry
+    uid = env.uid
+    context = dict(env.context)
+
+    def generate():
+        with registry.cursor() as cr:
+            yield from generate_chunks(Environment(cr, uid, context))
+
+    return StreamingResponse(generate(), media_type=media_type)
+
+
+def format_values(values, response_format: str, first: bool = True, last: bool = True):
+    """
+    Format a chunk of values as a JSON list, newline-delimited JSON or CSV with one column.
+
+    ``first`` and ``last`` tell whether the chunk starts or ends the response, to write the
+    brackets of the JSON list and the header of the CSV.
+    """
+    if response_format == "ndjson":
+        return "".join(json.dumps(value) + "\n" for value in values)
+    if response_format == "csv":
+        output = io.StringIO()
+        writer = csv.writer(output)
+        if first:
+            writer.writerow(["value"])
+        writer.writerows([value] for value in values)
+        return output.getvalue()
+    chunk = ", ".join(json.dumps(value) for value in values)
+    if not first and chunk:
+        chunk = ", " + chunk
+    return ("[" if first else "") + chunk + ("]" if last else "")
+
+
+def get_media_type(response_format: str):
+    return {
+        "ndjson": "application/x-ndjson",
+        "csv": "text/csv",
+    }.get(response_format, "application/json")
@@ -1,7 +1,8 @@
 import logging
+from datetime import datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
 
 from odoo.api import Environment
 
@@ -9,21 +10,75 @@ from odoo.addons.fastapi.dependencies import authenticated_partner_env
 
 from ..exceptions.base_exception import G2PApiValidationError
 from ..exceptions.error_codes import G2PErrorCodes
-from ..schemas.group import GroupInfoRequest, GroupInfoResponse, GroupShortInfoOut
+from ..models.process_individual_mixin import REFERENCES_CONTEXT_KEY
+from ..schemas.error_response import G2PErrorResponse
+from ..schemas.group import (
+    GroupBatchItemResponse,
+    GroupBatchRequest,
+    GroupBatchResponse,
+    GroupInfoRequest,
+    GroupInfoResponse,
+    GroupShortInfoOut,
+)
+from ..schemas.group_membership import GroupMemberShortInfoResponse
+from .conditional import get_not_modified_response
+from .export import export_response, get_export_domain
+from .pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    get_response_model,
+    search_page,
+    set_page_headers,
+)
+from .thread_pool import limit_thread_pool
 
 _logger = logging.getLogger(__name__)
 
-group_router = APIRouter(tags=["group"])
+group_router = APIRouter(tags=["group"], dependencies=[Depends(limit_thread_pool)])
+
+
+@group_router.get(
+    "/group/export",
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+def export_groups(
+    env: Annotated[Environment, Depends(authenticated_partner_env)],
+    updated_since: datetime | None = None,
+    include_members_full: bool = False,
+):
+    """
+    Export the groups as newline-delimited JSON
+
+    ``updated_since`` only exports the groups updated since then, with their IDs, phone
+    numbers, memberships or members, for incremental sync.
+    """
+    domain = get_export_domain(
+        [("is_registrant", "=", True), ("is_group", "=", True)], updated_since, is_group=True
+    )
+    return export_response(env, domain, GroupInfoResponse if include_members_full else GroupShortInfoOut)
 
 
 @group_router.get("/group/{_id}", responses={200: {"model": GroupInfoResponse}})
-def get_group(_id, env: Annotated[Environment, Depends(authenticated_partner_env)]):
+def get_group(
+    _id,
+    env: Annotated[Environment, Depends(authenticated_partner_env)],
+    http_request: Request,
+    response: Response,
+):
     """
     Get partner's information by ID
+
+    The response has an ETag header. When it is sent back in If-None-Match and the group, its
+    members and their IDs have not changed, 304 Not Modified is returned without a body.
     """
+    etag, not_modified_response = get_not_modified_response(env, http_request, _id, is_group=True)
+    if not_modified_response:
+        return not_modified_response
     partner = _get_group(env, _id)
 
     if partner:
+        if etag:
+            response.headers["ETag"] = etag
         return GroupInfoResponse.model_validate(partner)
     else:
         raise G2PApiValidationError(
@@ -33,18 +88,74 @@ def get_group(_id, env: Annotated[Environment, Depends(authenticated_partner_env
         )
 
 
+@group_router.get(
+    "/group/{_id}/members",
+    responses={200: {"model": list[GroupMemberShortInfoResponse]}},
+)
+def get_group_members(
+    _id: int,
+    env: Annotated[Environment, Depends(authenticated_partner_env)],
+    http_request: Request,
+    response: Response,
+    kind: str | None = None,
+    include_ended: bool = False,
+    cursor: int | None = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+):
+    """
+    List the members of a group
+
+    Members are returned by pages in ascending membership ID order, with their kinds and the
+    main information of the individuals. Only the active members are listed, unless
+    ``include_ended`` is set. ``kind`` only lists the members with this kind. When there are
+    more, the cursor of the next page is given in the X-Next-Cursor and Link headers.
+    """
+    if not _get_group(env, _id):
+        raise G2PApiValidationError(
+            error_message=G2PErrorCodes.G2P_REQ_010.get_error_message(),
+            error_code=G2PErrorCodes.G2P_REQ_010.get_error_code(),
+            error_description="Record is not present in the database.",
+        )
+
+    domain = [("group", "=", _id)]
+    if not include_ended:
+        domain.append(("is_ended", "=", False))
+    if kind:
+        kind_id = env["g2p.group.membership.kind"]._lookup(kind)
+        if not kind_id:
+            raise G2PApiValidationError(
+                error_message=G2PErrorCodes.G2P_REQ_004.get_error_message(),
+                error_code=G2PErrorCodes.G2P_REQ_004.get_error_code(),
+                error_description=f"Membership kind - {kind} is not present in the database.",
+            )
+        domain.append(("kind", "=", kind_id))
+
+    memberships, next_cursor = search_page(env, domain, cursor, limit, model="g2p.group.membership")
+    set_page_headers(http_request, response, next_cursor)
+    return GroupMemberShortInfoResponse.model_validate_records(memberships)
+
+
 @group_router.get(
     "/group",
     responses={200: {"model": list[GroupInfoResponse]}},
 )
 def search_groups(
     env: Annotated[Environment, Depends(authenticated_partner_env)],
+    http_request: Request,
+    response: Response,
     _id: int | None = None,
     name: str | None = None,
     include_members_full: bool = False,
+    cursor: int | None = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    fields: str | None = None,
 ):
     """
     Search for groups by ID or name
+
+    Groups are returned by pages in ascending ID order. When there are more, the cursor of the
+    next page is given in the X-Next-Cursor and Link headers. ``fields`` limits the response to
+    a comma separated list of fields.
     """
     domain = [("is_registrant", "=", True), ("is_group", "=", True)]
     error_description = ""
@@ -57,14 +168,12 @@ def search_groups(
         domain.append(("name", "like", name))
         error_description = "This Name does not exist. Please enter a valid Name."
 
-    res = []
-
-    for p in env["res.partner"].sudo().search(domain):
-        if include_members_full:
-            res.append(GroupInfoResponse.model_validate(p))
-        else:
-            res.append(GroupShortInfoOut.model_validate(p))
-    if not len(res):
+    response_model = get_response_model(
+        GroupInfoResponse if include_members_full else GroupShortInfoOut, fields
+    )
+    partners, next_cursor = search_page(env, domain, cursor, limit)
+    res = response_model.model_validate_records(partners)
+    if not len(res) and not cursor:
         if name and _id:
             error_description = "Entered Name and ID does not exist."
         raise G2PApiValidationError(
@@ -72,6 +181,7 @@ def search_groups(
             error_code=G2PErrorCodes.G2P_REQ_010.get_error_code(),
             error_description=error_description,
         )
+    set_page_headers(http_request, response, next_cursor)
     return res
 
 
@@ -80,52 +190,106 @@ def create_group(request: GroupInfoRequest, env: Annotated[Environment, Depends(
     """
     Create a new Group
     """
-    # Create the individual Objects
-    grp_membership_rec = []
-
-    for membership_info in request.members:
-        individual = membership_info
-
-        indv_rec = env["process_individual.rest.mixin"]._process_individual(individual)
-
-        _logger.info("Creating Individual Record")
-        indv_id = env["res.partner"].sudo().create(indv_rec)
-
-        # Add individual's membership kind fields
-        membership_kind = membership_info.kind
-
-        indv_membership_kinds = []
-        if membership_kind:
-            for kind in membership_kind:
-                # Search Kind
-                kind_id = env["g2p.group.membership.kind"].sudo().search([("name", "=", kind.name)])
-                if kind_id:
-                    indv_membership_kinds.append((4, kind_id[0].id))
-                elif kind.name:
-                    raise G2PApiValidationError(
-                        error_message=G2PErrorCodes.G2P_REQ_004.get_error_message(),
-                        error_code=G2PErrorCodes.G2P_REQ_004.get_error_code(),
-                        error_description="Membership kind - %s is not present in the database." % kind.name,
-                    )
-        grp_membership_rec.append({"individual": indv_id.id, "kind": indv_membership_kinds})
-
-    # create the group object
-    grp_rec = env["process_group.rest.mixin"]._process_group(request)
+    mixin = env["process_group.rest.mixin"]
+    mixin = mixin.with_context(**{REFERENCES_CONTEXT_KEY: mixin._get_references([request])})
+    grp_rec, members = _process_group_request(mixin, request)
 
     _logger.info("Creating Group Record")
-    grp_id = env["res.partner"].sudo().create(grp_rec)
-    for mbr in grp_membership_rec:
-        mbr_rec = mbr
-        mbr_rec.update({"group": grp_id.id})
-
-        env["g2p.group.membership"].sudo().create(mbr_rec)
+    grp_id = _create_groups(env, [(grp_rec, members)])[0]
 
     # Reload the new object from the DB
-    partner = _get_group(env, grp_id.id)
+    partner = _get_group(env, grp_id)
 
     return GroupInfoResponse.model_validate(partner)
 
 
+@group_router.post("/groups:batch", responses={200: {"model": GroupBatchResponse}})
+def create_groups_batch(
+    request: GroupBatchRequest, env: Annotated[Environment, Depends(authenticated_partner_env)]
+):
+    """
+    Create many groups with their members
+
+    Each group is validated on its own and the valid ones are created together. The result of
+    every group is returned in the order of the request, so that failed groups can be sent again.
+    """
+    mixin = env["process_group.rest.mixin"]
+    mixin = mixin.with_context(**{REFERENCES_CONTEXT_KEY: mixin._get_references(request.groups)})
+
+    results = {}
+    items = []
+    for index, group_info in enumerate(request.groups):
+        try:
+            items.append((index, _process_group_request(mixin, group_info)))
+        except Exception as e:
+            results[index] = _get_batch_error(index, e)
+
+    try:
+        with env.cr.savepoint():
+            grp_ids = _create_groups(env, [item for _index, item in items])
+        for (index, _item), grp_id in zip(items, grp_ids, strict=True):
+            results[index] = GroupBatchItemResponse(index=index, status="created", id=grp_id)
+    except Exception:
+        # Find the groups that can not be created by creating them one by one
+        _logger.info("Group Batch Api: Batch creation failed, creating %s groups one by one", len(items))
+        for index, item in items:
+            try:
+                with env.cr.savepoint():
+                    grp_id = _create_groups(env, [item])[0]
+                results[index] = GroupBatchItemResponse(index=index, status="created", id=grp_id)
+            except Exception as e:
+                results[index] = _get_batch_error(index, e)
+
+    created_count = sum(1 for result in results.values() if result.status == "created")
+    return GroupBatchResponse(
+        created_count=created_count,
+        failed_count=len(results) - created_count,
+        results=[results[index] for index in sorted(results)],
+    )
+
+
+def _process_group_request(mixin, request):
+    """
+    Get the values of a group and of its members, raising on the first invalid field.
+
+    :return: The group values and the ``(individual values, kind commands)`` of each member.
+    :rtype: tuple
+    """
+    members = []
+    for membership_info in request.members:
+        indv_rec = mixin._process_individual(membership_info)
+        members.append((indv_rec, mixin._process_membership_kinds(membership_info.kind)))
+    return mixin._process_group(request), members
+
+
+def _create_groups(env: Environment, items):
+    """
+    Create the groups, their member individuals and their memberships with one create per model.
+
+    :param items: The group values and members, as returned by _process_group_request.
+    :return: The ids of the groups, in the order of the items.
+    :rtype: list
+    """
+    individuals = (
+        env["res.partner"]
+        .sudo()
+        .create([indv_rec for _grp_rec, members in items for indv_rec, _kinds in members])
+    )
+    groups = env["res.partner"].sudo().create([grp_rec for grp_rec, _members in items])
+
+    membership_recs = []
+    individual_ids = iter(individuals.ids)
+    for grp_id, (_grp_rec, members) in zip(groups.ids, items, strict=True):
+        for _indv_rec, kinds in members:
+            membership_recs.append({"group": grp_id, "individual": next(individual_ids), "kind": kinds})
+    env["g2p.group.membership"].sudo().create(membership_recs)
+    return groups.ids
+
+
+def _get_batch_error(index, error):
+    return GroupBatchItemResponse(index=index, status="failed", error=G2PErrorResponse.from_exception(error))
+
+
 def _get_group(env: Environment, _id: int):
     return (
         env["res.partner"]
@@ -1,7 +1,9 @@
 import logging
-from typing import Annotated
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
 
 from odoo.api import Environment
 
@@ -9,25 +11,77 @@ from odoo.addons.fastapi.dependencies import authenticated_partner_env
 
 from ..exceptions.base_exception import G2PApiValidationError
 from ..exceptions.error_codes import G2PErrorCodes
+from ..models.process_individual_mixin import REFERENCES_CONTEXT_KEY
+from ..schemas.error_response import G2PErrorResponse
 from ..schemas.individual import (
+    IndividualBatchItemResponse,
+    IndividualBatchResponse,
     IndividualInfoRequest,
     IndividualInfoResponse,
     UpdateIndividualInfoRequest,
     UpdateIndividualInfoResponse,
 )
+from .conditional import get_not_modified_response
+from .export import (
+    VALUE_CHUNK_SIZE,
+    export_response,
+    format_values,
+    get_export_domain,
+    get_media_type,
+    streaming_response,
+)
+from .pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    get_response_model,
+    search_page,
+    set_page_headers,
+)
+from .thread_pool import limit_thread_pool
 
 _logger = logging.getLogger(__name__)
 
-individual_router = APIRouter(tags=["individual"])
+individual_router = APIRouter(tags=["individual"], dependencies=[Depends(limit_thread_pool)])
+
+
+@individual_router.get(
+    "/individual/export",
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+def export_individuals(
+    env: Annotated[Environment, Depends(authenticated_partner_env)],
+    updated_since: datetime | None = None,
+):
+    """
+    Export the individuals as newline-delimited JSON
+
+    ``updated_since`` only exports the individuals updated since then, with their IDs or phone
+    numbers, for incremental sync.
+    """
+    domain = get_export_domain([("is_registrant", "=", True), ("is_group", "=", False)], updated_since)
+    return export_response(env, domain, IndividualInfoResponse)
 
 
 @individual_router.get("/individual/{_id}", responses={200: {"model": IndividualInfoResponse}})
-async def get_individual(_id, env: Annotated[Environment, Depends(authenticated_partner_env)]):
+def get_individual(
+    _id,
+    env: Annotated[Environment, Depends(authenticated_partner_env)],
+    http_request: Request,
+    response: Response,
+):
     """
     Get partner's information by ID
+
+    The response has an ETag header. When it is sent back in If-None-Match and the individual
+    has not changed, 304 Not Modified is returned without a body.
     """
+    etag, not_modified_response = get_not_modified_response(env, http_request, _id, is_group=False)
+    if not_modified_response:
+        return not_modified_response
     partner = _get_individual(env, _id)
     if partner:
+        if etag:
+            response.headers["ETag"] = etag
         return IndividualInfoResponse.model_validate(partner)
     else:
         raise G2PApiValidationError(
@@ -42,11 +96,20 @@ async def get_individual(_id, env: Annotated[Environment, Depends(authenticated_
 )
 def search_individuals(
     env: Annotated[Environment, Depends(authenticated_partner_env)],
+    http_request: Request,
+    response: Response,
     _id: int | None = None,
     name: str | None = None,
-) -> list[IndividualInfoResponse]:
+    cursor: int | None = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    fields: str | None = None,
+):
     """
     Search for individuals by ID or name
+
+    Individuals are returned by pages in ascending ID order. When there are more, the cursor of
+    the next page is given in the X-Next-Cursor and Link headers. ``fields`` limits the response
+    to a comma separated list of fields.
     """
 
     domain = [("is_registrant", "=", True), ("is_group", "=", False)]
@@ -56,15 +119,17 @@ def search_individuals(
     if name:
         domain.append(("name", "like", name))
 
-    partners = env["res.partner"].sudo().search(domain)
-    if not partners:
+    response_model = get_response_model(IndividualInfoResponse, fields)
+    partners, next_cursor = search_page(env, domain, cursor, limit)
+    if not partners and not cursor:
         error_message = "The specified criteria did not match any records."
         raise G2PApiValidationError(
             error_message=error_message,
             error_code=G2PErrorCodes.G2P_REQ_010.get_error_code(),
         )
 
-    return [IndividualInfoResponse.model_validate(partner) for partner in partners]
+    set_page_headers(http_request, response, next_cursor)
+    return response_model.model_validate_records(partners)
 
 
 @individual_router.post(
@@ -92,13 +157,23 @@ def create_individual(
     "/get_individual_ids",
     responses={200: {"model": list[str]}},
 )
-async def get_individual_ids(
+def get_individual_ids(
     env: Annotated[Environment, Depends(authenticated_partner_env)],
+    http_request: Request,
+    response: Response,
     include_id_type: str | None = "",
     exclude_id_type: str | None = "",
+    cursor: str | None = None,
+    limit: Annotated[int | None, Query(ge=1, le=VALUE_CHUNK_SIZE)] = None,
+    response_format: Annotated[Literal["json", "ndjson", "csv"], Query(alias="format")] = "json",
 ):
     """
     Get the IDs of an individual
+
+    Returns the distinct valid IDs of the included type held by active individuals that have no
+    ID of the excluded type, sorted by value, as a JSON list, newline-delimited JSON or CSV.
+    All the IDs are streamed, unless ``limit`` is given. Then one page is returned and the
+    cursor of the next page is given in the X-Next-Cursor and Link headers.
     """
 
     if not include_id_type:
@@ -106,25 +181,35 @@ async def get_individual_ids(
             error_message="Record is not present in the database.",
             error_code=G2PErrorCodes.G2P_REQ_010.get_error_code(),
         )
-    try:
-        domain = [("is_registrant", "=", True), ("is_group", "=", False), ("active", "=", True)]
-        if include_id_type:
-            domain.extend([("reg_ids.id_type", "=", include_id_type), ("reg_ids.status", "=", "valid")])
-
-        registrant_rec = env["res.partner"].sudo().search(domain)
 
-        all_ids = set()
+    if not limit:
 
-        for partner in registrant_rec:
-            has_exclude_id_type = any(reg_id.id_type.name == exclude_id_type for reg_id in partner.reg_ids)
-            if has_exclude_id_type:
-                continue
-            for reg_id in partner.reg_ids:
-                if reg_id.id_type.name == include_id_type:
-                    all_ids.add(reg_id.value)
+        def generate_chunks(export_env):
+            after = cursor
+            first = True
+            while True:
+                values = (
+                    export_env["g2p.reg.id"]
+                    .sudo()
+                    ._get_individual_values(
+                        include_id_type, exclude_id_type, after=after, limit=VALUE_CHUNK_SIZE
+                    )
+                )
+                last = len(values) < VALUE_CHUNK_SIZE
+                yield format_values(values, response_format, first=first, last=last)
+                if last:
+                    break
+                after = values[-1]
+                first = False
 
-        return list(all_ids)
+        return streaming_response(env, generate_chunks, get_media_type(response_format))
 
+    try:
+        values = (
+            env["g2p.reg.id"]
+            .sudo()
+            ._get_individual_values(include_id_type, exclude_id_type, after=cursor, limit=limit + 1)
+        )
     except Exception as e:
         _logger.exception("Error while getting IDs")
         raise G2PApiValidationError(
@@ -132,9 +217,22 @@ async def get_individual_ids(
             error_code=G2PErrorCodes.G2P_REQ_010.get_error_code(),
         ) from e
 
+    next_cursor = None
+    if len(values) > limit:
+        values = values[:limit]
+        next_cursor = values[-1]
+    if response_format != "json":
+        page_response = Response(
+            format_values(values, response_format), media_type=get_media_type(response_format)
+        )
+        set_page_headers(http_request, page_response, next_cursor)
+        return page_response
+    set_page_headers(http_request, response, next_cursor)
+    return values
+
 
 @individual_router.put("/update_individual", responses={200: {"model": UpdateIndividualInfoResponse}})
-async def update_individual(
+def update_individual(
     requests: list[UpdateIndividualInfoRequest],
     env: Annotated[Environment, Depends(authenticated_partner_env)],
     id_type: str | None = "",
@@ -142,61 +240,268 @@ async def update_individual(
     """
     Update an individual
     """
-    results = []
-
-    for request in requests:
-        try:
+    try:
+        mixin = env["process_individual.rest.mixin"]
+        id_type_id = mixin._resolve_reference("id_types", id_type) if id_type else None
+        partners = {}
+        if id_type_id:
+            partners = _get_individuals_by_reg_id(env, id_type_id, [request.updateId for request in requests])
+        mixin = mixin.with_context(**{REFERENCES_CONTEXT_KEY: mixin._get_references(requests)})
+
+        updates = []
+        for index, request in enumerate(requests):
             _logger.debug(f"Request data: {request}")
             _id = request.updateId
-            if _id and id_type:
-                partner_rec = (
-                    env["res.partner"]
-                    .sudo()
-                    .search(
-                        [
-                            ("reg_ids.value", "=", _id),
-                            ("reg_ids.id_type", "=", id_type),
-                            ("active", "=", True),
-                        ],
-                        limit=1,
-                    )
+            if not (_id and id_type):
+                _logger.error("ID & ID type is required for update individual")
+                raise G2PApiValidationError(
+                    error_message="ID is required for update individual",
+                    error_code=G2PErrorCodes.G2P_REQ_010.get_error_code(),
                 )
-                if not partner_rec:
-                    raise G2PApiValidationError(
-                        error_message=f"Individual with the given ID {_id} not found.",
-                        error_code=G2PErrorCodes.G2P_REQ_010.get_error_code(),
-                    )
+            partner_rec = partners.get(_id)
+            if not partner_rec:
+                raise G2PApiValidationError(
+                    error_message=f"Individual with the given ID {_id} not found.",
+                    error_code=G2PErrorCodes.G2P_REQ_010.get_error_code(),
+                )
+            indv_rec = mixin._process_individual(request)
+            updates.append((index, partner_rec, _get_update_values(partner_rec, indv_rec)))
 
-                # Update the individual
-                indv_rec = env["process_individual.rest.mixin"]._process_individual(request)
+        results = _write_individuals(env, updates)
+        for index in sorted(results):
+            error = results[index].error
+            if error:
+                raise G2PApiValidationError(
+                    error_message=error.errorDescription or error.errorMessage,
+                    error_code=G2PErrorCodes.G2P_REQ_010.get_error_code(),
+                )
 
-                for i in range(len(indv_rec.get("reg_ids", []) or [])):
-                    reg_id = indv_rec["reg_ids"][i]
-                    id_type_id = reg_id[2].get("id_type")
+    except Exception as e:
+        _logger.exception("Error occurred while updating the partner with ID")
+        raise G2PApiValidationError(
+            error_message=str(e),
+            error_code=G2PErrorCodes.G2P_REQ_010.get_error_code(),
+        ) from e
 
-                    id_rec = partner_rec.reg_ids.filtered(
-                        lambda x, id_type_id=id_type_id: x.id_type.id == id_type_id
-                    )
+    updated = env["res.partner"].sudo().browse(list(dict.fromkeys(partner.id for _i, partner, _v in updates)))
+    responses = {item.id: item for item in UpdateIndividualInfoResponse.model_validate_records(updated)}
+    return [responses[partner.id] for _index, partner, _indv_rec in updates if partner.id in responses]
 
-                    if id_rec:
-                        indv_rec["reg_ids"][i] = (1, id_rec.id, reg_id[2])
 
-                partner_rec.write(indv_rec)
-                results.append(UpdateIndividualInfoResponse.model_validate(partner_rec))
-            else:
-                _logger.error("ID & ID type is required for update individual")
+@individual_router.put("/individuals:batch", responses={200: {"model": IndividualBatchResponse}})
+def upsert_individuals(
+    requests: list[UpdateIndividualInfoRequest],
+    env: Annotated[Environment, Depends(authenticated_partner_env)],
+    id_type: str,
+):
+    """
+    Update many individuals, creating the ones that do not exist
+
+    Individuals are matched on their ID of the given type, which is the updateId of each item.
+    The result of every item is returned in the order of the request, so that failed items can
+    be sent again.
+    """
+    mixin = env["process_individual.rest.mixin"]
+    id_type_id = mixin._resolve_reference("id_types", id_type)
+    if not id_type_id:
+        raise G2PApiValidationError(
+            error_message=G2PErrorCodes.G2P_REQ_005.get_error_message(),
+            error_code=G2PErrorCodes.G2P_REQ_005.get_error_code(),
+            error_description=f"ID type - {id_type} is not present in the database.",
+        )
+    mixin = mixin.with_context(**{REFERENCES_CONTEXT_KEY: mixin._get_references(requests)})
+    partners = _get_individuals_by_reg_id(env, id_type_id, [request.updateId for request in requests])
+
+    results = {}
+    updates = []
+    creates = []
+    created_ids = set()
+    for index, request in enumerate(requests):
+        try:
+            if not request.updateId:
                 raise G2PApiValidationError(
                     error_message="ID is required for update individual",
                     error_code=G2PErrorCodes.G2P_REQ_010.get_error_code(),
                 )
-
+            indv_rec = mixin._process_individual(request)
+            partner = partners.get(request.updateId)
+            if partner:
+                updates.append((index, partner, _get_update_values(partner, indv_rec)))
+            elif request.updateId in created_ids:
+                raise G2PApiValidationError(
+                    error_message=G2PErrorCodes.G2P_REQ_014.get_error_message(),
+                    error_code=G2PErrorCodes.G2P_REQ_014.get_error_code(),
+                    error_description=f"The ID {request.updateId} is created by another item of the batch.",
+                )
+            else:
+                created_ids.add(request.updateId)
+                creates.append((index, _get_create_values(indv_rec, id_type_id, request.updateId)))
         except Exception as e:
-            _logger.exception("Error occurred while updating the partner with ID")
-            raise G2PApiValidationError(
-                error_message=str(e),
-                error_code=G2PErrorCodes.G2P_REQ_010.get_error_code(),
-            ) from e
+            results[index] = IndividualBatchItemResponse(
+                index=index, status="failed", error=G2PErrorResponse.from_exception(e)
+            )
+
+    results.update(_write_individuals(env, updates))
+    results.update(_create_individuals(env, creates))
+
+    counts = Counter(result.status for result in results.values())
+    return IndividualBatchResponse(
+        updated_count=counts["updated"],
+        created_count=counts["created"],
+        failed_count=counts["failed"],
+        results=[results[index] for index in sorted(results)],
+    )
+
 
+def _get_individuals_by_reg_id(env: Environment, id_type_id: int, values):
+    """
+    Find the active partners holding the IDs of a type with one query.
+
+    :return: The partners keyed by ID value.
+    :rtype: dict
+    """
+    reg_ids = (
+        env["g2p.reg.id"]
+        .sudo()
+        .search(
+            [
+                ("id_type", "=", id_type_id),
+                ("value", "in", [value for value in values if value]),
+                ("partner_id.active", "=", True),
+            ]
+        )
+    )
+    partners = {}
+    # The search is ordered by descending id, the oldest ID wins as with a search on the partners
+    for reg_id in reversed(reg_ids):
+        partners.setdefault(reg_id.value, reg_id.partner_id)
+    return partners
+
+
+def _get_update_values(partner, indv_rec):
+    """
+    Update the IDs of the partner that have the same type instead of adding new ones.
+    """
+    reg_ids = indv_rec.get("reg_ids") or []
+    for i, reg_id in enumerate(reg_ids):
+        id_type_id = reg_id[2].get("id_type")
+        id_rec = partner.reg_ids.filtered(lambda x, id_type_id=id_type_id: x.id_type.id == id_type_id)
+        if id_rec:
+            reg_ids[i] = (1, id_rec[0].id, reg_id[2])
+    return indv_rec
+
+
+def _get_create_values(indv_rec, id_type_id: int, value: str):
+    """
+    Add the matched ID to a new individual, so that it is updated by the next upserts.
+    """
+    reg_ids = indv_rec.setdefault("reg_ids", [])
+    if not any(reg_id[2].get("id_type") == id_type_id for reg_id in reg_ids):
+        reg_ids.append((0, 0, {"id_type": id_type_id, "value": value}))
+    return indv_rec
+
+
+def _write_individuals(env: Environment, updates):
+    """
+    Write the individuals, batching the items that update the same fields.
+
+    A batch that fails is written again one individual at a time, so that only the invalid
+    items fail.
+
+    :return: The result of each item keyed by index.
+    :rtype: dict
+    """
+    batches = defaultdict(list)
+    occurrences = Counter()
+    for index, partner, indv_rec in updates:
+        field_names = tuple(sorted(indv_rec))
+        # An individual updated by several items is written by a later batch for each item
+        key = (field_names, occurrences[(field_names, partner.id)])
+        occurrences[(field_names, partner.id)] += 1
+        batches[key].append((index, partner, indv_rec))
+
+    results = {}
+    for batch in batches.values():
+        try:
+            with env.cr.savepoint():
+                _write_individual_batch(env, batch)
+        except Exception:
+            _logger.info(
+                "Individual Batch Api: Batch update failed, updating %s items one by one", len(batch)
+            )
+            for index, partner, indv_rec in batch:
+                try:
+                    with env.cr.savepoint():
+                        partner.write(indv_rec)
+                    results[index] = IndividualBatchItemResponse(index=index, status="updated", id=partner.id)
+                except Exception as e:
+                    results[index] = IndividualBatchItemResponse(
+                        index=index, status="failed", error=G2PErrorResponse.from_exception(e)
+                    )
+        else:
+            for index, partner, _indv_rec in batch:
+                results[index] = IndividualBatchItemResponse(index=index, status="updated", id=partner.id)
+    return results
+
+
+def _write_individual_batch(env: Environment, batch):
+    """
+    Write items updating the same fields of distinct individuals.
+
+    A value shared by several items, such as the gender or the registrant flags, is written
+    with one write for all of them. The other values, such as the names and the ID commands,
+    are written with one write per item.
+    """
+    partners = env["res.partner"].sudo()
+    item_values = [{} for _item in batch]
+    for field_name in batch[0][2]:
+        # Values are grouped by their representation, which is hashable whatever the value
+        positions = {}
+        if partners._fields[field_name].type not in ("one2many", "many2many"):
+            for position, (_index, _partner, indv_rec) in enumerate(batch):
+                value = indv_rec[field_name]
+                positions.setdefault(repr(value), (value, []))[1].append(position)
+        else:
+            for position, (_index, _partner, indv_rec) in enumerate(batch):
+                item_values[position][field_name] = indv_rec[field_name]
+        for value, value_positions in positions.values():
+            if len(value_positions) == 1:
+                item_values[value_positions[0]][field_name] = value
+            else:
+                partners.concat(*(batch[position][1] for position in value_positions)).write(
+                    {field_name: value}
+                )
+    for (_index, partner, _indv_rec), values in zip(batch, item_values, strict=True):
+        if values:
+            partner.write(values)
+
+
+def _create_individuals(env: Environment, creates):
+    """
+    Create the individuals with one create, one at a time when it fails.
+
+    :return: The result of each item keyed by index.
+    :rtype: dict
+    """
+    results = {}
+    try:
+        with env.cr.savepoint():
+            partners = env["res.partner"].sudo().create([indv_rec for _index, indv_rec in creates])
+        for (index, _indv_rec), partner_id in zip(creates, partners.ids, strict=True):
+            results[index] = IndividualBatchItemResponse(index=index, status="created", id=partner_id)
+    except Exception:
+        _logger.info(
+            "Individual Batch Api: Batch creation failed, creating %s items one by one", len(creates)
+        )
+        for index, indv_rec in creates:
+            try:
+                with env.cr.savepoint():
+                    partner = env["res.partner"].sudo().create(indv_rec)
+                results[index] = IndividualBatchItemResponse(index=index, status="created", id=partner.id)
+            except Exception as e:
+                results[index] = IndividualBatchItemResponse(
+                    index=index, status="failed", error=G2PErrorResponse.from_exception(e)
+                )
     return results
 
 
@@ -0,0 +1,55 @@
+from fastapi import Request, Response
+
+from odoo.api import Environment
+
+from ..exceptions.base_exception import G2PApiValidationError
+from ..exceptions.error_codes import G2PErrorCodes
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def search_page(env: Environment, domain, cursor: int | None, limit: int, model: str = "res.partner"):
+    """
+    Search one page of records after the cursor, in ascending id order.
+
+    :return: The records of the page and the cursor of the next page, None on the last page.
+    :rtype: tuple
+    """
+    if cursor:
+        domain = domain + [("id", ">", cursor)]
+    records = env[model].sudo().search(domain, limit=limit + 1, order="id")
+    if len(records) > limit:
+        records = records[:limit]
+        return records, records[-1].id
+    return records, None
+
+
+def set_page_headers(http_request: Request, response: Response, next_cursor: int | str | None):
+    """
+    Advertise the next page in the X-Next-Cursor and Link headers.
+    """
+    if next_cursor is not None:
+        next_url = http_request.url.include_query_params(cursor=next_cursor)
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+
+
+def get_response_model(response_model, fields: str | None):
+    """
+    Get the response model limited to the comma separated fields, or the full one without fields.
+    """
+    if not fields:
+        return response_model
+    field_names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown_fields = field_names - set(response_model.model_fields)
+    if unknown_fields:
+        raise G2PApiValidationError(
+            error_message=G2PErrorCodes.G2P_REQ_015.get_error_message(),
+            error_code=G2PErrorCodes.G2P_REQ_015.get_error_code(),
+            error_description=f"Unknown fields: {', '.join(sorted(unknown_fields))}.",
+        )
+    # The id is kept for the cursor of the next page
+    return response_model.get_projection(
+        frozenset(field_names | ({"id"} & response_model.model_fields.keys()))
+    )
@@ -0,0 +1,38 @@
+import logging
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+
+def get_json_response_class(use_orjson: bool):
+    """
+    Get the class of the JSON responses, serialized with orjson when enabled and installed.
+    """
+    if use_orjson:
+        if orjson is not None:
+            return ORJSONResponse
+        _logger.warning("OpenG2P Registry: orjson is not installed, the standard JSON encoder is used.")
+    return JSONResponse
+
+
+def add_compression_middleware(app, minimum_size: int):
+    """
+    Compress the responses larger than the minimum size, in brotli when the client accepts it and
+    brotli-asgi is installed, in gzip otherwise.
+    """
+    if BrotliMiddleware is not None:
+        app.add_middleware(BrotliMiddleware, minimum_size=minimum_size, gzip_fallback=True)
+    else:
+        app.add_middleware(GZipMiddleware, minimum_size=minimum_size)
@@ -0,0 +1,55 @@
+from typing import Annotated
+
+from anyio import CapacityLimiter
+from fastapi import APIRouter, Depends, FastAPI, Request
+
+from odoo.api import Environment
+
+from odoo.addons.fastapi.dependencies import authenticated_partner_env
+
+from ..schemas.thread_pool import ThreadPoolMetrics
+
+thread_pool_router = APIRouter(tags=["thread pool"])
+
+
+def get_thread_limiter(app: FastAPI) -> CapacityLimiter:
+    """
+    Get the limiter bounding the requests of an endpoint that run ORM work at once.
+
+    Each endpoint has its own limiter, sized by its thread pool size, so that the bound of an
+    endpoint does not depend on the others. It is created on the first request, in the event
+    loop running the endpoint.
+    """
+    limiter = getattr(app.state, "thread_limiter", None)
+    if limiter is None:
+        limiter = app.state.thread_limiter = CapacityLimiter(app.state.thread_pool_size)
+    return limiter
+
+
+async def limit_thread_pool(request: Request):
+    """
+    Run the ORM work of the request within the limiter of its endpoint.
+
+    Endpoints using the ORM are declared with ``def``, so that they run in a worker thread
+    instead of blocking the event loop, and each of them uses the cursor of its own request.
+    A request takes a token of the limiter before its handler runs and gives it back after,
+    so that the requests running at once stay within the database connections of the worker,
+    and the others are queued.
+    """
+    async with get_thread_limiter(request.app):
+        yield
+
+
+@thread_pool_router.get("/thread_pool", responses={200: {"model": ThreadPoolMetrics}})
+async def get_thread_pool_metrics(
+    request: Request, env: Annotated[Environment, Depends(authenticated_partner_env)]
+):
+    """
+    Get the size and the queue of the thread pool running the ORM work of the endpoint
+    """
+    limiter = get_thread_limiter(request.app)
+    return ThreadPoolMetrics(
+        size=int(limiter.total_tokens),
+        busy_threads=limiter.borrowed_tokens,
+        waiting_tasks=limiter.statistics().tasks_waiting,
+    )
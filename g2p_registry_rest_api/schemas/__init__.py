@@ -5,3 +5,4 @@ from . import group
 from . import individual
 from . import group_membership
 from . import error_response
+from . import thread_pool
@@ -1,3 +1,5 @@
+from ..exceptions.base_exception import G2PApiValidationError
+from ..exceptions.error_codes import G2PErrorCodes
 from .naive_orm_model import NaiveOrmModel
 
 
@@ -5,3 +7,20 @@ class G2PErrorResponse(NaiveOrmModel):
     errorCode: str
     errorMessage: str
     errorDescription: str | None
+
+    @classmethod
+    def from_exception(cls, error):
+        """
+        Get the error response of a batch item, G2P-REQ-014 when the error is not an API error.
+        """
+        if isinstance(error, G2PApiValidationError):
+            return cls(
+                errorCode=error.error_code,
+                errorMessage=error.error_message,
+                errorDescription=error.error_description,
+            )
+        return cls(
+            errorCode=G2PErrorCodes.G2P_REQ_014.get_error_code(),
+            errorMessage=G2PErrorCodes.G2P_REQ_014.get_error_message(),
+            errorDescription=str(error),
+        )
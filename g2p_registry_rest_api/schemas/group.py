@@ -1,6 +1,8 @@
 import pydantic
 
+from .error_response import G2PErrorResponse
 from .group_membership import GroupMembersInfoRequest, GroupMembersInfoResponse
+from .naive_orm_model import NaiveOrmModel
 from .registrant import RegistrantInfoRequest, RegistrantInfoResponse
 
 
@@ -20,3 +22,20 @@ class GroupInfoRequest(RegistrantInfoRequest):
     members: list[GroupMembersInfoRequest]
     kind: str | None
     is_partial_group: bool | None
+
+
+class GroupBatchRequest(NaiveOrmModel):
+    groups: list[GroupInfoRequest]
+
+
+class GroupBatchItemResponse(NaiveOrmModel):
+    index: int
+    status: str = pydantic.Field(..., description="created or failed")
+    id: int | None = None
+    error: G2PErrorResponse | None = None
+
+
+class GroupBatchResponse(NaiveOrmModel):
+    created_count: int
+    failed_count: int
+    results: list[GroupBatchItemResponse]
@@ -17,6 +17,22 @@ class GroupMembersInfoResponse(NaiveOrmModel):
     write_date: datetime = None
 
 
+class GroupMemberIndividualShortInfo(NaiveOrmModel):
+    id: int
+    name: str
+    gender: str | None = None
+    birthdate: date | None = None
+
+
+class GroupMemberShortInfoResponse(NaiveOrmModel):
+    id: int
+    individual: GroupMemberIndividualShortInfo
+    kind: list[GroupMembershipKindInfo] | None = None
+    start_date: datetime | None = None
+    ended_date: datetime | None = None
+    is_ended: bool
+
+
 class GroupMembersInfoRequest(NaiveOrmModel):
     name: str
     given_name: str = None
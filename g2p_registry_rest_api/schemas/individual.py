@@ -2,6 +2,8 @@ from datetime import date, datetime
 
 from pydantic import Field, field_validator
 
+from .error_response import G2PErrorResponse
+from .naive_orm_model import NaiveOrmModel
 from .registrant import RegistrantInfoRequest, RegistrantInfoResponse
 
 
@@ -53,3 +55,17 @@ class UpdateIndividualInfoResponse(IndividualInfoResponse):
     given_name: str | None = None
     name: str | None = None
     family_name: str | None = None
+
+
+class IndividualBatchItemResponse(NaiveOrmModel):
+    index: int
+    status: str = Field(..., description="updated, created or failed")
+    id: int | None = None
+    error: G2PErrorResponse | None = None
+
+
+class IndividualBatchResponse(NaiveOrmModel):
+    updated_count: int
+    created_count: int
+    failed_count: int
+    results: list[IndividualBatchItemResponse]
@@ -1,10 +1,140 @@
+import functools
+import typing
 from typing import Any
 
 from extendable_pydantic import ExtendableModelMeta
-from pydantic import BaseModel, ConfigDict, model_validator
+from pydantic import BaseModel, ConfigDict, create_model, field_validator, model_validator
 
 from odoo import fields, models
 
+# Projections are built from the fields requested by the clients, the cache is bounded
+PROJECTION_CACHE_SIZE = 256
+
+
+def _get_odoo_field_names(cls, records):
+    """
+    Get the Odoo fields read for the model fields, as ``(key, field name, model field)``.
+
+    A model field reads the Odoo field named by its alias when there is one, and the values
+    are keyed by the alias so that the model validates them.
+    """
+    res = []
+    for key, model_field in cls.model_fields.items():
+        field_name = model_field.alias or key
+        if field_name not in records._fields:
+            field_name = key
+        if field_name in records._fields:
+            res.append((model_field.alias or key, field_name, model_field))
+    return res
+
+
+def _get_nested_model(annotation):
+    """
+    Get the ORM model in an annotation such as ``list[Model] | None``, None if there is none.
+    """
+    if typing.get_origin(annotation) is None and isinstance(annotation, type):
+        if issubclass(annotation, NaiveOrmModel | ProjectionOrmModel):
+            return annotation
+        return None
+    for arg in typing.get_args(annotation):
+        nested_model = _get_nested_model(arg)
+        if nested_model:
+            return nested_model
+    return None
+
+
+def _convert_value(obj, field, res):
+    if res is False and field.type != "boolean":
+        res = None
+    if field.type == "datetime" and res:
+        # Get the timestamp converted to the client's timezone.
+        # This call also add the tzinfo into the datetime object
+        res = fields.Datetime.context_timestamp(obj, res)
+    return res
+
+
+def parse_odoo_obj(cls, obj: Any) -> Any:
+    if isinstance(obj, models.BaseModel):
+        output_obj = {}
+        for key, field_name, _model_field in _get_odoo_field_names(cls, obj):
+            res = getattr(obj, field_name)
+            field = obj._fields[field_name]
+            if field.type == "many2one" and not res:
+                res = None
+            elif field.type in ["one2many", "many2many"]:
+                res = list(res)
+            else:
+                res = _convert_value(obj, field, res)
+
+            output_obj[key] = res
+
+        return output_obj
+    return obj
+
+
+def serialize_odoo_records(cls, records):
+    """
+    Get the values of the records to validate with the model, one dict per record.
+
+    The fields of all the records are read with one ``read()``. The children of each
+    relational field are gathered for all the records and serialized together, so the
+    number of queries does not grow with the number of records.
+
+    :rtype: list
+    """
+    return list(_serialize_odoo_records(cls, records).values())
+
+
+def _serialize_odoo_records(cls, records):
+    """
+    Get the values of the records keyed by id, in the order of the records.
+
+    The records deleted since they were searched are left out.
+
+    :rtype: dict
+    """
+    if not records:
+        return {}
+    plan = _get_odoo_field_names(cls, records)
+    rows = {row["id"]: row for row in records.read([field_name for _key, field_name, _mf in plan], load=None)}
+
+    children = {}
+    for _key, field_name, model_field in plan:
+        field = records._fields[field_name]
+        if not field.relational:
+            continue
+        child_ids = set()
+        for row in rows.values():
+            value = row[field_name]
+            if field.type == "many2one":
+                value = [value] if value else []
+            child_ids.update(value)
+        child_records = records.env[field.comodel_name].browse(sorted(child_ids))
+        nested_model = _get_nested_model(model_field.annotation)
+        if nested_model:
+            children[field_name] = _serialize_odoo_records(nested_model, child_records)
+        else:
+            children[field_name] = {child.id: child for child in child_records.exists()}
+
+    output = {}
+    for record in records:
+        row = rows.get(record.id)
+        if row is None:
+            continue
+        output_obj = {}
+        for key, field_name, _model_field in plan:
+            field = records._fields[field_name]
+            res = row[field_name]
+            if field.type == "many2one":
+                res = children[field_name].get(res) if res else None
+            elif field.relational:
+                res = [children[field_name][child_id] for child_id in res if child_id in children[field_name]]
+            else:
+                res = _convert_value(record, field, res)
+            output_obj[key] = res
+        output[record.id] = output_obj
+    return output
+
 
 class NaiveOrmModel(BaseModel, metaclass=ExtendableModelMeta):
     model_config = ConfigDict(from_attributes=True)
@@ -12,28 +142,60 @@ class NaiveOrmModel(BaseModel, metaclass=ExtendableModelMeta):
     @model_validator(mode="before")
     @classmethod
     def parse_odoo_obj(cls, obj: Any) -> Any:
-        if isinstance(obj, models.BaseModel):
-            output_obj = {}
-            for key in cls.model_fields.keys():
-                if key in obj._fields:
-                    res = getattr(obj, key)
-                    field = obj._fields[key]
-                    if res is False and field.type != "boolean":
-                        res = None
-                    if field.type == "date" and not res:
-                        res = None
-                    if field.type == "datetime":
-                        if not res:
-                            res = None
-                        # Get the timestamp converted to the client's timezone.
-                        # This call also add the tzinfo into the datetime object
-                        res = fields.Datetime.context_timestamp(obj, res)
-                    if field.type == "many2one" and not res:
-                        res = None
-                    if field.type in ["one2many", "many2many"]:
-                        res = list(res)
-
-                    output_obj[key] = res
-
-            return output_obj
-        return obj
+        return parse_odoo_obj(cls, obj)
+
+    @classmethod
+    def model_validate_records(cls, records):
+        """
+        Validate a whole recordset, reading it in bulk.
+
+        :return: One model per record, in the order of the recordset, without the deleted records.
+        :rtype: list
+        """
+        return [cls.model_validate(values) for values in serialize_odoo_records(cls, records)]
+
+    @classmethod
+    def get_projection(cls, field_names):
+        """
+        Get a model with only some of the fields of this one.
+
+        Only the fields of the projection are read from the Odoo records it validates.
+
+        :param field_names: The names of the fields to keep.
+        :type field_names: frozenset
+        """
+        unknown_fields = field_names - cls.model_fields.keys()
+        if unknown_fields:
+            raise ValueError(f"Unknown fields of {cls.__name__}: {', '.join(sorted(unknown_fields))}")
+        return _get_projection(cls, frozenset(field_names))
+
+
+class ProjectionOrmModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    @model_validator(mode="before")
+    @classmethod
+    def parse_odoo_obj(cls, obj: Any) -> Any:
+        return parse_odoo_obj(cls, obj)
+
+    @classmethod
+    def model_validate_records(cls, records):
+        return [cls.model_validate(values) for values in serialize_odoo_records(cls, records)]
+
+
+@functools.lru_cache(maxsize=PROJECTION_CACHE_SIZE)
+def _get_projection(cls, field_names):
+    # Keep the field validators of the model for the fields of the projection
+    validators = {}
+    for name, decorator in cls.__pydantic_decorators__.field_validators.items():
+        validated = [field for field in decorator.info.fields if field in field_names]
+        if validated:
+            validators[name] = field_validator(*validated, mode=decorator.info.mode)(decorator.func)
+    return create_model(
+        f"{cls.__name__}Projection",
+        __base__=ProjectionOrmModel,
+        __validators__=validators,
+        **{
+            name: (field.annotation, field) for name, field in cls.model_fields.items() if name in field_names
+        },
+    )
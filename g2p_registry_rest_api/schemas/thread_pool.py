@@ -0,0 +1,9 @@
+from pydantic import Field
+
+from .naive_orm_model import NaiveOrmModel
+
+
+class ThreadPoolMetrics(NaiveOrmModel):
+    size: int = Field(..., description="Maximum number of requests running ORM work at once")
+    busy_threads: int = Field(..., description="Requests running ORM work")
+    waiting_tasks: int = Field(..., description="Requests queued for a thread")
@@ -0,0 +1,4 @@
+from . import test_endpoint_api
+from . import test_export_api
+from . import test_group_api
+from . import test_individual_api
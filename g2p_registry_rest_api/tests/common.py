@@ -0,0 +1,86 @@
+import asyncio
+import base64
+import json
+from urllib.parse import urlencode
+
+from odoo import Command
+from odoo.tests.common import HttpCase
+
+API_ROOT_PATH = "/api/v1/registry"
+
+
+class RegistryAPITestCase(HttpCase):
+    def setUp(self):
+        super().setUp()
+        self.fastapi_endpoint = self.env.ref("g2p_registry_rest_api.fastapi_endpoint_registry")
+        self.id_type = self.env["g2p.id.type"].create({"name": "REST API Test ID"})
+        self.head_kind = self.env.ref("g2p_registry_membership.group_membership_kind_head")
+        self.auth_headers = {"authorization": "Basic " + base64.b64encode(b"admin:admin").decode()}
+
+    def api_open(self, path, params=None, payload=None, method=None, headers=None):
+        """
+        Call the registry API as the admin user.
+
+        The changes of the test are flushed before the call, and the cache is invalidated after
+        it, so that the API and the test see the same records.
+        """
+        url = API_ROOT_PATH + path
+        if params:
+            url += "?" + urlencode(params)
+        headers = dict(self.auth_headers, **(headers or {}))
+        data = None
+        if payload is not None:
+            data = json.dumps(payload)
+            headers["content-type"] = "application/json"
+        self.env.flush_all()
+        if method == "PUT":
+            res = self.opener.put(self.base_url() + url, data=data, headers=headers, timeout=12)
+        else:
+            res = self.url_open(url, data=data, headers=headers)
+        self.env.invalidate_all()
+        return res
+
+    def read_stream(self, response):
+        """
+        Read the body of a streaming response returned by a route.
+
+        Streams are read from their own cursor, which waits in tests for the cursor of the HTTP
+        request to be released, so they are read by calling the routes instead.
+        """
+
+        async def read_body():
+            return [chunk async for chunk in response.body_iterator]
+
+        self.env.flush_all()
+        chunks = asyncio.run(read_body())
+        self.env.invalidate_all()
+        return "".join(chunk.decode() if isinstance(chunk, bytes) else chunk for chunk in chunks)
+
+    def create_individual(self, name, id_values=(), **values):
+        return self.env["res.partner"].create(
+            {
+                "name": name,
+                "given_name": name,
+                "is_registrant": True,
+                "is_group": False,
+                "reg_ids": [
+                    Command.create({"id_type": self.id_type.id, "value": value}) for value in id_values
+                ],
+                **values,
+            }
+        )
+
+    def create_group(self, name, members=(), **values):
+        """
+        Create a group with memberships of the ``(individual, kinds)`` members.
+        """
+        group = self.env["res.partner"].create(
+            {"name": name, "is_registrant": True, "is_group": True, **values}
+        )
+        self.env["g2p.group.membership"].create(
+            [
+                {"group": group.id, "individual": individual.id, "kind": [Command.set(kinds.ids)]}
+                for individual, kinds in members
+            ]
+        )
+        return group
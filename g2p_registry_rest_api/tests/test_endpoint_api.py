@@ -0,0 +1,72 @@
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from odoo.tests import tagged
+
+from ..routers.responses import get_json_response_class, orjson
+from .common import RegistryAPITestCase
+
+
+@tagged("-at_install", "post_install")
+class TestRegistryEndpoint(RegistryAPITestCase):
+    def set_endpoint_values(self, values):
+        """
+        Change the endpoint for the test, restoring it after as the apps are kept by the workers.
+        """
+        original_values = {field_name: self.fastapi_endpoint[field_name] for field_name in values}
+        self.fastapi_endpoint.write(values)
+        self.addCleanup(self.fastapi_endpoint.write, original_values)
+
+    def test_01_thread_pool(self):
+        individual = self.create_individual("REST API Thread Pool")
+
+        res = self.api_open("/thread_pool")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            res.json(),
+            {"size": self.fastapi_endpoint.thread_pool_size, "busy_threads": 0, "waiting_tasks": 0},
+        )
+
+        self.set_endpoint_values({"thread_pool_size": 2})
+        res = self.api_open(f"/individual/{individual.id}")
+        self.assertEqual(res.status_code, 200)
+        # The request gave its token back to the limiter of the endpoint
+        res = self.api_open("/thread_pool")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {"size": 2, "busy_threads": 0, "waiting_tasks": 0})
+
+    def test_02_orjson_response(self):
+        individual = self.create_individual("REST API orjson", id_values=["J-1"])
+        res = self.api_open(f"/individual/{individual.id}")
+        self.assertEqual(res.status_code, 200)
+        expected = res.json()
+
+        self.set_endpoint_values({"orjson_response": True})
+        res = self.api_open(f"/individual/{individual.id}")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.headers["content-type"], "application/json")
+        self.assertEqual(res.json(), expected)
+
+        self.assertIs(get_json_response_class(False), JSONResponse)
+        # The standard encoder is kept when orjson is not installed
+        self.assertIs(get_json_response_class(True), ORJSONResponse if orjson else JSONResponse)
+
+    def test_03_compression(self):
+        individual = self.create_individual("REST API Compression", id_values=["C-1"])
+        headers = {"accept-encoding": "gzip"}
+        res = self.api_open(f"/individual/{individual.id}", headers=headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn("content-encoding", res.headers)
+        expected = res.json()
+
+        self.set_endpoint_values({"compression_min_size": 1})
+        res = self.api_open(f"/individual/{individual.id}", headers=headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.headers["content-encoding"], "gzip")
+        self.assertEqual(res.json(), expected)
+
+        # Responses smaller than the minimum size are not compressed
+        self.fastapi_endpoint.write({"compression_min_size": 1000000})
+        res = self.api_open(f"/individual/{individual.id}", headers=headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn("content-encoding", res.headers)
+        self.assertEqual(res.json(), expected)
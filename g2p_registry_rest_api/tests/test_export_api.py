@@ -0,0 +1,102 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from odoo import Command
+from odoo.tests import tagged
+
+from ..routers.group import export_groups
+from ..routers.individual import export_individuals
+from .common import RegistryAPITestCase
+
+OLD_WRITE_DATE = datetime(2010, 1, 1)
+# 2020-01-01 00:00:00 UTC
+UPDATED_SINCE = datetime(2020, 1, 1, 2, tzinfo=timezone(timedelta(hours=2)))
+
+
+@tagged("-at_install", "post_install")
+class TestExportAPI(RegistryAPITestCase):
+    def read_export(self, response):
+        self.assertEqual(response.media_type, "application/x-ndjson")
+        return {item["id"]: item for item in map(json.loads, self.read_stream(response).splitlines())}
+
+    def set_write_date(self, records, write_date):
+        self.env.flush_all()
+        self.env.cr.execute(
+            f'UPDATE "{records._table}" SET "write_date" = %s WHERE "id" = ANY(%s)',
+            (write_date, records.ids),
+        )
+        self.env.invalidate_all()
+
+    def test_01_export_individuals(self):
+        individual = self.create_individual(
+            "REST API Export Individual",
+            id_values=["E-1"],
+            phone_number_ids=[Command.create({"phone_no": "+919876543210"})],
+        )
+        group = self.create_group("REST API Export Group")
+
+        items = self.read_export(export_individuals(env=self.env))
+        self.assertNotIn(group.id, items)
+        item = items[individual.id]
+        self.assertEqual(item["name"], "REST API Export Individual")
+        self.assertEqual([reg_id["value"] for reg_id in item["reg_ids"]], ["E-1"])
+        self.assertEqual([phone["phone_no"] for phone in item["phone_number_ids"]], ["+919876543210"])
+
+    def test_02_export_individuals_updated_since(self):
+        individual_1 = self.create_individual("REST API Export 1", id_values=["E-1"])
+        individual_2 = self.create_individual(
+            "REST API Export 2",
+            id_values=["E-2"],
+            phone_number_ids=[Command.create({"phone_no": "+919876543210"})],
+        )
+        individuals = individual_1 | individual_2
+        self.set_write_date(individuals, OLD_WRITE_DATE)
+        self.set_write_date(individuals.reg_ids, OLD_WRITE_DATE)
+        self.set_write_date(individuals.phone_number_ids, OLD_WRITE_DATE)
+
+        items = self.read_export(export_individuals(env=self.env, updated_since=UPDATED_SINCE))
+        self.assertFalse(set(individuals.ids) & set(items))
+
+        items = self.read_export(export_individuals(env=self.env))
+        self.assertTrue(set(individuals.ids) <= set(items))
+
+        self.set_write_date(individual_1.reg_ids, datetime.now())
+        items = self.read_export(export_individuals(env=self.env, updated_since=UPDATED_SINCE))
+        self.assertEqual(set(individuals.ids) & set(items), {individual_1.id})
+
+        self.set_write_date(individual_1.reg_ids, OLD_WRITE_DATE)
+        self.set_write_date(individual_2.phone_number_ids, datetime.now())
+        items = self.read_export(export_individuals(env=self.env, updated_since=UPDATED_SINCE))
+        self.assertEqual(set(individuals.ids) & set(items), {individual_2.id})
+
+        self.set_write_date(individual_1, datetime.now())
+        items = self.read_export(export_individuals(env=self.env, updated_since=UPDATED_SINCE))
+        self.assertEqual(set(individuals.ids) & set(items), set(individuals.ids))
+
+    def test_03_export_groups_updated_since(self):
+        member = self.create_individual("REST API Export Member", id_values=["EM-1"])
+        group = self.create_group("REST API Export Group", [(member, self.head_kind)])
+
+        items = self.read_export(export_groups(env=self.env))
+        self.assertNotIn(member.id, items)
+        self.assertNotIn("group_membership_ids", items[group.id])
+        items = self.read_export(export_groups(env=self.env, include_members_full=True))
+        self.assertEqual(
+            [item["individual"]["id"] for item in items[group.id]["group_membership_ids"]], member.ids
+        )
+
+        self.set_write_date(group | member, OLD_WRITE_DATE)
+        self.set_write_date(member.reg_ids, OLD_WRITE_DATE)
+        self.set_write_date(group.group_membership_ids, OLD_WRITE_DATE)
+        items = self.read_export(export_groups(env=self.env, updated_since=UPDATED_SINCE))
+        self.assertNotIn(group.id, items)
+
+        # The groups are exported when their members change, as these are in the payload
+        self.set_write_date(member.reg_ids, datetime.now())
+        items = self.read_export(export_groups(env=self.env, updated_since=UPDATED_SINCE))
+        self.assertIn(group.id, items)
+
+        self.set_write_date(member.reg_ids, OLD_WRITE_DATE)
+        self.set_write_date(group.group_membership_ids, datetime.now())
+        items = self.read_export(export_groups(env=self.env, updated_since=UPDATED_SINCE))
+        self.assertIn(group.id, items)
@@ -0,0 +1,196 @@
+from datetime import datetime, timedelta
+
+from odoo.tests import tagged
+
+from .common import RegistryAPITestCase
+
+
+@tagged("-at_install", "post_install")
+class TestGroupAPI(RegistryAPITestCase):
+    def get_group_payload(self, name, members, **values):
+        return {
+            "name": name,
+            "ids": [],
+            "kind": None,
+            "is_partial_group": False,
+            "members": [
+                {
+                    "name": member_name,
+                    "given_name": member_name,
+                    "email": None,
+                    "address": None,
+                    "gender": None,
+                    "birth_place": None,
+                    "kind": [{"name": kind} for kind in kinds],
+                }
+                for member_name, kinds in members
+            ],
+            **values,
+        }
+
+    def test_01_create_groups_batch(self):
+        res = self.api_open(
+            "/groups:batch",
+            payload={
+                "groups": [
+                    self.get_group_payload(
+                        "REST API Batch Group 1",
+                        [("REST API Batch Head 1", ["Head"]), ("REST API Batch Member 1", [])],
+                    ),
+                    self.get_group_payload(
+                        "REST API Batch Group 2", [("REST API Batch Member 2", ["Unknown Kind"])]
+                    ),
+                    self.get_group_payload("REST API Batch Group 3", [("REST API Batch Head 3", ["Head"])]),
+                ]
+            },
+        )
+        self.assertEqual(res.status_code, 200)
+        data = res.json()
+        self.assertEqual(data["created_count"], 2)
+        self.assertEqual(data["failed_count"], 1)
+        self.assertEqual([result["index"] for result in data["results"]], [0, 1, 2])
+        self.assertEqual([result["status"] for result in data["results"]], ["created", "failed", "created"])
+        self.assertEqual(data["results"][1]["error"]["errorCode"], "G2P-REQ-004")
+
+        group = self.env["res.partner"].browse(data["results"][0]["id"])
+        self.assertEqual(group.name, "REST API Batch Group 1")
+        self.assertTrue(group.is_group)
+        self.assertEqual(
+            sorted(group.group_membership_ids.mapped("individual.name")),
+            ["REST API Batch Head 1", "REST API Batch Member 1"],
+        )
+        head = group.group_membership_ids.filtered(lambda membership: membership.kind)
+        self.assertEqual(head.individual.name, "REST API Batch Head 1")
+        self.assertEqual(head.kind, self.head_kind)
+        self.assertEqual(
+            self.env["res.partner"].browse(data["results"][2]["id"]).name, "REST API Batch Group 3"
+        )
+        self.assertFalse(self.env["res.partner"].search([("name", "=", "REST API Batch Member 2")]))
+
+    def test_02_create_groups_batch_fallback(self):
+        # The future registration date only fails when the group is created, which rolls the
+        # batch back and creates the groups one by one
+        res = self.api_open(
+            "/groups:batch",
+            payload={
+                "groups": [
+                    self.get_group_payload(
+                        "REST API Fallback Group 1", [("REST API Fallback Member 1", ["Head"])]
+                    ),
+                    self.get_group_payload(
+                        "REST API Fallback Group 2",
+                        [("REST API Fallback Member 2", [])],
+                        registration_date="2999-01-01",
+                    ),
+                ]
+            },
+        )
+        self.assertEqual(res.status_code, 200)
+        data = res.json()
+        self.assertEqual(data["created_count"], 1)
+        self.assertEqual(data["failed_count"], 1)
+        self.assertEqual([result["status"] for result in data["results"]], ["created", "failed"])
+        self.assertEqual(data["results"][1]["error"]["errorCode"], "G2P-REQ-014")
+
+        group = self.env["res.partner"].browse(data["results"][0]["id"])
+        self.assertEqual(group.group_membership_ids.individual.name, "REST API Fallback Member 1")
+        self.assertFalse(
+            self.env["res.partner"].search(
+                [("name", "in", ["REST API Fallback Group 2", "REST API Fallback Member 2"])]
+            )
+        )
+
+    def test_03_search_groups_parity(self):
+        head = self.create_individual("REST API Parity Head", id_values=["PH-1"])
+        member = self.create_individual("REST API Parity Member")
+        group = self.create_group(
+            "REST API Parity Group", [(head, self.head_kind), (member, self.env["g2p.group.membership.kind"])]
+        )
+
+        res = self.api_open(f"/group/{group.id}")
+        self.assertEqual(res.status_code, 200)
+        expected = res.json()
+        members = {item["individual"]["name"]: item for item in expected["group_membership_ids"]}
+        self.assertEqual(set(members), {"REST API Parity Head", "REST API Parity Member"})
+        self.assertEqual(members["REST API Parity Head"]["kind"], [{"name": "Head"}])
+        self.assertEqual(
+            [reg_id["value"] for reg_id in members["REST API Parity Head"]["individual"]["reg_ids"]], ["PH-1"]
+        )
+
+        # The search serializes its page in bulk, the read by ID one record at a time
+        res = self.api_open("/group", params={"_id": group.id, "include_members_full": "true"})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), [expected])
+
+    def test_04_get_group_not_modified(self):
+        head = self.create_individual("REST API ETag Head")
+        group = self.create_group("REST API ETag Group", [(head, self.head_kind)])
+
+        res = self.api_open(f"/group/{group.id}")
+        self.assertEqual(res.status_code, 200)
+        etag = res.headers["ETag"]
+
+        res = self.api_open(f"/group/{group.id}", headers={"if-none-match": etag})
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.headers["ETag"], etag)
+        self.assertFalse(res.content)
+
+        # The tag changes with the members of the group and their IDs
+        member = self.create_individual("REST API ETag Member")
+        self.env["g2p.group.membership"].create({"group": group.id, "individual": member.id})
+        res = self.api_open(f"/group/{group.id}", headers={"if-none-match": etag})
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res.headers["ETag"], etag)
+        etag = res.headers["ETag"]
+
+        self.env["g2p.reg.id"].create({"partner_id": member.id, "id_type": self.id_type.id, "value": "GT-1"})
+        res = self.api_open(f"/group/{group.id}", headers={"if-none-match": etag})
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res.headers["ETag"], etag)
+
+    def test_05_get_group_members(self):
+        head = self.create_individual("REST API Members Head")
+        member = self.create_individual("REST API Members Member")
+        ended_member = self.create_individual("REST API Members Ended")
+        group = self.create_group(
+            "REST API Members Group",
+            [(head, self.head_kind), (member, self.env["g2p.group.membership.kind"])],
+        )
+        ended_membership = self.env["g2p.group.membership"].create(
+            {
+                "group": group.id,
+                "individual": ended_member.id,
+                "start_date": datetime.now() - timedelta(days=10),
+                "ended_date": datetime.now() - timedelta(days=1),
+            }
+        )
+        memberships = group.group_membership_ids.sorted("id")
+
+        res = self.api_open(f"/group/{group.id}/members")
+        self.assertEqual(res.status_code, 200)
+        data = res.json()
+        self.assertEqual([item["id"] for item in data], (memberships - ended_membership).ids)
+        self.assertEqual([item["individual"]["name"] for item in data], [head.name, member.name])
+        self.assertEqual(data[0]["kind"], [{"name": "Head"}])
+        self.assertFalse(any(item["is_ended"] for item in data))
+
+        res = self.api_open(f"/group/{group.id}/members", params={"include_ended": "true"})
+        self.assertEqual([item["id"] for item in res.json()], memberships.ids)
+        self.assertTrue(res.json()[-1]["is_ended"])
+
+        res = self.api_open(f"/group/{group.id}/members", params={"kind": "Head"})
+        self.assertEqual([item["individual"]["id"] for item in res.json()], head.ids)
+        res = self.api_open(f"/group/{group.id}/members", params={"kind": "Unknown Kind"})
+        self.assertEqual(res.status_code, 400)
+
+        res = self.api_open(f"/group/{group.id}/members", params={"limit": 1})
+        self.assertEqual([item["id"] for item in res.json()], memberships[:1].ids)
+        self.assertEqual(res.headers["X-Next-Cursor"], str(memberships[0].id))
+        res = self.api_open(
+            f"/group/{group.id}/members", params={"limit": 1, "cursor": res.headers["X-Next-Cursor"]}
+        )
+        self.assertEqual([item["id"] for item in res.json()], memberships[1:2].ids)
+        self.assertNotIn("X-Next-Cursor", res.headers)
+
+        res = self.api_open(f"/group/{head.id}/members")
+        self.assertEqual(res.status_code, 400)
@@ -0,0 +1,226 @@
+import json
+
+from odoo import Command
+from odoo.tests import tagged
+
+from ..routers.individual import get_individual_ids
+from .common import RegistryAPITestCase
+
+
+@tagged("-at_install", "post_install")
+class TestIndividualAPI(RegistryAPITestCase):
+    def test_01_search_individuals_by_page(self):
+        individuals = self.env["res.partner"].concat(
+            *(self.create_individual(f"REST API Paging {i}") for i in range(5))
+        )
+
+        res = self.api_open("/individual", params={"name": "REST API Paging", "limit": 2})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([item["id"] for item in res.json()], individuals[:2].ids)
+        self.assertEqual(res.headers["X-Next-Cursor"], str(individuals[1].id))
+        self.assertIn(f"cursor={individuals[1].id}", res.headers["Link"])
+        self.assertIn('rel="next"', res.headers["Link"])
+
+        ids = []
+        params = {"name": "REST API Paging", "limit": 2}
+        while True:
+            res = self.api_open("/individual", params=params)
+            self.assertEqual(res.status_code, 200)
+            ids += [item["id"] for item in res.json()]
+            if "X-Next-Cursor" not in res.headers:
+                break
+            params["cursor"] = res.headers["X-Next-Cursor"]
+        self.assertEqual(ids, individuals.ids)
+        self.assertNotIn("Link", res.headers)
+
+    def test_02_search_individuals_fields(self):
+        self.create_individual("REST API Fields", id_values=["F-1"])
+
+        res = self.api_open("/individual", params={"name": "REST API Fields", "fields": "name,ids"})
+        self.assertEqual(res.status_code, 200)
+        item = res.json()[0]
+        # The id is kept for the cursor and the IDs are keyed by their alias
+        self.assertEqual(set(item), {"id", "name", "reg_ids"})
+        self.assertEqual([reg_id["value"] for reg_id in item["reg_ids"]], ["F-1"])
+
+        res = self.api_open("/individual", params={"name": "REST API Fields", "fields": "name,unknown"})
+        self.assertEqual(res.status_code, 400)
+
+    def test_03_search_individuals_parity(self):
+        individual = self.create_individual(
+            "REST API Parity",
+            id_values=["P-1"],
+            phone_number_ids=[Command.create({"phone_no": "+919876543210"})],
+        )
+
+        res = self.api_open(f"/individual/{individual.id}")
+        self.assertEqual(res.status_code, 200)
+        expected = res.json()
+        self.assertEqual([reg_id["value"] for reg_id in expected["reg_ids"]], ["P-1"])
+        self.assertEqual(expected["reg_ids"][0]["id_type_as_str"], self.id_type.name)
+        self.assertEqual([phone["phone_no"] for phone in expected["phone_number_ids"]], ["+919876543210"])
+
+        # The search serializes its page in bulk, the read by ID one record at a time
+        res = self.api_open("/individual", params={"_id": individual.id})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), [expected])
+
+    def get_individual_payload(self, update_id, name, **values):
+        return {
+            "updateId": update_id,
+            "name": name,
+            "given_name": name,
+            "ids": [],
+            "gender": None,
+            "birth_place": None,
+            **values,
+        }
+
+    def test_04_upsert_individuals(self):
+        individual_1 = self.create_individual("REST API Upsert 1", id_values=["U-1"])
+        individual_2 = self.create_individual("REST API Upsert 2", id_values=["U-2"])
+
+        res = self.api_open(
+            "/individuals:batch",
+            params={"id_type": self.id_type.name},
+            payload=[
+                self.get_individual_payload(
+                    "U-1", "REST API Upsert 1 Updated", registration_date="2020-01-01"
+                ),
+                self.get_individual_payload("U-3", "REST API Upsert 3"),
+                self.get_individual_payload("U-3", "REST API Upsert 3 Again"),
+                self.get_individual_payload(
+                    "U-4", "REST API Upsert 4", ids=[{"id_type": "Unknown ID Type", "value": "X-4"}]
+                ),
+                # The future registration dates only fail when the individuals are written, so
+                # that the batch is written again one individual at a time
+                self.get_individual_payload(
+                    "U-2", "REST API Upsert 2 Updated", registration_date="2999-01-01"
+                ),
+                self.get_individual_payload("U-5", "REST API Upsert 5", registration_date="2999-01-01"),
+            ],
+            method="PUT",
+        )
+        self.assertEqual(res.status_code, 200)
+        data = res.json()
+        self.assertEqual((data["updated_count"], data["created_count"], data["failed_count"]), (1, 1, 4))
+        self.assertEqual([result["index"] for result in data["results"]], list(range(6)))
+        self.assertEqual(
+            [result["status"] for result in data["results"]],
+            ["updated", "created", "failed", "failed", "failed", "failed"],
+        )
+        self.assertEqual(
+            [result["error"]["errorCode"] for result in data["results"][2:]],
+            ["G2P-REQ-014", "G2P-REQ-005", "G2P-REQ-014", "G2P-REQ-014"],
+        )
+
+        self.assertEqual(data["results"][0]["id"], individual_1.id)
+        self.assertEqual(individual_1.given_name, "REST API Upsert 1 Updated")
+        self.assertEqual(individual_1.reg_ids.value, "U-1")
+        self.assertEqual(individual_2.given_name, "REST API Upsert 2")
+        self.assertFalse(individual_2.registration_date)
+
+        created = self.env["res.partner"].browse(data["results"][1]["id"])
+        self.assertEqual(created.given_name, "REST API Upsert 3")
+        self.assertEqual(created.reg_ids.id_type, self.id_type)
+        self.assertEqual(created.reg_ids.value, "U-3")
+        self.assertFalse(
+            self.env["res.partner"].search([("given_name", "in", ["REST API Upsert 4", "REST API Upsert 5"])])
+        )
+
+        # The created individual is updated by the next upsert
+        res = self.api_open(
+            "/individuals:batch",
+            params={"id_type": self.id_type.name},
+            payload=[self.get_individual_payload("U-3", "REST API Upsert 3 Updated")],
+            method="PUT",
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            res.json()["results"], [{"index": 0, "status": "updated", "id": created.id, "error": None}]
+        )
+        self.assertEqual(created.given_name, "REST API Upsert 3 Updated")
+
+    def test_05_upsert_individuals_unknown_id_type(self):
+        res = self.api_open(
+            "/individuals:batch",
+            params={"id_type": "Unknown ID Type"},
+            payload=[self.get_individual_payload("U-1", "REST API Upsert 1")],
+            method="PUT",
+        )
+        self.assertEqual(res.status_code, 400)
+
+    def test_06_get_individual_ids(self):
+        excluded_id_type = self.env["g2p.id.type"].create({"name": "REST API Excluded ID"})
+
+        def get_reg_ids(*values, status="valid", id_type=self.id_type):
+            return [
+                Command.create({"id_type": id_type.id, "value": value, "status": status}) for value in values
+            ]
+
+        self.create_individual("REST API IDs 1", reg_ids=get_reg_ids("I-1"))
+        self.create_individual("REST API IDs 2", reg_ids=get_reg_ids("I-2"))
+        self.create_individual("REST API IDs 2 Again", reg_ids=get_reg_ids("I-2"))
+        self.create_individual(
+            "REST API IDs 3", reg_ids=get_reg_ids("I-3") + get_reg_ids("X-3", id_type=excluded_id_type)
+        )
+        self.create_individual("REST API IDs 4", reg_ids=get_reg_ids("I-4", status="invalid"))
+        self.create_individual("REST API IDs 5", reg_ids=get_reg_ids("I-5"), active=False)
+        params = {"include_id_type": self.id_type.name, "exclude_id_type": excluded_id_type.name}
+
+        res = self.api_open("/get_individual_ids", params=dict(params, limit=1))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), ["I-1"])
+        self.assertEqual(res.headers["X-Next-Cursor"], "I-1")
+        res = self.api_open("/get_individual_ids", params=dict(params, limit=1, cursor="I-1"))
+        self.assertEqual(res.json(), ["I-2"])
+        self.assertNotIn("X-Next-Cursor", res.headers)
+
+        res = self.api_open("/get_individual_ids", params=dict(params, limit=10, format="csv"))
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.headers["content-type"].startswith("text/csv"))
+        self.assertEqual(res.text.splitlines(), ["value", "I-1", "I-2"])
+
+        res = self.api_open("/get_individual_ids", params=dict(params, limit=10, format="ndjson"))
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.headers["content-type"].startswith("application/x-ndjson"))
+        self.assertEqual([json.loads(line) for line in res.text.splitlines()], ["I-1", "I-2"])
+
+        # Without a limit, all the IDs are streamed
+        response = get_individual_ids(
+            env=self.env, http_request=None, response=None, include_id_type=self.id_type.name
+        )
+        self.assertEqual(json.loads(self.read_stream(response)), ["I-1", "I-2", "I-3"])
+        response = get_individual_ids(
+            env=self.env,
+            http_request=None,
+            response=None,
+            include_id_type=self.id_type.name,
+            exclude_id_type=excluded_id_type.name,
+            response_format="csv",
+        )
+        self.assertEqual(self.read_stream(response).splitlines(), ["value", "I-1", "I-2"])
+
+    def test_07_get_individual_not_modified(self):
+        individual = self.create_individual("REST API ETag", id_values=["T-1"])
+
+        res = self.api_open(f"/individual/{individual.id}")
+        self.assertEqual(res.status_code, 200)
+        etag = res.headers["ETag"]
+
+        res = self.api_open(f"/individual/{individual.id}", headers={"if-none-match": etag})
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.headers["ETag"], etag)
+        self.assertFalse(res.content)
+        res = self.api_open(f"/individual/{individual.id}", headers={"if-none-match": f'"other", W/{etag}'})
+        self.assertEqual(res.status_code, 304)
+
+        # The tag changes with the phone numbers of the individual
+        self.env["g2p.phone.number"].create({"partner_id": individual.id, "phone_no": "+919876543210"})
+        res = self.api_open(f"/individual/{individual.id}", headers={"if-none-match": etag})
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res.headers["ETag"], etag)
+        self.assertEqual([phone["phone_no"] for phone in res.json()["phone_number_ids"]], ["+919876543210"])
+
+        res = self.api_open(f"/individual/{individual.id + 1000000}", headers={"if-none-match": "*"})
+        self.assertEqual(res.status_code, 400)
@@ -0,0 +1,103 @@
+"""
+Benchmark of the serialization of registrant payloads of the registry REST API.
+
+Builds registrant payloads shaped like the individual search results, then measures the
+serialization time with the standard JSON encoder and with orjson, and the bytes on the wire
+without compression, with gzip and with brotli. orjson and brotli are measured when they are
+installed. Run it from anywhere with Python 3::
+
+    python benchmark_serialization.py --sizes 1000,10000
+"""
+
+import argparse
+import gzip
+import json
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def get_payload(size):
+    return [
+        {
+            "id": i,
+            "name": f"FAMILY{i}, GIVEN{i}",
+            "ids": [
+                {"id": i * 2, "id_type": "National ID", "value": f"{i:010d}", "expiry_date": "2030-01-01"},
+                {"id": i * 2 + 1, "id_type": "Tax ID", "value": f"T{i:09d}", "expiry_date": None},
+            ],
+            "is_group": False,
+            "registration_date": "2024-05-01",
+            "phone_numbers": [
+                {
+                    "id": i,
+                    "phone_no": f"+1 555 {i % 10000:04d}",
+                    "phone_sanitized": f"+1555{i % 10000:04d}",
+                    "date_collected": "2024-05-01",
+                }
+            ],
+            "email": f"registrant{i}@example.org",
+            "address": f"{i} Main Street, District {i % 50}",
+            "create_date": "2024-05-01T10:00:00+00:00",
+            "write_date": "2024-06-01T10:00:00+00:00",
+            "given_name": f"GIVEN{i}",
+            "addl_name": None,
+            "family_name": f"FAMILY{i}",
+            "gender": "Female" if i % 2 else "Male",
+            "birthdate": "1990-01-01",
+            "age": "34",
+            "birth_place": None,
+        }
+        for i in range(size)
+    ]
+
+
+def dumps_json(payload):
+    # As the default JSON responses of Starlette
+    return json.dumps(
+        payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode()
+
+
+def measure(dumps, payload, repeat):
+    durations = []
+    for _i in range(repeat):
+        start = time.perf_counter()
+        body = dumps(payload)
+        durations.append(time.perf_counter() - start)
+    return min(durations) * 1000, body
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", default="1000,10000", help="Comma separated numbers of registrants")
+    parser.add_argument("--repeat", type=int, default=5, help="Best of this number of runs")
+    args = parser.parse_args()
+
+    encoders = [("json", dumps_json)]
+    if orjson is not None:
+        encoders.append(("orjson", orjson.dumps))
+
+    print(f"{'size':>7} {'encoder':>8} {'ms':>9} {'bytes':>11} {'gzip':>11} {'brotli':>11}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        payload = get_payload(size)
+        for name, dumps in encoders:
+            duration, body = measure(dumps, payload, args.repeat)
+            # Compression levels of the gzip and brotli middlewares
+            gzip_size = len(gzip.compress(body, compresslevel=9))
+            brotli_size = len(brotli.compress(body, quality=4)) if brotli is not None else "-"
+            print(f"{size:>7} {name:>8} {duration:>9.1f} {len(body):>11} {gzip_size:>11} {brotli_size:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Load test of the registry REST API.
+
+Sends the same GET request from concurrent clients and reports the throughput and the
+latencies, so that the endpoints can be compared before and after a change. Only the
+standard library is used, run it from anywhere with Python 3::
+
+    python load_test.py http://localhost:8069/api/v1/registry/individual/1 \\
+        --user admin --password admin --concurrency 1,8,32 --requests 500
+"""
+
+import argparse
+import base64
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def send_request(url, headers):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+            response.read()
+            ok = response.status < 400
+    except Exception:
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def run(url, headers, concurrency, request_count):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda _i: send_request(url, headers), range(request_count)))
+    duration = time.perf_counter() - start
+    latencies = sorted(latency for latency, _ok in results)
+    return {
+        "concurrency": concurrency,
+        "requests": request_count,
+        "errors": sum(1 for _latency, ok in results if not ok),
+        "throughput": request_count / duration,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "max": latencies[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("url")
+    parser.add_argument("--user")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma separated numbers of clients")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    args = parser.parse_args()
+
+    headers = {}
+    if args.user:
+        credentials = base64.b64encode(f"{args.user}:{args.password}".encode()).decode()
+        headers["Authorization"] = f"Basic {credentials}"
+
+    print(
+        f"{'clients':>8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"
+    )
+    for concurrency in (int(value) for value in args.concurrency.split(",")):
+        res = run(args.url, headers, concurrency, args.requests)
+        print(
+            f"{res['concurrency']:>8} {res['requests']:>9} {res['errors']:>7} {res['throughput']:>9.1f} "
+            f"{res['p50']:>9.1f} {res['p95']:>9.1f} {res['max']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()